@@ -6,13 +6,19 @@
 
 # gerar_consolidados_sem_hash_e_sem_upload.py
 import pandas as pd
-import requests
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os
-import sys
-from io import BytesIO
 
 # Carregamento de variaveis de ambientes e funções 
 from utils.config import *
+from utils.download import baixar_arquivo_condicional
+from utils.tratamento import converter_valores, montar_datahora
+from utils.balanco import atualizar_balanco
+from utils.atipicos import FILTRO_ATIPICOS, CHAVE_ATIPICOS, marcar_atipicos
+from utils.alertas import atualizar_alertas
+from utils.defasagem import atualizar_defasagens
 
 
 # In[2]:
@@ -42,32 +48,26 @@ def processar_dados(dados, valor_maximo, nome_fonte):
     Varre linhas/horas, limpa valores, filtra por limites e monta:
     ['Fonte','DataHoraReal','Valor','MediaMovel_6'].
     Mantém a MM de janela 6 exatamente como estava (sem groupby/ordenar antes).
+    A quantidade de valores rejeitados pela limpeza fica em df.attrs["rejeitados"].
     """
-    linhas = []
-    for _, row in dados.iterrows():
-        data_atual = row["Data"]
-        for coluna in row.index:
-            if coluna != "Data":
-                valor_bruto = row[coluna]
-                if isinstance(valor_bruto, str):
-                    valor_bruto = valor_bruto.replace("<", "").replace(",", ".").strip()
-                valor = pd.to_numeric(valor_bruto, errors="coerce")
-                if pd.notna(valor) and valor != 0 and valor <= valor_maximo:
-                    linhas.append({
-                        "Data": data_atual,
-                        "Hora": coluna,
-                        "Valor": valor,
-                        "Fonte": nome_fonte
-                    })
-    df = pd.DataFrame(linhas)
+    horas = [coluna for coluna in dados.columns if coluna != "Data"]
+    # Achata linha a linha (mesma ordem do laço linha -> hora)
+    valores, rejeitados = converter_valores(dados[horas].to_numpy(dtype=object).ravel())
+    df = pd.DataFrame({
+        "Data": np.repeat(dados["Data"].to_numpy(), len(horas)),
+        "Hora": np.tile(np.array(horas, dtype=object), len(dados)),
+        "Valor": valores.to_numpy(),
+        "Fonte": nome_fonte,
+    })
+    df = df[df["Valor"].notna() & (df["Valor"] != 0) & (df["Valor"] <= valor_maximo)].reset_index(drop=True)
     if not df.empty:
-        df["Data"] = pd.to_datetime(df["Data"], errors="coerce").dt.date
-        df["HoraCorrigida"] = df["Hora"].replace({"24:00": "23:59"})
-        df["DataHoraReal"] = pd.to_datetime(df["Data"].astype(str) + " " + df["HoraCorrigida"], errors="coerce")
+        # Data à meia-noite + deslocamento da hora ("24:00" -> 23:59)
+        df["DataHoraReal"] = montar_datahora(df["Data"], df["Hora"])
         df = df.dropna(subset=["DataHoraReal", "Valor"])
         df = df[df["Valor"] <= valor_maximo].reset_index(drop=True)
         df["MediaMovel_6"] = df["Valor"].rolling(window=6, min_periods=1).mean()
         df = df[["Fonte", "DataHoraReal", "Valor", "MediaMovel_6"]]
+    df.attrs["rejeitados"] = rejeitados
     return df
 
 # =========================
@@ -95,30 +95,20 @@ def carregar_dados_batelada(arquivo, aba, colunas):
 
 def processar_dados_batelada(dados, valor_maximo, nome_fonte):
     """
-    Normaliza ValorBruto, filtra e monta:
+    Normaliza ValorBruto (mesma limpeza das séries, ver converter_valores), filtra e monta:
     ['DataHoraReal','Valor','Batelada','Fonte'].
-    Mantém exatamente a mesma lógica do script original.
+    A quantidade de valores rejeitados pela limpeza fica em df.attrs["rejeitados"].
     """
-    dados["Valor"] = (
-        dados["ValorBruto"]
-        .astype(str)
-        .str.replace(r"[^\d,.\-]", "", regex=True)
-        .str.replace(",", ".", regex=False)
-        .str.replace(r"\.{2,}", ".", regex=True)
-        .str.strip()
-    )
-
-    dados["Valor"] = pd.to_numeric(dados["Valor"], errors="coerce")
+    dados["Valor"], rejeitados = converter_valores(dados["ValorBruto"])
     dados = dados[(dados["Valor"].notna()) & (dados["Valor"] != 0) & (dados["Valor"] <= valor_maximo)].copy()
 
     if dados.empty:
-        return pd.DataFrame()
+        vazio = pd.DataFrame()
+        vazio.attrs["rejeitados"] = rejeitados
+        return vazio
 
-    dados["Data"] = pd.to_datetime(dados["Data"], errors="coerce").dt.date
-    dados["HoraCorrigida"] = dados["Hora"].astype(str).str.strip().replace({"24:00": "23:59"})
-    dados["DataHoraReal"] = pd.to_datetime(
-        dados["Data"].astype(str) + " " + dados["HoraCorrigida"], errors="coerce"
-    )
+    # Data à meia-noite + deslocamento da hora ("24:00" -> 23:59)
+    dados["DataHoraReal"] = montar_datahora(dados["Data"], dados["Hora"])
 
     dados["Batelada"] = pd.to_numeric(dados["Batelada"], errors="coerce")
     dados = dados[dados["Batelada"].notna()]
@@ -127,47 +117,123 @@ def processar_dados_batelada(dados, valor_maximo, nome_fonte):
     dados = dados.dropna(subset=["DataHoraReal", "Valor", "Batelada"])
     dados["Fonte"] = nome_fonte
 
-    return dados[["DataHoraReal", "Valor", "Batelada", "Fonte"]]
+    dados = dados[["DataHoraReal", "Valor", "Batelada", "Fonte"]]
+    dados.attrs["rejeitados"] = rejeitados
+    return dados
+
+def resumir_bateladas(df_batelada):
+    """
+    Resume o consolidado de batelada por (Fonte, Batelada) e monta:
+    ['Fonte','Batelada','Filtro','Inicio','Fim','Amostras','Media','Primeiro','Ultimo','DeltaEntradaSaida'].
+    DeltaEntradaSaida = Media(CUBA_Entrada_X) - Media(CUBA_Saida_X) da mesma batelada,
+    repetido nas duas linhas do par; vazio para as demais fontes.
+    """
+    colunas = [
+        "Fonte", "Batelada", "Filtro", "Inicio", "Fim",
+        "Amostras", "Media", "Primeiro", "Ultimo", "DeltaEntradaSaida",
+    ]
+    if df_batelada.empty:
+        return pd.DataFrame(columns=colunas)
+
+    # Valor desempata amostras no mesmo horário (resultado independe da ordem de entrada)
+    df = df_batelada.sort_values(["Fonte", "Batelada", "DataHoraReal", "Valor"], kind="stable")
+    resumo = (
+        df.groupby(["Fonte", "Batelada"], sort=True)
+        .agg(
+            Filtro=("Filtro", "first"),
+            Inicio=("DataHoraReal", "min"),
+            Fim=("DataHoraReal", "max"),
+            Amostras=("Valor", "size"),
+            Media=("Valor", "mean"),
+            Primeiro=("Valor", "first"),
+            Ultimo=("Valor", "last"),
+        )
+        .reset_index()
+    )
+
+    # Pares CUBA_Entrada_X / CUBA_Saida_X (X = Au, NaOH, CN...)
+    par = resumo["Fonte"].str.extract(r"^CUBA_(Entrada|Saida)_(.+)$")
+    resumo["Lado"], resumo["Analito"] = par[0], par[1]
+    medias = (
+        resumo.dropna(subset=["Lado"])
+        .pivot_table(index=["Batelada", "Analito"], columns="Lado", values="Media")
+        .reindex(columns=["Entrada", "Saida"])
+    )
+    delta = (medias["Entrada"] - medias["Saida"]).rename("DeltaEntradaSaida").reset_index()
+    resumo = resumo.merge(delta, on=["Batelada", "Analito"], how="left")
+    resumo["Batelada"] = resumo["Batelada"].astype("int64")
+
+    return resumo[colunas]
 
 # =========================
 # ====== EXECUÇÃO (sem hash e sem upload)
 # =========================
 
-def baixar_excel_para_bytesio(fonte_excel):
+def obter_excel(fonte_excel):
     """
-    Se 'fonte_excel' for URL (http/https), baixa via requests.
+    Se 'fonte_excel' for URL (http/https), baixa para o cache local
+    (download condicional com ETag/Last-Modified: se o arquivo não mudou no
+    servidor, reaproveita a última cópia sem baixá-lo de novo).
     Se for caminho local (.xlsx), abre direto.
-    Retorna um objeto BytesIO ou o próprio caminho (ambos são aceitos por read_excel).
+    Retorna o caminho do arquivo (local ou em cache), aceito por read_excel.
     """
     if isinstance(fonte_excel, str) and fonte_excel.lower().startswith(("http://", "https://")):
         print("Baixando arquivo do SharePoint/URL...")
-        resp = requests.get(fonte_excel)
-        if resp.status_code != 200:
-            raise RuntimeError(f"Erro ao baixar o arquivo (status {resp.status_code}).")
-        return BytesIO(resp.content)
+        caminho, meta = baixar_arquivo_condicional(fonte_excel)
+        if not meta["modificado"]:
+            print("Arquivo sem alterações no servidor; usando cópia em cache.")
+        return caminho
     # caminho local:
     return fonte_excel
 
-def gerar_consolidados(
+# Esquemas dos parquet gravados em partes (uma parte/row group por fonte)
+SCHEMA_SERIES = pa.schema([
+    ("Fonte", pa.string()),
+    ("DataHoraReal", pa.timestamp("ns")),
+    ("Valor", pa.float64()),
+    ("MediaMovel_6", pa.float64()),
+    ("Filtro", pa.string()),
+])
+SCHEMA_BATELADA = pa.schema([
+    ("DataHoraReal", pa.timestamp("ns")),
+    ("Valor", pa.float64()),
+    ("Batelada", pa.int64()),
+    ("Fonte", pa.string()),
+    ("Filtro", pa.string()),
+])
+CHAVE_BATELADA = ["Fonte", "DataHoraReal", "Valor", "Batelada"]
+
+def marcar_atipicos_serie(df, anteriores=None):
+    """
+    Estágio opcional após processar_dados: marca em Outlier os valores atípicos da
+    fonte (Hampel com janela móvel, ver utils/atipicos.py) sem removê-los, e refaz
+    a MediaMovel_6 (mesma ordem e janela) sem os valores marcados.
+    'anteriores' são as marcas da execução anterior (só a cauda nova é recalculada).
+    """
+    df = marcar_atipicos(df, anteriores)
+    df["MediaMovel_6"] = df["Valor"].where(~df["Outlier"]).rolling(window=6, min_periods=1).mean()
+    return df
+
+def iterar_consolidados(
     fonte_excel,
     conjuntos_series=None,
     conjuntos_batelada=None,
-    caminho_series="consolidado.parquet",
-    caminho_batelada="consolidado_batelada.parquet",
+    engine="pandas",
+    atipicos=False,
+    atipicos_anteriores=None,
 ):
     """
-    Executa os dois pipelines (séries e batelada) SEM hash e SEM upload.
-    Salva os arquivos parquet nos caminhos informados.
-    Retorna (df_final, df_final_batelada).
+    Versão em streaming dos dois pipelines: processa um conjunto (aba/fonte) por vez
+    e gera tuplas (tipo, nome, df), com tipo "series" ou "batelada", na ordem dos conjuntos.
+    Cada df já tem a coluna Filtro e vem ordenado por DataHoraReal (desc); conjuntos sem
+    linhas não são gerados. Com engine="polars", df é uma pyarrow.Table saída direto do
+    Polars (exceto as séries com 'atipicos', que passam pelo pandas). Quem consome pode gravar/enviar as primeiras fontes enquanto
+    as próximas abas ainda estão sendo lidas.
 
-    Parâmetros
-    ----------
-    fonte_excel : str ou bytes-like
-        Caminho ou fonte do Excel.
-    conjuntos_series : iterable[tuple]
-        Cada tupla: (aba, colunas, val_max, nome, horas, [filtro])
-    conjuntos_batelada : iterable[tuple]
-        Cada tupla: (aba, colunas, val_max, nome, [filtro])
+    Com 'atipicos', as séries ganham a coluna Outlier (ver marcar_atipicos_serie);
+    'atipicos_anteriores' são as marcas da execução anterior (CHAVE_ATIPICOS + Outlier).
+
+    Parâmetros: os mesmos de gerar_consolidados.
     """
 
     if conjuntos_series is None:
@@ -176,12 +242,22 @@ def gerar_consolidados(
     if conjuntos_batelada is None:
         conjuntos_batelada = CONJUNTOS_BATELADA_DEFAULT
 
-    excel_data = baixar_excel_para_bytesio(fonte_excel)
+    if engine == "polars":
+        import polars as pl
+        from utils.etl_polars import (
+            processar_dados_polars, processar_dados_batelada_polars, ordenar_para_gravacao, remover_repetidas,
+        )
+
+    excel_data = obter_excel(fonte_excel)
+
+    # Marcas da execução anterior por fonte (atípicos incrementais)
+    anteriores_por_fonte = {}
+    if atipicos and atipicos_anteriores is not None:
+        anteriores_por_fonte = dict(tuple(atipicos_anteriores.groupby("Fonte", sort=False)))
 
     # =========================
     #        SÉRIES
     # =========================
-    todos_dados = []
     print("Processando dados (séries)...")
 
     for item in conjuntos_series:
@@ -194,30 +270,45 @@ def gerar_consolidados(
             aba, colunas, val_max, nome, horas, filtro = item
 
         dados = carregar_dados(excel_data, aba, colunas, horas)
-        df = processar_dados(dados, val_max, nome)
+        if engine == "polars":
+            lf, rejeitados = processar_dados_polars(dados, val_max, nome, filtro)
+            if not atipicos:
+                # Sai do Polars direto como tabela Arrow (sem passar pelo pandas)
+                if rejeitados:
+                    print(f"{nome} ({aba}): {rejeitados} valores rejeitados na limpeza")
+                tabela = ordenar_para_gravacao(lf).collect().to_arrow()
+                if tabela.num_rows:
+                    yield "series", nome, tabela
+                continue
+            # Marcação de atípicos é feita em pandas
+            df = lf.collect().to_pandas()
+        else:
+            df = processar_dados(dados, val_max, nome)
+            rejeitados = df.attrs.get("rejeitados", 0)
+            if not df.empty:
+                df["Filtro"] = filtro
 
-        if not df.empty:
-            df["Filtro"] = filtro
-            todos_dados.append(df)
-
-    if todos_dados:
-        df_final = pd.concat(todos_dados, ignore_index=True)
-    else:
-        df_final = pd.DataFrame(
-            columns=["Fonte", "DataHoraReal", "Valor", "MediaMovel_6", "Filtro"]
-        )
+        if rejeitados:
+            print(f"{nome} ({aba}): {rejeitados} valores rejeitados na limpeza")
 
-    df_final = df_final.sort_values(by="DataHoraReal", ascending=False).reset_index(drop=True)
-    print(f"Séries consolidadas: {len(df_final)} linhas")
-    df_final.to_parquet(caminho_series, index=False)
-    print(f"Arquivo salvo: {caminho_series}")
+        if atipicos and not df.empty:
+            df = marcar_atipicos_serie(df, anteriores_por_fonte.get(nome))
+            if df["Outlier"].any():
+                print(f"{nome} ({aba}): {int(df['Outlier'].sum())} valores marcados como atípicos")
+
+        if not df.empty:
+            yield "series", nome, df.sort_values(by="DataHoraReal", ascending=False, kind="stable")
 
     # =========================
     #       BATELADA
     # =========================
-    todos_batelada = []
     print("Processando dados de batelada...")
 
+    # Fontes que aparecem em mais de um conjunto: guarda as chaves já geradas
+    # para manter a remoção de duplicadas entre conjuntos
+    repeticoes = pd.Series([item[3] for item in conjuntos_batelada]).value_counts()
+    chaves_geradas = {}
+
     for item in conjuntos_batelada:
         # Suporta tanto (aba, colunas, val_max, nome)
         # quanto (aba, colunas, val_max, nome, filtro)
@@ -228,37 +319,145 @@ def gerar_consolidados(
             aba, colunas, val_max, nome, filtro = item
 
         dados_b = carregar_dados_batelada(excel_data, aba, colunas)
-        df_b = processar_dados_batelada(dados_b, val_max, nome)
-        print(f"{nome}: {len(df_b)} linhas processadas")
-
-        if not df_b.empty:
-            df_b["Filtro"] = filtro
-            todos_batelada.append(df_b)
-
-    if todos_batelada:
-        df_final_batelada = (
-            pd.concat(todos_batelada, ignore_index=True)
-            .drop_duplicates(subset=["Fonte", "DataHoraReal", "Valor", "Batelada"])
-            .reset_index(drop=True)
-        )
-    else:
-        df_final_batelada = pd.DataFrame(
-            columns=["DataHoraReal", "Valor", "Batelada", "Fonte", "Filtro"]
-        )
+        if engine == "polars":
+            lf_b, rejeitados = processar_dados_batelada_polars(dados_b, val_max, nome, filtro)
+            df_b = lf_b.collect()
+            print(f"{nome}: {df_b.height} linhas processadas, {rejeitados} valores rejeitados")
+
+            # Remoção de repetidas e ordenação no próprio Polars; sai como tabela Arrow
+            df_b = ordenar_para_gravacao(
+                remover_repetidas(df_b.lazy(), CHAVE_BATELADA, chaves_geradas.get(nome))
+            ).collect()
+            if repeticoes[nome] > 1:
+                chaves_geradas[nome] = pl.concat(
+                    [chaves for chaves in (chaves_geradas.get(nome), df_b.select(CHAVE_BATELADA)) if chaves is not None]
+                )
+            if df_b.height:
+                yield "batelada", nome, df_b.to_arrow()
+            continue
+        else:
+            df_b = processar_dados_batelada(dados_b, val_max, nome)
+            rejeitados = df_b.attrs.get("rejeitados", 0)
+            if not df_b.empty:
+                df_b["Filtro"] = filtro
+        print(f"{nome}: {len(df_b)} linhas processadas, {rejeitados} valores rejeitados")
+
+        if df_b.empty:
+            continue
+
+        df_b = df_b.drop_duplicates(subset=CHAVE_BATELADA)
+        if repeticoes[nome] > 1:
+            anteriores = chaves_geradas.get(nome)
+            if anteriores is not None:
+                df_b = (
+                    df_b.merge(anteriores, on=CHAVE_BATELADA, how="left", indicator=True)
+                    .query("_merge == 'left_only'")
+                    .drop(columns="_merge")
+                )
+            chaves_geradas[nome] = pd.concat([anteriores, df_b[CHAVE_BATELADA]], ignore_index=True)
+            if df_b.empty:
+                continue
 
-    df_final_batelada = df_final_batelada.sort_values(by="DataHoraReal", ascending=False)
-    df_final_batelada["Valor"] = pd.to_numeric(df_final_batelada["Valor"], errors="coerce")
-    if not df_final_batelada.empty:
-        df_final_batelada["Batelada"] = df_final_batelada["Batelada"].astype("int64")
+        df_b["Valor"] = pd.to_numeric(df_b["Valor"], errors="coerce")
+        df_b["Batelada"] = df_b["Batelada"].astype("int64")
+        yield "batelada", nome, df_b.sort_values(by="DataHoraReal", ascending=False, kind="stable")
 
-    df_final_batelada.to_parquet(
-        caminho_batelada,
-        index=False,
-        engine="pyarrow",
-        compression="snappy",
-    )
+def gerar_consolidados(
+    fonte_excel,
+    conjuntos_series=None,
+    conjuntos_batelada=None,
+    caminho_series="consolidado.parquet",
+    caminho_batelada="consolidado_batelada.parquet",
+    caminho_resumo_batelada=None,
+    engine="pandas",
+    atipicos=FILTRO_ATIPICOS,
+):
+    """
+    Executa os dois pipelines (séries e batelada) SEM hash e SEM upload.
+    Consome iterar_consolidados e grava cada fonte como uma parte (row group) dos
+    parquet nos caminhos informados, sem juntar tudo em memória antes de gravar.
+    Os parquet anteriores só são substituídos se a execução inteira der certo.
+    Dentro de cada fonte as linhas ficam por DataHoraReal (desc); os arquivos seguem
+    a ordem dos conjuntos. Se 'caminho_resumo_batelada' for informado, salva também
+    o resumo por Batelada (ver resumir_bateladas).
+    Retorna (df_final, df_final_batelada), lidos dos parquet gravados.
+
+    Parâmetros
+    ----------
+    fonte_excel : str ou bytes-like
+        Caminho ou fonte do Excel.
+    conjuntos_series : iterable[tuple]
+        Cada tupla: (aba, colunas, val_max, nome, horas, [filtro])
+    conjuntos_batelada : iterable[tuple]
+        Cada tupla: (aba, colunas, val_max, nome, [filtro])
+    engine : "pandas" ou "polars"
+        "polars" executa as transformações de cada fonte como consultas lazy
+        do Polars (multi-thread).
+    atipicos : bool
+        Marca valores atípicos das séries na coluna Outlier (padrão: ETL_FILTRO_ATIPICOS=1).
+        As marcas do parquet anterior são reaproveitadas (só a cauda nova é recalculada).
+    """
+    linhas = {"series": 0, "batelada": 0}
+
+    schema_series = SCHEMA_SERIES
+    atipicos_anteriores = None
+    if atipicos:
+        schema_series = SCHEMA_SERIES.append(pa.field("Outlier", pa.bool_()))
+        # Lido antes de o arquivo ser regravado abaixo
+        if os.path.exists(caminho_series) and "Outlier" in pq.read_schema(caminho_series).names:
+            atipicos_anteriores = pd.read_parquet(
+                caminho_series, columns=CHAVE_ATIPICOS + ["Outlier"], engine="pyarrow"
+            )
+
+    # Grava em arquivos temporários ao lado dos finais e só substitui os parquet
+    # depois que os dois escritores fecharem sem erro: uma falha no meio não deixa
+    # arquivos truncados para o load_Supabase.py enviar
+    temporario_series = f"{caminho_series}.tmp"
+    temporario_batelada = f"{caminho_batelada}.tmp"
+    try:
+        with pq.ParquetWriter(temporario_series, schema_series, compression="snappy") as escritor_series, \
+             pq.ParquetWriter(temporario_batelada, SCHEMA_BATELADA, compression="snappy") as escritor_batelada:
+            escritores = {"series": escritor_series, "batelada": escritor_batelada}
+
+            for tipo, nome, df in iterar_consolidados(
+                fonte_excel, conjuntos_series, conjuntos_batelada, engine, atipicos, atipicos_anteriores
+            ):
+                escritor = escritores[tipo]
+                if isinstance(df, pa.Table):
+                    # Motor polars: tabela Arrow gravada direto (só ajusta os tipos ao esquema)
+                    tabela = df.select(escritor.schema.names).cast(escritor.schema)
+                else:
+                    tabela = pa.Table.from_pandas(df, schema=escritor.schema, preserve_index=False)
+                escritor.write_table(tabela)
+                linhas[tipo] += tabela.num_rows
+
+        os.replace(temporario_series, caminho_series)
+        os.replace(temporario_batelada, caminho_batelada)
+    except BaseException:
+        for temporario in (temporario_series, temporario_batelada):
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        raise
+
+    print(f"Séries consolidadas: {linhas['series']} linhas")
+    print(f"Arquivo salvo: {caminho_series}")
+    print(f"Batelada consolidada: {linhas['batelada']} linhas")
     print(f"Arquivo salvo: {caminho_batelada}")
 
+    df_final = pd.read_parquet(caminho_series, engine="pyarrow")
+    df_final_batelada = pd.read_parquet(caminho_batelada, engine="pyarrow")
+
+    if caminho_resumo_batelada is not None:
+        df_resumo_batelada = resumir_bateladas(df_final_batelada)
+        print(f"Resumo de batelada: {len(df_resumo_batelada)} linhas")
+        df_resumo_batelada.to_parquet(
+            caminho_resumo_batelada,
+            index=False,
+            engine="pyarrow",
+            compression="snappy",
+        )
+        print(f"Arquivo salvo: {caminho_resumo_batelada}")
+
     return df_final, df_final_batelada
 
 
@@ -341,9 +540,24 @@ URL_EXCEL = r"C:\Users\Dataminds2\Aura Minerals\Almas - Performance - Data Minds
 df_amostras, df_batelada = gerar_consolidados(
     fonte_excel=URL_EXCEL,
     caminho_series=PARQUET_AMOSTRAS_HORARIAS,
-    caminho_batelada=PARQUET_AMOSTRAS_BATELADAS
+    caminho_batelada=PARQUET_AMOSTRAS_BATELADAS,
+    caminho_resumo_batelada=PARQUET_RESUMO_BATELADAS,
+    engine=os.getenv("ETL_ENGINE", "pandas"),
 )
 
+# Balanço metalúrgico (incremental: recalcula a partir do primeiro dia com amostras novas ou corrigidas; BALANCO_COMPLETO=1 refaz tudo)
+df_balanco = atualizar_balanco(
+    df_amostras,
+    PARQUET_BALANCO_METALURGICO,
+    completo=os.getenv("BALANCO_COMPLETO", "0") == "1",
+)
+
+# Alertas de limites (só as amostras novas desde a última execução; regras em utils/alertas.py)
+df_alertas = atualizar_alertas(df_amostras, PARQUET_ALERTAS)
+
+# Defasagem entre tanques (correlação cruzada via FFT em janelas móveis; ver utils/defasagem.py)
+df_defasagens = atualizar_defasagens(df_amostras, PARQUET_DEFASAGENS)
+
 
 # In[5]:
 
@@ -20,10 +20,22 @@ load_dotenv(override=True)
 # Carregar variavel de saida para salvar o arquivo parquet
 SUPABASE_TABELA_RESULTADOS_ANALITICOS = os.getenv("SUPABASE_TABELA_RESULTADOS_ANALITICOS")
 SUPABASE_TABELA_RESULTADOS_BATELADAS = os.getenv("SUPABASE_TABELA_RESULTADOS_BATELADAS")
+SUPABASE_TABELA_RESUMO_BATELADAS = os.getenv("SUPABASE_TABELA_RESUMO_BATELADAS", "resumo_bateladas")
+SUPABASE_TABELA_BALANCO_METALURGICO = os.getenv("SUPABASE_TABELA_BALANCO_METALURGICO", "balanco_metalurgico")
+SUPABASE_TABELA_ALERTAS = os.getenv("SUPABASE_TABELA_ALERTAS", "alertas")
+SUPABASE_TABELA_DEFASAGENS = os.getenv("SUPABASE_TABELA_DEFASAGENS", "defasagens")
+SUPABASE_TABELA_VERSAO_DADOS = os.getenv("SUPABASE_TABELA_VERSAO_DADOS", "versao_dados")
+
+# "substituir" (padrão) ou "troca_atomica" (requer sql/troca_atomica.sql no banco)
+SUPABASE_MODO_CARGA = os.getenv("SUPABASE_MODO_CARGA", "substituir")
+
+# "rest" (padrão, API do Supabase) ou "copy" (COPY direto no Postgres, requer SUPABASE_DB_URL e psycopg)
+CARGA_BACKEND = os.getenv("CARGA_BACKEND", "rest")
 
 #Acesso Supabase
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
 
 from utils.funcoes_uteis import *
 from utils.config import *
@@ -35,6 +47,10 @@ from utils.config import *
 # Leitura dos arquivos parquet
 df_resultados_analiticos = ler_parquet(PARQUET_AMOSTRAS_HORARIAS)
 df_resultados_bateladas = ler_parquet(PARQUET_AMOSTRAS_BATELADAS)
+df_resumo_bateladas = ler_parquet(PARQUET_RESUMO_BATELADAS)
+df_balanco_metalurgico = ler_parquet(PARQUET_BALANCO_METALURGICO)
+df_alertas = ler_parquet(PARQUET_ALERTAS)
+df_defasagens = ler_parquet(PARQUET_DEFASAGENS)
 
 
 # In[4]:
@@ -43,12 +59,53 @@ df_resultados_bateladas = ler_parquet(PARQUET_AMOSTRAS_BATELADAS)
 # Preparar coluna de data com fuso horário
 df_resultados_analiticos = preparar_df(df_resultados_analiticos,['DataHoraReal'])
 df_resultados_bateladas= preparar_df(df_resultados_bateladas,['DataHoraReal'])
+df_resumo_bateladas = preparar_df(df_resumo_bateladas,['Inicio', 'Fim'])
+df_balanco_metalurgico = preparar_df(df_balanco_metalurgico,['Inicio', 'Fim'])
+df_alertas = preparar_df(df_alertas,['DataHoraReal', 'AvaliadoEm'])
+df_defasagens = preparar_df(df_defasagens,['Inicio', 'Fim'])
 
 
 # In[5]:
 
 
-# Enviar para o supabase
-envio1 = enviar_dados_supabase(df_resultados_analiticos, SUPABASE_TABELA_RESULTADOS_ANALITICOS, SUPABASE_URL, SUPABASE_KEY)
-envio2 = enviar_dados_supabase(df_resultados_bateladas, SUPABASE_TABELA_RESULTADOS_BATELADAS, SUPABASE_URL, SUPABASE_KEY)
-
+# Enviar para o supabase (tabelas em paralelo)
+resultados_envio = enviar_tabelas_supabase(
+    {
+        SUPABASE_TABELA_RESULTADOS_ANALITICOS: df_resultados_analiticos,
+        SUPABASE_TABELA_RESULTADOS_BATELADAS: df_resultados_bateladas,
+        SUPABASE_TABELA_RESUMO_BATELADAS: df_resumo_bateladas,
+        SUPABASE_TABELA_BALANCO_METALURGICO: df_balanco_metalurgico,
+        SUPABASE_TABELA_ALERTAS: df_alertas,
+        SUPABASE_TABELA_DEFASAGENS: df_defasagens,
+    },
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    modo=SUPABASE_MODO_CARGA,
+    backend=CARGA_BACKEND,
+    db_url=SUPABASE_DB_URL,
+)
+tabelas_com_falha = [tabela for tabela, r in resultados_envio.items() if r["status"] != "SUCESSO"]
+
+
+# In[6]:
+
+
+# Registrar versão da carga (as páginas só baixam as tabelas quando o load_id muda)
+# load_id = hash do conteúdo de cada tabela: sem mudança nos dados, a versão se mantém
+# Só as tabelas enviadas com sucesso ganham nova versão
+registros_versao = [
+    montar_registro_versao(df_resultados_analiticos, SUPABASE_TABELA_RESULTADOS_ANALITICOS),
+    montar_registro_versao(df_resultados_bateladas, SUPABASE_TABELA_RESULTADOS_BATELADAS),
+    montar_registro_versao(df_resumo_bateladas, SUPABASE_TABELA_RESUMO_BATELADAS, coluna_data="Fim"),
+    montar_registro_versao(df_balanco_metalurgico, SUPABASE_TABELA_BALANCO_METALURGICO, coluna_data="Fim"),
+    montar_registro_versao(df_alertas, SUPABASE_TABELA_ALERTAS),
+    montar_registro_versao(df_defasagens, SUPABASE_TABELA_DEFASAGENS, coluna_data="Fim"),
+]
+registros_versao = [r for r in registros_versao if r["tabela"] not in tabelas_com_falha]
+if registros_versao:
+    envio_versao = registrar_versao_supabase(registros_versao, SUPABASE_URL, SUPABASE_KEY, SUPABASE_TABELA_VERSAO_DADOS)
+
+# Código de saída != 0 para o pipeline registrar a falha no log de erros
+if tabelas_com_falha:
+    print(f"Falha no envio de: {', '.join(tabelas_com_falha)}", file=sys.stderr, flush=True)
+    sys.exit(1)
@@ -1,12 +1,8 @@
 import streamlit as st
-import os
 import pandas as pd
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-from supabase import create_client, Client
 from streamlit_autorefresh import st_autorefresh
-from zoneinfo import ZoneInfo  # TZ correto para SP
+from utils.painel import TZ_SP, validar_backend, recarregar_dados, intervalo_fontes, consultar_series, figuras_series, botao_exportacao, ROTULOS_ATIPICOS
 
 # === Configurações iniciais ===
 st.set_page_config(layout="wide", page_title="Médias Móveis - Sólidas", page_icon="⛏️")
@@ -17,89 +13,24 @@ st_autorefresh(interval=15 * 60 * 1000, key="auto_refresh_15min")
 
 # Sidebar: recarregar manual
 if st.sidebar.button("🔁 Recarregar Dados"):
-    st.cache_data.clear()
-    st.session_state.hash_parquet = None
-    st.toast("📦 Dados recarregados manualmente!")
-
-# === Supabase & TZ ===
-# Carrega o .env da pasta atual
-load_dotenv()
-
-def get_config(key: str, default: str | None = None) -> str | None:
-    """
-    Busca um valor de configuração na seguinte ordem:
-    1) st.secrets (para Streamlit Cloud / secrets.toml)
-    2) Variáveis de ambiente (para uso com .env + python-dotenv)
-    3) default (se nada encontrado)
-    """
-    # 1) Tenta st.secrets, mas sem quebrar se não houver secrets.toml
-    try:
-        if key in st.secrets:
-            return st.secrets[key]
-    except FileNotFoundError:
-        # Nenhum secrets.toml definido → ignora e segue
-        pass
-
-    # 2) Tenta variável de ambiente
-    value = os.getenv(key)
-    if value is not None:
-        return value
-
-    # 3) Fallback
-    return default
-
-SUPABASE_URL = get_config("SUPABASE_URL")
-SUPABASE_KEY = get_config("SUPABASE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    st.error("Configuração de Supabase ausente. Verifique .env (local) ou Secrets (Streamlit Cloud).")
-    st.stop()
+    if recarregar_dados("resultados_analiticos"):
+        st.session_state.hash_parquet = None
+        st.toast("📦 Atualização dos dados iniciada em segundo plano!")
+    else:
+        st.toast("⏳ Estes dados foram recarregados há pouco. Tente novamente em instantes.")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-TZ_SP = ZoneInfo("America/Sao_Paulo")
-
-# === Loader com paginação e normalização de TZ ===
-@st.cache_data(show_spinner=True, ttl=900)
-def ler_dados_supabase(tabela: str, pagina_tamanho: int = 1000) -> pd.DataFrame:
-    offset = 0
-    dados_completos = []
-    while True:
-        resposta = (
-            supabase
-            .table(tabela)
-            .select("*")
-            .range(offset, offset + pagina_tamanho - 1)
-            .execute()
-        )
-        dados = resposta.data
-        if not dados:
-            break
-        dados_completos.extend(dados)
-        offset += pagina_tamanho
-
-    df = pd.DataFrame(dados_completos)
-
-    # Normaliza DataHoraReal: ISO8601 -> tz-aware UTC -> TZ São Paulo -> tz-naive
-    if "DataHoraReal" in df.columns and not df.empty:
-        df["DataHoraReal"] = (
-            pd.to_datetime(df["DataHoraReal"], utc=True, errors="coerce")
-              .dt.tz_convert(TZ_SP)
-              .dt.tz_localize(None)
-        )
-    return df
+# === Backend de dados ===
+# Valida a configuração do backend (Supabase ou Parquet local) antes de carregar dados
+validar_backend()
 
 # === Carrega dados e aplica filtro fixo para fontes sólidas ===
-df = ler_dados_supabase("resultados_analiticos")
 fontes_s = ["LIX_Au_S", "TQ2_Au_S", "TQ5_Au_S", "TQ6_Au_S", "TQ7_Au_S","REJ_Au_S", "TQ9_Au_S", "TQ10_Au_S", "TQ11_Au_S", "TQ12_Au_S"]
-df = df[df["Fonte"].isin(fontes_s)]
+intervalos = intervalo_fontes("resultados_analiticos", tuple(fontes_s))
 
-if df.empty:
+if intervalos.empty:
     st.warning("Nenhum dado disponível para as fontes sólidas.")
     st.stop()
 
-# Ordenação temporal antes de cálculos
-df = df.sort_values(["Fonte", "DataHoraReal"], kind="stable")
-
 # === Datas padrão (independentes do intervalo dos dados) ===
 hoje_sp = datetime.now(TZ_SP).date()
 inicio_padrao = (datetime.now(TZ_SP) - timedelta(days=30)).date()
@@ -110,12 +41,12 @@ st.sidebar.header("Configurações")
 # RESET precisa acontecer antes da criação do widget para não tocar no session_state depois
 if st.sidebar.button("🔄 Resetar Filtros"):
     # limpa chaves usadas POR ESTE ARQUIVO
-    for k in ["fontes_solidos", "periodo_solidos_v3", "periodo_movel_solidos", "grafico_unico_solidos"]:
+    for k in ["fontes_solidos", "periodo_solidos_v3", "periodo_movel_solidos", "grafico_unico_solidos", "atipicos_solidos"]:
         st.session_state.pop(k, None)
     st.experimental_rerun()
 
 # Fontes disponíveis e multiselect
-fontes_disponiveis = sorted(df["Fonte"].unique())
+fontes_disponiveis = sorted(intervalos["Fonte"].unique())
 fontes_default = [f for f in st.session_state.get("fontes_solidos", fontes_s) if f in fontes_disponiveis]
 fontes_sel = st.sidebar.multiselect(
     "Fontes:", fontes_disponiveis, default=fontes_default, key="fontes_solidos"
@@ -140,81 +71,63 @@ if isinstance(periodo, (list, tuple)) and len(periodo) == 2:
 else:
     inicio = fim = periodo
 
-# Controles restantes (podem ter value= seguro)
-periodo_movel_val = st.session_state.get("periodo_movel_solidos", 6)
-periodo_movel = st.sidebar.slider(
-    "Média Móvel (períodos):", 1, 20, value=periodo_movel_val, key="periodo_movel_solidos"
-)
-grafico_unico_val = st.session_state.get("grafico_unico_solidos", True)
-grafico_unico = st.sidebar.checkbox(
-    "Exibir em gráfico único", value=grafico_unico_val, key="grafico_unico_solidos"
-)
-
-# === Filtra dados pelo período/seleção ===
-df_filtrado = df[
-    (df["Fonte"].isin(fontes_sel)) &
-    (df["DataHoraReal"].dt.date >= inicio) &
-    (df["DataHoraReal"].dt.date <= fim)
-].copy()
-
-if df_filtrado.empty:
-    st.warning("Nenhum dado encontrado para o período ou fontes selecionadas.")
-    st.stop()
+# === Gráficos (fragmento) ===
+# Média móvel e gráfico único ficam na área principal, dentro de um fragmento:
+# mudar esses controles reexecuta só este trecho, sem refazer filtros e leituras da página.
+@st.experimental_fragment
+def secao_graficos(fontes_sel, inicio, fim):
+    col_movel, col_unico, col_atipicos = st.columns([3, 1, 1])
+    periodo_movel = col_movel.slider(
+        "Média Móvel (períodos):", 1, 20,
+        value=st.session_state.get("periodo_movel_solidos", 6), key="periodo_movel_solidos"
+    )
+    grafico_unico = col_unico.checkbox(
+        "Exibir em gráfico único",
+        value=st.session_state.get("grafico_unico_solidos", True), key="grafico_unico_solidos"
+    )
+    # Amostras marcadas pelo filtro de atípicos do ETL (coluna Outlier)
+    atipicos = col_atipicos.selectbox(
+        "Valores atípicos:", list(ROTULOS_ATIPICOS), format_func=ROTULOS_ATIPICOS.get,
+        key="atipicos_solidos", help="Excluir: ficam fora da média móvel e dos gráficos. Marcar: entram na média e aparecem em destaque."
+    )
 
-# === Calcula média móvel (respeitando ordem temporal) ===
-df_filtrado = df_filtrado.sort_values(["Fonte", "DataHoraReal"], kind="stable")
-df_filtrado["MediaMovel"] = (
-    df_filtrado
-    .groupby("Fonte", group_keys=False)
-    .apply(lambda g: g.assign(
-        MediaMovel=g["Valor"].rolling(window=st.session_state["periodo_movel_solidos"], min_periods=1).mean()
-    ))
-)["MediaMovel"]
-
-# === Ordem lógica dos gráficos ===
-ordem_manual = fontes_s
-fontes_sel = sorted(fontes_sel, key=lambda f: ordem_manual.index(f) if f in ordem_manual else len(ordem_manual))
-
-# === Exibição ===
-if st.session_state["grafico_unico_solidos"]:
-    fig = go.Figure()
-    for fonte in fontes_sel:
-        dados_fonte = df_filtrado[df_filtrado["Fonte"] == fonte]
-        fig.add_trace(go.Scatter(
-            x=dados_fonte["DataHoraReal"],
-            y=dados_fonte["MediaMovel"],
-            mode="lines",
-            name=fonte
-        ))
-    fig.update_layout(
-        title=f"Médias Móveis - {st.session_state['periodo_movel_solidos']} períodos",
-        xaxis_title="Data",
-        yaxis_title="Valor",
-        height=600
+    # Filtro e média móvel (por Fonte, em ordem temporal) feitos no backend de dados
+    df_filtrado = consultar_series("resultados_analiticos", tuple(fontes_sel), inicio, fim, periodo_movel, atipicos)
+    if df_filtrado.empty:
+        st.warning("Nenhum dado encontrado para o período ou fontes selecionadas.")
+        return
+    if atipicos != "incluir" and "Outlier" not in df_filtrado.columns:
+        st.caption("Os dados não têm marcação de atípicos (ETL_FILTRO_ATIPICOS desativado).")
+
+    # Ordem lógica dos gráficos
+    ordem_manual = fontes_s
+    fontes_ordem = sorted(fontes_sel, key=lambda f: ordem_manual.index(f) if f in ordem_manual else len(ordem_manual))
+
+    # Figuras montadas com um único groupby e reaproveitadas entre sessões (mesma versão/filtros)
+    figuras = figuras_series(
+        "resultados_analiticos",
+        df_filtrado,
+        tuple(fontes_ordem),
+        inicio,
+        fim,
+        periodo_movel,
+        grafico_unico,
+        marcador_bruto=dict(size=4),
+        atipicos=atipicos,
     )
-    st.plotly_chart(fig, use_container_width=True)
-else:
-    for fonte in fontes_sel:
-        dados_fonte = df_filtrado[df_filtrado["Fonte"] == fonte]
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=dados_fonte["DataHoraReal"],
-            y=dados_fonte["Valor"],
-            mode="markers",
-            name="Bruto",
-            marker=dict(size=4)
-        ))
-        fig.add_trace(go.Scatter(
-            x=dados_fonte["DataHoraReal"],
-            y=dados_fonte["MediaMovel"],
-            mode="lines",
-            name="Média Móvel"
-        ))
-        fig.update_layout(
-            title=fonte,
-            xaxis_title="Data",
-            yaxis_title="Valor",
-            height=500
+    for subtitulo, fig in figuras:
+        if subtitulo:
+            st.subheader(subtitulo)
+        st.plotly_chart(fig, use_container_width=True)
+
+    # === Exportação do recorte filtrado ===
+    with st.expander("💾 Exportar dados filtrados"):
+        botao_exportacao(
+            df_filtrado,
+            f"balanco_solido_{inicio:%Y%m%d}_{fim:%Y%m%d}",
+            chave="exportar_solidos",
+            assinatura=(df_filtrado.attrs.get("versao"), tuple(fontes_ordem), inicio, fim, periodo_movel, atipicos),
         )
-        st.subheader(fonte)
-        st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+
+
+secao_graficos(fontes_sel, inicio, fim)
@@ -1,13 +1,10 @@
 import streamlit as st
-import os
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-from supabase import create_client, Client
 from streamlit_autorefresh import st_autorefresh
+from utils.painel import TZ_SP, validar_backend, recarregar_dados, ler_tabela, ler_bateladas, media_movel_por_fonte, tabela_paginada, versao_tabela, botao_exportacao
 import plotly.express as px
-from zoneinfo import ZoneInfo  # TZ São Paulo
 
 # === Configurações iniciais ===
 st.set_page_config(layout="wide", page_title="Análise por Batelada - Acácia", page_icon="🌿")
@@ -18,89 +15,27 @@ st_autorefresh(interval=15 * 60 * 1000, key="auto_refresh_15min_acacia")
 
 # === Sidebar: Recarregar manual ===
 if st.sidebar.button("🔁 Recarregar Dados"):
-    st.cache_data.clear()
-    st.session_state.hash_parquet = None
-    st.toast("📦 Dados recarregados manualmente!")
-
-# === Supabase & TZ ===
-# Carrega o .env da pasta atual
-load_dotenv()
-
-def get_config(key: str, default: str | None = None) -> str | None:
-    """
-    Busca um valor de configuração na seguinte ordem:
-    1) st.secrets (para Streamlit Cloud / secrets.toml)
-    2) Variáveis de ambiente (para uso com .env + python-dotenv)
-    3) default (se nada encontrado)
-    """
-    # 1) Tenta st.secrets, mas sem quebrar se não houver secrets.toml
-    try:
-        if key in st.secrets:
-            return st.secrets[key]
-    except FileNotFoundError:
-        # Nenhum secrets.toml definido → ignora e segue
-        pass
-
-    # 2) Tenta variável de ambiente
-    value = os.getenv(key)
-    if value is not None:
-        return value
-
-    # 3) Fallback
-    return default
-
-SUPABASE_URL = get_config("SUPABASE_URL")
-SUPABASE_KEY = get_config("SUPABASE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    st.error("Configuração de Supabase ausente. Verifique .env (local) ou Secrets (Streamlit Cloud).")
-    st.stop()
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-TZ_SP = ZoneInfo("America/Sao_Paulo")
-
-# === Loader com paginação e normalização de TZ ===
-@st.cache_data(show_spinner=True, ttl=900)
-def ler_dados_supabase(tabela: str, pagina_tamanho: int = 1000) -> pd.DataFrame:
-    offset = 0
-    dados_completos = []
-    while True:
-        resposta = (
-            supabase
-            .table(tabela)
-            .select("*")
-            .range(offset, offset + pagina_tamanho - 1)
-            .execute()
-        )
-        dados = resposta.data
-        if not dados:
-            break
-        dados_completos.extend(dados)
-        offset += pagina_tamanho
-
-    df = pd.DataFrame(dados_completos)
-
-    # Normalização DataHoraReal: ISO8601 -> tz-aware UTC -> TZ São Paulo -> tz-naive
-    if "DataHoraReal" in df.columns and not df.empty:
-        df["DataHoraReal"] = (
-            pd.to_datetime(df["DataHoraReal"], utc=True, errors="coerce")
-              .dt.tz_convert(TZ_SP)
-              .dt.tz_localize(None)  # horário local já aplicado
-        )
-    return df
-
-# === Carregar dados (tabela das bateladas) ===
-df = ler_dados_supabase("resultados_bateladas")
-if df.empty:
+    if recarregar_dados("resultados_bateladas", "resumo_bateladas"):
+        st.session_state.hash_parquet = None
+        st.toast("📦 Atualização dos dados iniciada em segundo plano!")
+    else:
+        st.toast("⏳ Estes dados foram recarregados há pouco. Tente novamente em instantes.")
+
+# === Backend de dados ===
+# Valida a configuração do backend (Supabase ou Parquet local) antes de carregar dados
+validar_backend()
+
+# === Carregar resumo por Batelada (uma linha por Fonte/Batelada, gerado no ETL) ===
+resumo = ler_tabela("resumo_bateladas", colunas_data=("Inicio", "Fim"))
+if resumo.empty:
     st.warning("Nenhum dado disponível.")
     st.stop()
 
-# Ordenação temporal antes de cálculos
-df = df.sort_values(["Fonte", "DataHoraReal"], kind="stable")
+resumo = resumo.sort_values(["Fonte", "Batelada"], kind="stable")
 
 # Datas de referência (só para legenda informativa)
-data_max = df["DataHoraReal"].max()
-data_min_total = df["DataHoraReal"].min()
+data_max = resumo["Fim"].max()
+data_min_total = resumo["Inicio"].min()
 
 # === Sidebar — Filtros ===
 st.sidebar.header("Filtros — Acácia")
@@ -115,7 +50,7 @@ if st.sidebar.button("🔄 Resetar Filtros"):
 fontes_Acacia_lista = ["ACA_Rica", "ACA_Pobre", "ACA_CN"]
 
 # Interseção com o que existe nos dados
-fontes_disponiveis = sorted(set(df["Fonte"].dropna().unique()).intersection(fontes_Acacia_lista))
+fontes_disponiveis = sorted(set(resumo["Fonte"].dropna().unique()).intersection(fontes_Acacia_lista))
 if not fontes_disponiveis:
     st.warning("Nenhuma das fontes de Acácia está presente nos dados.")
     st.stop()
@@ -149,15 +84,15 @@ if isinstance(periodo, (list, tuple)) and len(periodo) == 2:
 else:
     inicio = fim = periodo
 
-# 3) Intervalo de Bateladas
-bateladas_disponiveis = sorted(
-    map(int, pd.to_numeric(df["Batelada"], errors="coerce").dropna().astype(int).unique())
-)
-if not bateladas_disponiveis:
+# 3) Intervalo de Bateladas (limites vindos do resumo das fontes da página)
+bateladas_disponiveis = pd.to_numeric(
+    resumo.loc[resumo["Fonte"].isin(fontes_disponiveis), "Batelada"], errors="coerce"
+).dropna()
+if bateladas_disponiveis.empty:
     st.warning("Sem valores de Batelada válidos para filtrar.")
     st.stop()
 
-bat_min, bat_max = int(min(bateladas_disponiveis)), int(max(bateladas_disponiveis))
+bat_min, bat_max = int(bateladas_disponiveis.min()), int(bateladas_disponiveis.max())
 bat_default = st.session_state.get("bat_range_acacia", (bat_min, bat_max))
 if not (isinstance(bat_default, (list, tuple)) and len(bat_default) == 2):
     bat_default = (bat_min, bat_max)
@@ -170,24 +105,32 @@ bat_range = st.sidebar.slider(
     key="bat_range_acacia"
 )
 
-# 4) Média móvel e gráfico único
-periodo_movel_val = st.session_state.get("periodo_movel_acacia", 6)
-periodo_movel = st.sidebar.slider(
-    "Média Móvel (períodos):", 1, 20, value=periodo_movel_val, key="periodo_movel_acacia"
-)
-grafico_unico_val = st.session_state.get("grafico_unico_acacia", True)
-grafico_unico = st.sidebar.checkbox(
-    "Exibir em gráfico único", value=grafico_unico_val, key="grafico_unico_acacia"
-)
-
 # Legenda informativa com o range de datas presente nos dados
 if pd.notna(data_min_total) and pd.notna(data_max):
     st.sidebar.caption(f"Intervalo nos dados: {data_min_total.date()} a {data_max.date()}")
 
+# === Resumo das bateladas selecionadas ===
+resumo_f = resumo[
+    (resumo["Fonte"].isin(fontes_sel)) &
+    (resumo["Batelada"].between(bat_range[0], bat_range[1])) &
+    (resumo["Fim"].dt.date >= inicio) &
+    (resumo["Inicio"].dt.date <= fim)
+]
+
+if resumo_f.empty:
+    st.warning("Nenhum registro encontrado com os filtros selecionados.")
+    st.stop()
+
+# === Linhas brutas apenas das bateladas selecionadas ===
+df = ler_bateladas(
+    "resultados_bateladas", tuple(sorted(fontes_sel)), int(bat_range[0]), int(bat_range[1])
+)
+if df.empty:
+    st.warning("Nenhum registro encontrado com os filtros selecionados.")
+    st.stop()
+
 # === Aplicar filtros ===
 df_f = df[
-    (df["Fonte"].isin(fontes_sel)) &
-    (pd.to_numeric(df["Batelada"], errors="coerce").astype("Int64").between(bat_range[0], bat_range[1])) &
     (df["DataHoraReal"].dt.date >= inicio) &
     (df["DataHoraReal"].dt.date <= fim)
 ].copy()
@@ -199,59 +142,113 @@ if df_f.empty:
 # Ordena de novo após filtro
 df_f = df_f.sort_values(["Fonte", "DataHoraReal"], kind="stable")
 
-# === Média móvel por Fonte ===
-df_f["MediaMovel"] = (
-    df_f
-    .groupby("Fonte", group_keys=False)
-    .apply(lambda g: g.assign(
-        MediaMovel=g["Valor"].rolling(window=st.session_state["periodo_movel_acacia"], min_periods=1).mean()
-    ))
-)["MediaMovel"]
-
-# === Visualização ===
-if st.session_state["grafico_unico_acacia"]:
-    # Gráfico único (Plotly Express para hover com Batelada)
-    fig = px.line(
-        df_f,
-        x="DataHoraReal",
-        y="MediaMovel",
-        color="Fonte",
-        markers=False,
-        title="Comparativo por Data (Média Móvel) — Acácia",
-        hover_data=["Batelada", "Valor"]
-    )
-    fig.update_layout(
-        xaxis_title="Data e Hora",
-        yaxis_title="Valor (Média Móvel)",
-        height=600
+# === Média móvel ===
+# Fica fora dos fragmentos: muda os gráficos e a tabela detalhada ao mesmo tempo
+periodo_movel = st.slider(
+    "Média Móvel (períodos):", 1, 20,
+    value=st.session_state.get("periodo_movel_acacia", 6), key="periodo_movel_acacia"
+)
+
+# === Gráficos (fragmento) ===
+# O gráfico único fica dentro do fragmento: mudar esse controle reexecuta só
+# este trecho, sem refazer filtros e leituras da página.
+@st.experimental_fragment
+def secao_graficos(df_f, resumo_f, periodo_movel, assinatura):
+    grafico_unico = st.checkbox(
+        "Exibir em gráfico único",
+        value=st.session_state.get("grafico_unico_acacia", True), key="grafico_unico_acacia"
     )
-    st.plotly_chart(fig, use_container_width=True)
-else:
-    # Um gráfico por Fonte (bruto + média móvel)
-    for fonte in sorted(df_f["Fonte"].unique()):
-        dados_fonte = df_f[df_f["Fonte"] == fonte]
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=dados_fonte["DataHoraReal"], y=dados_fonte["Valor"],
-            mode="markers", name="Bruto",
-            marker=dict(size=4)
-        ))
-        fig.add_trace(go.Scatter(
-            x=dados_fonte["DataHoraReal"], y=dados_fonte["MediaMovel"],
-            mode="lines", name="Média Móvel"
-        ))
+
+    # === Média móvel por Fonte ===
+    df_f = media_movel_por_fonte(df_f, periodo_movel)
+
+    # === Visualização ===
+    if grafico_unico:
+        # Gráfico único (Plotly Express para hover com Batelada)
+        fig = px.line(
+            df_f,
+            x="DataHoraReal",
+            y="MediaMovel",
+            color="Fonte",
+            markers=False,
+            title="Comparativo por Data (Média Móvel) — Acácia",
+            hover_data=["Batelada", "Valor"]
+        )
         fig.update_layout(
-            title=fonte,
             xaxis_title="Data e Hora",
-            yaxis_title="Valor",
-            height=500
+            yaxis_title="Valor (Média Móvel)",
+            height=600
         )
-        st.subheader(fonte)
         st.plotly_chart(fig, use_container_width=True)
+    else:
+        # Um gráfico por Fonte (bruto + média móvel)
+        for fonte, dados_fonte in df_f.groupby("Fonte"):
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=dados_fonte["DataHoraReal"], y=dados_fonte["Valor"],
+                mode="markers", name="Bruto",
+                marker=dict(size=4)
+            ))
+            fig.add_trace(go.Scatter(
+                x=dados_fonte["DataHoraReal"], y=dados_fonte["MediaMovel"],
+                mode="lines", name="Média Móvel"
+            ))
+            fig.update_layout(
+                title=fonte,
+                xaxis_title="Data e Hora",
+                yaxis_title="Valor",
+                height=500
+            )
+            st.subheader(fonte)
+            st.plotly_chart(fig, use_container_width=True)
+
+    # === Resumo por Batelada ===
+    with st.expander("📋 Resumo por Batelada"):
+        fig_resumo = px.line(
+            resumo_f,
+            x="Batelada",
+            y="Media",
+            color="Fonte",
+            markers=True,
+            title="Média por Batelada",
+            hover_data=["Inicio", "Fim", "Amostras", "Primeiro", "Ultimo"]
+        )
+        fig_resumo.update_layout(xaxis_title="Batelada", yaxis_title="Média", height=450)
+        st.plotly_chart(fig_resumo, use_container_width=True)
+        st.dataframe(
+            resumo_f.drop(columns=["id"], errors="ignore"),
+            use_container_width=True
+        )
+
+    # === Exportação do recorte filtrado ===
+    with st.expander("💾 Exportar dados filtrados"):
+        botao_exportacao(
+            df_f,
+            f"acacia_{inicio:%Y%m%d}_{fim:%Y%m%d}_bat{bat_range[0]}-{bat_range[1]}",
+            chave="exportar_acacia",
+            assinatura=assinatura,
+        )
+
+
+# Filtros que definem o recorte (chave da tabela paginada e da exportação)
+assinatura = (
+    versao_tabela("resultados_bateladas"),
+    tuple(sorted(fontes_sel)), tuple(bat_range), inicio, fim, periodo_movel,
+)
+secao_graficos(df_f, resumo_f, periodo_movel, assinatura)
+
+# === Tabela detalhada (fragmento) ===
+# Só é montada quando ativada; ordena uma vez e envia ao navegador apenas a página atual
+@st.experimental_fragment
+def secao_tabela(df_f, periodo_movel, assinatura):
+    if not st.toggle("🔍 Ver tabela de dados", key="ver_tabela_acacia"):
+        return
+    tabela_paginada(
+        media_movel_por_fonte(df_f, periodo_movel),
+        ["Fonte", "Batelada", "DataHoraReal"],
+        chave="tabela_acacia",
+        assinatura=assinatura,
+    )
+
 
-# === Tabela detalhada ===
-with st.expander("🔍 Ver tabela de dados"):
-    st.dataframe(
-        df_f.sort_values(["Fonte", "Batelada", "DataHoraReal"]),
-        use_container_width=True
-    )
\ No newline at end of file
+secao_tabela(df_f, periodo_movel, assinatura)
@@ -0,0 +1,152 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from datetime import datetime, timedelta
+from streamlit_autorefresh import st_autorefresh
+from utils.painel import TZ_SP, validar_backend, recarregar_dados, ler_tabela, versao_tabela, botao_exportacao
+from utils.balanco import CADEIA_SOLIDOS, CADEIA_LIQUIDOS
+
+# === Configurações iniciais ===
+st.set_page_config(layout="wide", page_title="Balanço Metalúrgico", page_icon="⚖️")
+st.title("⚖️ Balanço Metalúrgico do Ouro")
+
+# Auto-refresh: 15 minutos = 900.000 ms
+st_autorefresh(interval=15 * 60 * 1000, key="auto_refresh_15min")
+
+# === Sidebar: Recarregar manual ===
+if st.sidebar.button("🔁 Recarregar Dados"):
+    if recarregar_dados("balanco_metalurgico"):
+        st.toast("📦 Atualização dos dados iniciada em segundo plano!")
+    else:
+        st.toast("⏳ Estes dados foram recarregados há pouco. Tente novamente em instantes.")
+
+# === Backend de dados ===
+# Valida a configuração do backend (Supabase ou Parquet local) antes de carregar dados
+validar_backend()
+
+# === Carregar balanço (calculado no ETL por turno e por dia, formato longo) ===
+balanco = ler_tabela("balanco_metalurgico", colunas_data=("Inicio", "Fim"))
+if balanco.empty:
+    st.warning("Nenhum dado disponível.")
+    st.stop()
+
+# === Datas padrão (independentes do intervalo dos dados) ===
+hoje_sp = datetime.now(TZ_SP).date()
+inicio_padrao = (datetime.now(TZ_SP) - timedelta(days=30)).date()
+
+# === Sidebar — Filtros ===
+st.sidebar.header("Filtros — Balanço")
+
+# RESET: limpar chaves desta página antes dos widgets e fazer rerun
+if st.sidebar.button("🔄 Resetar Filtros"):
+    for k in ["escala_balanco", "periodo_balanco_v1", "indicadores_balanco"]:
+        st.session_state.pop(k, None)
+    st.experimental_rerun()
+
+escala = st.sidebar.radio(
+    "Escala:", ["turno", "dia"], index=1, horizontal=True, key="escala_balanco",
+    format_func=lambda e: "Turno (8 h)" if e == "turno" else "Dia",
+)
+
+periodo_default = st.session_state.get("periodo_balanco_v1", [inicio_padrao, hoje_sp])
+if not (isinstance(periodo_default, (list, tuple)) and len(periodo_default) == 2):
+    periodo_default = [inicio_padrao, hoje_sp]
+
+periodo = st.sidebar.date_input(
+    "Período:",
+    value=periodo_default,
+    key="periodo_balanco_v1"
+)
+
+# Normaliza retorno (pode vir data única)
+if isinstance(periodo, (list, tuple)) and len(periodo) == 2:
+    inicio, fim = periodo
+else:
+    inicio = fim = periodo
+
+# Indicadores de recuperação (os teores ficam no perfil da cadeia)
+indicadores_disponiveis = sorted(i for i in balanco["Indicador"].unique() if not i.startswith("Teor_"))
+indicadores_padrao = [
+    i for i in st.session_state.get(
+        "indicadores_balanco", ["Recuperacao_Global", "Recuperacao_Solido", "Adsorcao_Carvao"]
+    )
+    if i in indicadores_disponiveis
+]
+indicadores_sel = st.sidebar.multiselect(
+    "Indicadores:", indicadores_disponiveis, default=indicadores_padrao, key="indicadores_balanco"
+)
+
+# Legenda informativa com o range de datas presente nos dados
+st.sidebar.caption(f"Intervalo nos dados: {balanco['Inicio'].min().date()} a {balanco['Fim'].max().date()}")
+
+# === Aplicar filtros ===
+df_f = balanco[
+    (balanco["Escala"] == escala) &
+    (balanco["Inicio"].dt.date >= inicio) &
+    (balanco["Inicio"].dt.date <= fim)
+]
+if df_f.empty:
+    st.warning("Nenhum registro encontrado com os filtros selecionados.")
+    st.stop()
+
+# === Indicadores ao longo do tempo ===
+df_ind = df_f[df_f["Indicador"].isin(indicadores_sel)].sort_values(["Indicador", "Inicio"], kind="stable")
+if df_ind.empty:
+    st.info("Selecione ao menos um indicador na barra lateral.")
+else:
+    fig = px.line(
+        df_ind,
+        x="Inicio",
+        y="Valor",
+        color="Indicador",
+        markers=escala == "dia",
+        title=f"Recuperação por {'turno' if escala == 'turno' else 'dia'} (%)",
+        hover_data=["Fim"]
+    )
+    fig.update_layout(xaxis_title="Início do período", yaxis_title="%", height=550)
+    st.plotly_chart(fig, use_container_width=True)
+
+# === Médias do período por indicador ===
+# Média dos teores do período: o perfil segue a ordem da cadeia LIX -> TQ -> REJ
+medias = df_f.groupby("Indicador")["Valor"].mean()
+
+col_solido, col_liquido = st.columns(2)
+for coluna, cadeia, titulo, unidade in [
+    (col_solido, CADEIA_SOLIDOS, "Perfil do sólido na cadeia", "Au sólido (g/t)"),
+    (col_liquido, CADEIA_LIQUIDOS, "Perfil da solução na cadeia", "Au solução (mg/L)"),
+]:
+    perfil = medias.reindex([f"Teor_{fonte}" for fonte in cadeia])
+    fig = go.Figure(go.Scatter(
+        x=cadeia, y=perfil.to_numpy(), mode="lines+markers", connectgaps=True
+    ))
+    fig.update_layout(title=titulo, xaxis_title="Ponto da cadeia", yaxis_title=unidade, height=420)
+    coluna.plotly_chart(fig, use_container_width=True)
+
+extracao = medias[medias.index.str.startswith("Extracao_")]
+extracao = extracao.reindex([
+    f"Extracao_{fonte.removesuffix('_Au_S')}" for fonte in CADEIA_SOLIDOS[1:-1]
+]).dropna()
+if not extracao.empty:
+    fig = go.Figure(go.Bar(x=extracao.index.str.removeprefix("Extracao_"), y=extracao.to_numpy()))
+    fig.update_layout(
+        title="Extração acumulada do sólido até cada tanque (média do período, %)",
+        xaxis_title="Tanque", yaxis_title="%", height=420
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+# === Tabela e exportação ===
+with st.expander("🔍 Ver tabela do balanço"):
+    tabela = (
+        df_f.pivot_table(index=["Inicio", "Fim"], columns="Indicador", values="Valor")
+        .sort_index(ascending=False)
+    )
+    st.dataframe(tabela, use_container_width=True)
+
+with st.expander("💾 Exportar dados filtrados"):
+    botao_exportacao(
+        df_f.drop(columns=["id"], errors="ignore"),
+        f"balanco_metalurgico_{escala}_{inicio:%Y%m%d}_{fim:%Y%m%d}",
+        chave="exportar_balanco",
+        assinatura=(versao_tabela("balanco_metalurgico"), escala, inicio, fim),
+    )
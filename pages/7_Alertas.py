@@ -0,0 +1,134 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from datetime import datetime, timedelta
+from streamlit_autorefresh import st_autorefresh
+from utils.painel import TZ_SP, validar_backend, recarregar_dados, ler_tabela, versao_tabela, botao_exportacao
+
+# === Configurações iniciais ===
+st.set_page_config(layout="wide", page_title="Alertas", page_icon="🚨")
+st.title("🚨 Alertas de Limites")
+
+# Auto-refresh: 15 minutos = 900.000 ms
+st_autorefresh(interval=15 * 60 * 1000, key="auto_refresh_15min")
+
+# === Sidebar: Recarregar manual ===
+if st.sidebar.button("🔁 Recarregar Dados"):
+    if recarregar_dados("alertas"):
+        st.toast("📦 Atualização dos dados iniciada em segundo plano!")
+    else:
+        st.toast("⏳ Estes dados foram recarregados há pouco. Tente novamente em instantes.")
+
+# === Backend de dados ===
+# Valida a configuração do backend (Supabase ou Parquet local) antes de carregar dados
+validar_backend()
+
+# === Carregar alertas (avaliados no ETL só sobre as amostras novas de cada execução) ===
+alertas = ler_tabela("alertas", colunas_data=("DataHoraReal", "AvaliadoEm"))
+if alertas.empty:
+    st.success("Nenhum alerta registrado.")
+    st.stop()
+
+# === Datas padrão (independentes do intervalo dos dados) ===
+hoje_sp = datetime.now(TZ_SP).date()
+inicio_padrao = (datetime.now(TZ_SP) - timedelta(days=7)).date()
+
+# === Sidebar — Filtros ===
+st.sidebar.header("Filtros — Alertas")
+
+# RESET: limpar chaves desta página antes dos widgets e fazer rerun
+if st.sidebar.button("🔄 Resetar Filtros"):
+    for k in ["periodo_alertas_v1", "fontes_alertas", "niveis_alertas"]:
+        st.session_state.pop(k, None)
+    st.experimental_rerun()
+
+periodo_default = st.session_state.get("periodo_alertas_v1", [inicio_padrao, hoje_sp])
+if not (isinstance(periodo_default, (list, tuple)) and len(periodo_default) == 2):
+    periodo_default = [inicio_padrao, hoje_sp]
+
+periodo = st.sidebar.date_input(
+    "Período:",
+    value=periodo_default,
+    key="periodo_alertas_v1"
+)
+
+# Normaliza retorno (pode vir data única)
+if isinstance(periodo, (list, tuple)) and len(periodo) == 2:
+    inicio, fim = periodo
+else:
+    inicio = fim = periodo
+
+fontes_disponiveis = sorted(alertas["Fonte"].unique())
+fontes_sel = st.sidebar.multiselect(
+    "Fontes:", fontes_disponiveis,
+    default=[f for f in st.session_state.get("fontes_alertas", fontes_disponiveis) if f in fontes_disponiveis],
+    key="fontes_alertas"
+)
+
+niveis_sel = st.sidebar.multiselect(
+    "Nível:", ["critico", "alerta"], default=["critico", "alerta"], key="niveis_alertas",
+    format_func=lambda n: "Crítico" if n == "critico" else "Alerta",
+)
+
+# Legenda informativa com o range de datas presente nos dados
+st.sidebar.caption(
+    f"Intervalo nos dados: {alertas['DataHoraReal'].min().date()} a {alertas['DataHoraReal'].max().date()}"
+)
+
+# === Aplicar filtros ===
+df_f = alertas[
+    (alertas["Fonte"].isin(fontes_sel)) &
+    (alertas["Nivel"].isin(niveis_sel)) &
+    (alertas["DataHoraReal"].dt.date >= inicio) &
+    (alertas["DataHoraReal"].dt.date <= fim)
+].sort_values("DataHoraReal", ascending=False, kind="stable")
+if df_f.empty:
+    st.info("Nenhum alerta com os filtros selecionados.")
+    st.stop()
+
+# === Resumo ===
+ultima_avaliacao = alertas["AvaliadoEm"].max()
+col1, col2, col3 = st.columns(3)
+col1.metric("Alertas no período", len(df_f))
+col2.metric("Críticos", int((df_f["Nivel"] == "critico").sum()))
+col3.metric("Fontes com alerta", df_f["Fonte"].nunique())
+st.caption(f"Última execução com alerta: {ultima_avaliacao:%d/%m/%Y %H:%M}")
+
+# === Linha do tempo ===
+fig = px.scatter(
+    df_f,
+    x="DataHoraReal",
+    y="Fonte",
+    color="Nivel",
+    symbol="Tipo",
+    color_discrete_map={"critico": "crimson", "alerta": "orange"},
+    hover_data=["Valor", "Limite", "Referencia", "Consecutivas", "Regra"],
+    title="Alertas por Fonte",
+)
+fig.update_layout(xaxis_title="Data/Hora da amostra", yaxis_title="Fonte", height=450)
+st.plotly_chart(fig, use_container_width=True)
+
+# === Contagem por regra ===
+por_regra = (
+    df_f.groupby(["Regra", "Nivel"], as_index=False)
+    .agg(Alertas=("Valor", "size"), Ultimo=("DataHoraReal", "max"))
+    .sort_values(["Alertas", "Ultimo"], ascending=False)
+)
+st.subheader("Alertas por regra")
+st.dataframe(por_regra, use_container_width=True, hide_index=True)
+
+# === Tabela e exportação ===
+with st.expander("🔍 Ver alertas"):
+    st.dataframe(
+        df_f.drop(columns=["id"], errors="ignore"),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+with st.expander("💾 Exportar dados filtrados"):
+    botao_exportacao(
+        df_f.drop(columns=["id"], errors="ignore"),
+        f"alertas_{inicio:%Y%m%d}_{fim:%Y%m%d}",
+        chave="exportar_alertas",
+        assinatura=(versao_tabela("alertas"), tuple(fontes_sel), tuple(niveis_sel), inicio, fim),
+    )
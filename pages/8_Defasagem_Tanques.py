@@ -0,0 +1,153 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from datetime import datetime, timedelta
+from streamlit_autorefresh import st_autorefresh
+from utils.painel import TZ_SP, validar_backend, recarregar_dados, ler_tabela, versao_tabela, botao_exportacao
+
+# === Configurações iniciais ===
+st.set_page_config(layout="wide", page_title="Defasagem entre Tanques", page_icon="⏱️")
+st.title("⏱️ Defasagem entre Tanques")
+
+# Auto-refresh: 15 minutos = 900.000 ms
+st_autorefresh(interval=15 * 60 * 1000, key="auto_refresh_15min")
+
+# === Sidebar: Recarregar manual ===
+if st.sidebar.button("🔁 Recarregar Dados"):
+    if recarregar_dados("defasagens"):
+        st.toast("📦 Atualização dos dados iniciada em segundo plano!")
+    else:
+        st.toast("⏳ Estes dados foram recarregados há pouco. Tente novamente em instantes.")
+
+# === Backend de dados ===
+# Valida a configuração do backend (Supabase ou Parquet local) antes de carregar dados
+validar_backend()
+
+# === Carregar defasagens (pré-calculadas no ETL, uma linha por par e janela móvel) ===
+defasagens = ler_tabela("defasagens", colunas_data=("Inicio", "Fim"))
+if defasagens.empty:
+    st.warning("Nenhum dado disponível.")
+    st.stop()
+# assign devolve uma cópia: o DataFrame de ler_tabela é compartilhado pelo cache
+defasagens = defasagens.assign(Par=defasagens["Origem"] + " → " + defasagens["Destino"])
+
+# === Datas padrão (independentes do intervalo dos dados) ===
+hoje_sp = datetime.now(TZ_SP).date()
+inicio_padrao = (datetime.now(TZ_SP) - timedelta(days=180)).date()
+
+# === Sidebar — Filtros ===
+st.sidebar.header("Filtros — Defasagem")
+
+# RESET: limpar chaves desta página antes dos widgets e fazer rerun
+if st.sidebar.button("🔄 Resetar Filtros"):
+    for k in ["tipo_defasagem", "periodo_defasagem_v1", "pares_defasagem_transporte",
+              "pares_defasagem_liquido_solido", "correlacao_min_defasagem"]:
+        st.session_state.pop(k, None)
+    st.experimental_rerun()
+
+tipo = st.sidebar.radio(
+    "Pares:", ["transporte", "liquido_solido"], horizontal=True, key="tipo_defasagem",
+    format_func=lambda t: "TQ01 → jusante" if t == "transporte" else "Líquido → sólido",
+)
+
+periodo_default = st.session_state.get("periodo_defasagem_v1", [inicio_padrao, hoje_sp])
+if not (isinstance(periodo_default, (list, tuple)) and len(periodo_default) == 2):
+    periodo_default = [inicio_padrao, hoje_sp]
+
+periodo = st.sidebar.date_input(
+    "Período (fim da janela):",
+    value=periodo_default,
+    key="periodo_defasagem_v1"
+)
+
+# Normaliza retorno (pode vir data única)
+if isinstance(periodo, (list, tuple)) and len(periodo) == 2:
+    inicio, fim = periodo
+else:
+    inicio = fim = periodo
+
+# Pares do tipo escolhido, na ordem da cadeia gravada pelo ETL
+pares_disponiveis = list(dict.fromkeys(defasagens.loc[defasagens["Tipo"] == tipo, "Par"]))
+# Uma seleção por tipo de par (trocar o tipo não esvazia a seleção do outro)
+chave_pares = f"pares_defasagem_{tipo}"
+pares_sel = st.sidebar.multiselect(
+    "Pares:", pares_disponiveis,
+    default=[p for p in st.session_state.get(chave_pares, pares_disponiveis) if p in pares_disponiveis],
+    key=chave_pares
+)
+
+correlacao_min = st.sidebar.slider(
+    "Correlação mínima:", 0.0, 1.0, 0.3, 0.05, key="correlacao_min_defasagem",
+    help="Janelas com correlação menor na melhor defasagem ficam fora (defasagem pouco confiável)."
+)
+
+# Legenda informativa com o range de datas presente nos dados
+st.sidebar.caption(f"Intervalo nos dados: {defasagens['Fim'].min().date()} a {defasagens['Fim'].max().date()}")
+
+# === Aplicar filtros ===
+df_f = defasagens[
+    (defasagens["Par"].isin(pares_sel)) &
+    (defasagens["Correlacao"] >= correlacao_min) &
+    (defasagens["Fim"].dt.date >= inicio) &
+    (defasagens["Fim"].dt.date <= fim)
+].sort_values(["Par", "Fim"], kind="stable")
+if df_f.empty:
+    st.warning("Nenhum registro encontrado com os filtros selecionados.")
+    st.stop()
+
+janela_dias = round((df_f["Fim"] - df_f["Inicio"]).median() / pd.Timedelta(days=1))
+st.caption(
+    f"Cada ponto é uma janela móvel de {janela_dias} dias (data = fim da janela). "
+    "Defasagem > 0: o destino responde depois da origem."
+)
+
+# === Defasagem e correlação ao longo do tempo ===
+fig = px.line(
+    df_f, x="Fim", y="DefasagemHoras", color="Par", markers=True,
+    title="Melhor defasagem por janela (h)",
+    hover_data=["Correlacao", "CorrelacaoSemDefasagem", "Amostras"],
+)
+fig.update_layout(xaxis_title="Fim da janela", yaxis_title="Defasagem (h)", height=500)
+st.plotly_chart(fig, use_container_width=True)
+
+fig = px.line(
+    df_f, x="Fim", y="Correlacao", color="Par",
+    title="Correlação na melhor defasagem",
+)
+fig.update_layout(xaxis_title="Fim da janela", yaxis_title="Correlação", yaxis_range=[0, 1], height=400)
+st.plotly_chart(fig, use_container_width=True)
+
+# === Resumo por par ===
+resumo = (
+    df_f.assign(Ganho=df_f["Correlacao"] - df_f["CorrelacaoSemDefasagem"])
+    .groupby("Par", sort=False)
+    .agg(
+        Janelas=("DefasagemHoras", "size"),
+        DefasagemMediana=("DefasagemHoras", "median"),
+        DefasagemP10=("DefasagemHoras", lambda v: v.quantile(0.1)),
+        DefasagemP90=("DefasagemHoras", lambda v: v.quantile(0.9)),
+        CorrelacaoMediana=("Correlacao", "median"),
+        GanhoCorrelacao=("Ganho", "median"),
+    )
+    .reset_index()
+)
+st.subheader("Resumo por par")
+st.dataframe(resumo, use_container_width=True, hide_index=True)
+
+fig = px.bar(
+    resumo, x="Par", y="DefasagemMediana",
+    error_y=resumo["DefasagemP90"] - resumo["DefasagemMediana"],
+    error_y_minus=resumo["DefasagemMediana"] - resumo["DefasagemP10"],
+    title="Defasagem mediana por par (barras: P10–P90)",
+)
+fig.update_layout(xaxis_title="Par", yaxis_title="Defasagem (h)", height=420)
+st.plotly_chart(fig, use_container_width=True)
+
+# === Exportação ===
+with st.expander("💾 Exportar dados filtrados"):
+    botao_exportacao(
+        df_f.drop(columns=["id", "Par"], errors="ignore"),
+        f"defasagens_{tipo}_{inicio:%Y%m%d}_{fim:%Y%m%d}",
+        chave="exportar_defasagens",
+        assinatura=(versao_tabela("defasagens"), tipo, tuple(pares_sel), correlacao_min, inicio, fim),
+    )
@@ -40,6 +40,7 @@ SCRIPTS = [
 
 # =========================================
 # Função para executar scripts
+# Retorna True se o script terminou com código 0
 # =========================================
 def executar_script(script):
     global houve_erro
@@ -84,9 +85,11 @@ def executar_script(script):
                     f"{result.stderr.strip().replace(';','|')};\n"
                 )
             print(f"[!] Falha ao executar {script_path}. Verifique {LOG_ERROS.name}", flush=True)
-        else:
-            print(result.stdout, flush=True)
-            print(f"[✓] Sucesso: {script_path} (Tempo: {duracao}s)", flush=True)
+            return False
+
+        print(result.stdout, flush=True)
+        print(f"[✓] Sucesso: {script_path} (Tempo: {duracao}s)", flush=True)
+        return True
 
     except Exception as e:
         fim = time.time()
@@ -103,6 +106,7 @@ def executar_script(script):
             )
 
         print(f"[X] Exceção ao executar {script_path}. Verifique {LOG_ERROS.name}", flush=True)
+        return False
 
 # =========================================
 # Main
@@ -110,11 +114,18 @@ def executar_script(script):
 if __name__ == "__main__":
     print("Iniciando pipeline Qualidade Plantae\n", flush=True)
 
-    for script in SCRIPTS:
-        executar_script(script)
+    # Cada script depende da saída do anterior (o load_Supabase.py envia os parquet
+    # do ETL): após uma falha os seguintes não rodam, para não substituir as tabelas
+    # do Supabase com dados parciais
+    for indice, script in enumerate(SCRIPTS):
+        if not executar_script(script):
+            for pulado in SCRIPTS[indice + 1:]:
+                print(f"[-] Não executado (falha em etapa anterior): {pulado}", flush=True)
+            break
 
     if houve_erro:
         print(f"\n[!] Execução concluída com erros. Consulte: {LOG_ERROS.name}", flush=True)
+        sys.exit(1)
     else:
         if LOG_ERROS.exists():
             LOG_ERROS.unlink()
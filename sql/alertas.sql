@@ -0,0 +1,26 @@
+-- sql/alertas.sql
+-- Tabela de alertas de limites (avaliados no ETL por utils/alertas.py, só sobre as
+-- amostras novas de cada execução, e enviados pelo export/load_Supabase.py).
+--
+-- Executar uma vez no SQL Editor do Supabase (antes de configurar_troca_atomica,
+-- se a carga usar SUPABASE_MODO_CARGA=troca_atomica).
+
+create table if not exists public.alertas (
+    id             bigint generated by default as identity primary key,
+    "DataHoraReal" timestamptz not null,    -- instante da amostra que disparou o alerta
+    "Fonte"        text not null,
+    "Valor"        double precision,
+    "Tipo"         text not null,           -- 'limite' ou 'desvio_media'
+    "Referencia"   double precision,        -- média móvel anterior (só em desvio_media)
+    "Limite"       double precision,        -- limite violado (ou desvio relativo máximo)
+    "Consecutivas" integer,                 -- violações seguidas até esta amostra
+    "Nivel"        text,                    -- 'alerta' ou 'critico'
+    "Regra"        text,                    -- descrição da regra (ex.: REJ_Au_S > 0.3 (3x))
+    "AvaliadoEm"   timestamptz              -- execução do ETL que gerou o alerta
+);
+
+create index if not exists alertas_datahorareal
+    on public.alertas ("DataHoraReal");
+
+-- Leitura pelas páginas (chave anon)
+grant select on public.alertas to anon, authenticated;
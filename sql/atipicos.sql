@@ -0,0 +1,32 @@
+-- sql/atipicos.sql
+-- Coluna Outlier em resultados_analiticos (marcas de valores atípicos geradas no
+-- ETL com ETL_FILTRO_ATIPICOS=1, ver utils/atipicos.py). Os valores não são
+-- removidos: a coluna só indica os suspeitos.
+--
+-- Executar uma vez no SQL Editor do Supabase antes da primeira carga com o filtro ligado.
+
+-- Tabela simples (carga direta) ou, com troca atômica (sql/troca_atomica.sql), as
+-- duas tabelas físicas recebem a coluna e a view é recriada (o "select *" da view
+-- fixa as colunas na criação)
+do $$
+declare
+    v_ativa text;
+begin
+    if to_regclass('public.carga_geracao') is not null then
+        select ativa into v_ativa from public.carga_geracao where tabela = 'resultados_analiticos';
+    end if;
+
+    if v_ativa is null then
+        alter table public.resultados_analiticos add column if not exists "Outlier" boolean;
+        return;
+    end if;
+
+    alter table public.resultados_analiticos__a add column if not exists "Outlier" boolean;
+    alter table public.resultados_analiticos__b add column if not exists "Outlier" boolean;
+    execute format(
+        'create or replace view public.resultados_analiticos as select * from public.%I',
+        'resultados_analiticos__' || v_ativa
+    );
+    notify pgrst, 'reload schema';
+end;
+$$;
@@ -0,0 +1,21 @@
+-- sql/balanco_metalurgico.sql
+-- Tabela do balanço metalúrgico (gerado no ETL por utils/balanco.py e enviado
+-- pelo export/load_Supabase.py). Formato longo: uma linha por período e indicador.
+--
+-- Executar uma vez no SQL Editor do Supabase (antes de configurar_troca_atomica,
+-- se a carga usar SUPABASE_MODO_CARGA=troca_atomica).
+
+create table if not exists public.balanco_metalurgico (
+    id          bigint generated by default as identity primary key,
+    "Escala"    text not null,              -- 'turno' (8 h) ou 'dia'
+    "Inicio"    timestamptz not null,
+    "Fim"       timestamptz not null,
+    "Indicador" text not null,              -- Recuperacao_Global, Extracao_TQ2, Teor_LIX_Au_S...
+    "Valor"     double precision
+);
+
+create index if not exists balanco_metalurgico_escala_inicio
+    on public.balanco_metalurgico ("Escala", "Inicio");
+
+-- Leitura pelas páginas (chave anon)
+grant select on public.balanco_metalurgico to anon, authenticated;
@@ -0,0 +1,26 @@
+-- sql/defasagens.sql
+-- Tabela de defasagens entre tanques (correlação cruzada via FFT em janelas móveis,
+-- calculada no ETL por utils/defasagem.py e enviada pelo export/load_Supabase.py).
+-- Uma linha por par de fontes e janela.
+--
+-- Executar uma vez no SQL Editor do Supabase (antes de configurar_troca_atomica,
+-- se a carga usar SUPABASE_MODO_CARGA=troca_atomica).
+
+create table if not exists public.defasagens (
+    id                       bigint generated by default as identity primary key,
+    "Origem"                 text not null,
+    "Destino"                text not null,
+    "Tipo"                   text not null,     -- 'transporte' ou 'liquido_solido'
+    "Inicio"                 timestamptz not null,
+    "Fim"                    timestamptz not null,
+    "DefasagemHoras"         double precision,  -- > 0: Destino responde depois da Origem
+    "Correlacao"             double precision,  -- correlação na melhor defasagem
+    "CorrelacaoSemDefasagem" double precision,
+    "Amostras"               bigint
+);
+
+create index if not exists defasagens_par_inicio
+    on public.defasagens ("Origem", "Destino", "Inicio");
+
+-- Leitura pelas páginas (chave anon)
+grant select on public.defasagens to anon, authenticated;
@@ -0,0 +1,27 @@
+-- sql/resumo_bateladas.sql
+-- Tabela do resumo por batelada (gerado no ETL por resumir_bateladas e enviado pelo
+-- export/load_Supabase.py). Uma linha por (Fonte, Batelada); lida pelas páginas de
+-- eluição e acácia.
+--
+-- Executar uma vez no SQL Editor do Supabase (antes de configurar_troca_atomica,
+-- se a carga usar SUPABASE_MODO_CARGA=troca_atomica).
+
+create table if not exists public.resumo_bateladas (
+    id                  bigint generated by default as identity primary key,
+    "Fonte"             text not null,
+    "Batelada"          bigint not null,
+    "Filtro"            text,                -- 'eluicao' ou 'acacia'
+    "Inicio"            timestamptz,         -- primeira amostra da batelada
+    "Fim"               timestamptz,         -- última amostra da batelada
+    "Amostras"          bigint,
+    "Media"             double precision,
+    "Primeiro"          double precision,    -- valor da primeira amostra
+    "Ultimo"            double precision,    -- valor da última amostra
+    "DeltaEntradaSaida" double precision     -- Media(CUBA_Entrada_X) - Media(CUBA_Saida_X); vazio nas demais fontes
+);
+
+create index if not exists resumo_bateladas_fonte_batelada
+    on public.resumo_bateladas ("Fonte", "Batelada");
+
+-- Leitura pelas páginas (chave anon)
+grant select on public.resumo_bateladas to anon, authenticated;
@@ -0,0 +1,156 @@
+-- sql/troca_atomica.sql
+-- Carga com troca atômica (blue/green) das tabelas do dashboard.
+--
+-- Cada tabela lógica <nome> passa a ser uma VIEW sobre uma de duas tabelas
+-- físicas, <nome>__a e <nome>__b. A carga (export/load_Supabase.py com
+-- SUPABASE_MODO_CARGA=troca_atomica) grava na tabela inativa e, ao final,
+-- a view passa a apontar para ela numa única transação: as páginas nunca
+-- veem a tabela vazia ou parcialmente carregada.
+-- A geração antiga fica na tabela inativa até o início da próxima carga,
+-- quando é truncada (coleta da geração antiga).
+--
+-- As funções são security definer e só podem ser executadas pelo service_role:
+-- com SUPABASE_MODO_CARGA=troca_atomica, o SUPABASE_KEY do export/load_Supabase.py
+-- precisa ser a chave service_role (anon/authenticated não chamam /rpc/ destas funções).
+--
+-- Executar uma vez no SQL Editor do Supabase e depois, para cada tabela:
+--   select configurar_troca_atomica('resultados_analiticos');
+--   select configurar_troca_atomica('resultados_bateladas');
+--   select configurar_troca_atomica('resumo_bateladas');
+--   select configurar_troca_atomica('balanco_metalurgico');
+--   select configurar_troca_atomica('alertas');
+--   select configurar_troca_atomica('defasagens');
+
+-- === Controle da geração ativa de cada tabela ===
+create table if not exists public.carga_geracao (
+    tabela       text primary key,
+    ativa        text not null check (ativa in ('a', 'b')),
+    linhas       bigint,
+    publicado_em timestamptz not null default now()
+);
+
+-- Só as funções abaixo (e o service_role) escrevem no controle
+revoke all on public.carga_geracao from anon, authenticated;
+
+
+-- === Conversão de uma tabela existente para o esquema a/b ===
+-- A tabela atual vira <nome>__a (geração ativa); <nome>__b é criada com as
+-- mesmas colunas, padrões, chave primária e índices, para receber a próxima carga.
+-- As páginas leem só a view: as tabelas físicas ficam fechadas para anon/authenticated.
+create or replace function public.configurar_troca_atomica(p_tabela text)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if exists (select 1 from carga_geracao where tabela = p_tabela) then
+        return;
+    end if;
+
+    execute format('alter table %I rename to %I', p_tabela, p_tabela || '__a');
+    execute format(
+        'create table %I (like %I including all)',
+        p_tabela || '__b', p_tabela || '__a'
+    );
+    execute format('revoke all on %I, %I from anon, authenticated', p_tabela || '__a', p_tabela || '__b');
+    execute format('create view %I as select * from %I', p_tabela, p_tabela || '__a');
+    execute format('grant select on %I to anon, authenticated', p_tabela);
+
+    insert into carga_geracao (tabela, ativa) values (p_tabela, 'a');
+
+    -- PostgREST passa a enxergar a view e as tabelas físicas
+    notify pgrst, 'reload schema';
+end;
+$$;
+
+
+-- === Início da carga: limpa a tabela inativa e devolve o nome dela ===
+-- Se a inativa tiver menos índices que a ativa (pares criados por versões
+-- anteriores deste script, com __b sem índices), ela é recriada a partir da
+-- ativa com "including all"; senão é só truncada.
+create or replace function public.preparar_carga(p_tabela text)
+returns text
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_ativa   text;
+    v_inativa text;
+begin
+    select p_tabela || '__' || ativa,
+           p_tabela || '__' || case ativa when 'a' then 'b' else 'a' end
+      into v_ativa, v_inativa
+      from carga_geracao
+     where tabela = p_tabela
+       for update;
+
+    if v_inativa is null then
+        raise exception 'Tabela % não configurada para troca atômica', p_tabela;
+    end if;
+
+    -- Nenhuma leitura passa pela tabela inativa: truncate/recriação não bloqueiam as páginas
+    if (select count(*) from pg_indexes where schemaname = 'public' and tablename = v_inativa)
+     < (select count(*) from pg_indexes where schemaname = 'public' and tablename = v_ativa) then
+        execute format('drop table %I', v_inativa);
+        execute format('create table %I (like %I including all)', v_inativa, v_ativa);
+        execute format('revoke all on %I from anon, authenticated', v_inativa);
+    else
+        execute format('truncate table %I', v_inativa);
+    end if;
+    return v_inativa;
+end;
+$$;
+
+
+-- === Fim da carga: aponta a view para a tabela recém-carregada ===
+-- Com p_linhas, confere a contagem antes de trocar (carga incompleta não é publicada).
+create or replace function public.publicar_carga(p_tabela text, p_linhas bigint default null)
+returns text
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_nova    text;
+    v_inativa text;
+    v_linhas  bigint;
+begin
+    select case ativa when 'a' then 'b' else 'a' end
+      into v_nova
+      from carga_geracao
+     where tabela = p_tabela
+       for update;
+
+    if v_nova is null then
+        raise exception 'Tabela % não configurada para troca atômica', p_tabela;
+    end if;
+
+    v_inativa := p_tabela || '__' || v_nova;
+    execute format('select count(*) from %I', v_inativa) into v_linhas;
+
+    if p_linhas is not null and v_linhas <> p_linhas then
+        raise exception 'Carga incompleta em %: % linhas, esperado %', v_inativa, v_linhas, p_linhas;
+    end if;
+
+    execute format('create or replace view %I as select * from %I', p_tabela, v_inativa);
+
+    update carga_geracao
+       set ativa = v_nova, linhas = v_linhas, publicado_em = now()
+     where tabela = p_tabela;
+
+    return v_inativa;
+end;
+$$;
+
+
+-- === Permissões ===
+-- Funções security definer rodam como o dono (podem truncar e trocar as tabelas):
+-- sem o revoke, qualquer cliente com a chave anon as chamaria via /rpc/.
+revoke execute on function public.configurar_troca_atomica(text) from public, anon, authenticated;
+revoke execute on function public.preparar_carga(text) from public, anon, authenticated;
+revoke execute on function public.publicar_carga(text, bigint) from public, anon, authenticated;
+grant execute on function public.configurar_troca_atomica(text) to service_role;
+grant execute on function public.preparar_carga(text) to service_role;
+grant execute on function public.publicar_carga(text, bigint) to service_role;
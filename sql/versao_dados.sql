@@ -0,0 +1,18 @@
+-- sql/versao_dados.sql
+-- Registro de versão das cargas: uma linha por tabela, atualizada (upsert em "tabela")
+-- pelo export/load_Supabase.py depois de cada envio bem-sucedido (montar_registro_versao).
+-- As páginas leem esta tabela a cada ciclo e só baixam uma tabela quando o load_id muda.
+--
+-- Executar uma vez no SQL Editor do Supabase, antes da primeira carga.
+
+create table if not exists public.versao_dados (
+    tabela             text primary key,     -- alvo do on_conflict do upsert
+    load_id            text not null,
+    linhas             bigint,
+    "min_DataHoraReal" timestamptz,
+    "max_DataHoraReal" timestamptz,
+    carregado_em       timestamptz not null default now()
+);
+
+-- Leitura pelas páginas (chave anon)
+grant select on public.versao_dados to anon, authenticated;
@@ -0,0 +1,34 @@
+# tests/conftest.py
+# O export/ETL.py é um notebook convertido: executar o arquivo baixa a planilha e roda o
+# pipeline. Aqui só as importações, funções e constantes em MAIÚSCULAS são carregadas.
+import ast
+import os
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# utils/config.py exige os caminhos do .env; nos testes eles não são usados
+os.environ.setdefault("PARQUET_AMOSTRAS_HORARIAS", "consolidado.parquet")
+os.environ.setdefault("PARQUET_AMOSTRAS_BATELADAS", "consolidado_batelada.parquet")
+os.environ.setdefault("URL_EXCEL", "Resultados Planta.xlsx")
+
+
+def _definicao(no) -> bool:
+    if isinstance(no, (ast.Import, ast.ImportFrom, ast.FunctionDef)):
+        return True
+    return isinstance(no, ast.Assign) and all(
+        isinstance(alvo, ast.Name) and alvo.id.isupper() for alvo in no.targets
+    )
+
+
+@pytest.fixture(scope="session")
+def etl():
+    """Namespace com as definições do export/ETL.py (sem a execução principal)."""
+    caminho = ROOT / "export" / "ETL.py"
+    arvore = ast.parse(caminho.read_text(encoding="utf-8"))
+    arvore.body = [no for no in arvore.body if _definicao(no)]
+    namespace = {"__name__": "etl"}
+    exec(compile(arvore, str(caminho), "exec"), namespace)
+    return namespace
@@ -0,0 +1,72 @@
+# tests/test_balanco.py
+# Balanço metalúrgico incremental (utils/balanco.atualizar_balanco) contra o cálculo completo.
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.balanco import CADEIA_LIQUIDOS, CADEIA_SOLIDOS, atualizar_balanco, calcular_balanco
+
+
+def series_cadeia(dias: int, semente: int = 0) -> pd.DataFrame:
+    # Sólidas a cada 4 h e líquidas a cada 2 h, teores decrescendo ao longo da cadeia
+    gerador = np.random.default_rng(semente)
+    partes = []
+    for fontes, passo in ((CADEIA_SOLIDOS, "4h"), (CADEIA_LIQUIDOS, "2h")):
+        instantes = pd.date_range("2024-03-01 02:00", periods=dias * 24 // int(passo[0]), freq=passo)
+        for posicao, fonte in enumerate(fontes):
+            partes.append(pd.DataFrame({
+                "Fonte": fonte,
+                "DataHoraReal": instantes,
+                "Valor": (2.0 - 0.15 * posicao) * gerador.uniform(0.9, 1.1, len(instantes)),
+            }))
+    return pd.concat(partes, ignore_index=True)
+
+
+def comparar_com_completo(balanco, df_series):
+    completo = calcular_balanco(df_series)
+    pd.testing.assert_frame_equal(balanco.reset_index(drop=True), completo, check_dtype=False)
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    return tmp_path / "balanco_metalurgico.parquet"
+
+
+def test_amostra_antiga_corrigida(caminho, capsys):
+    df = series_cadeia(dias=8)
+    atualizar_balanco(df, caminho)
+
+    # Correção de uma amostra do 2º dia e uma amostra nova no fim
+    corrigido = df.copy()
+    linha = corrigido.index[(corrigido["Fonte"] == "TQ5_Au_S") & (corrigido["DataHoraReal"] == "2024-03-02 10:00")]
+    corrigido.loc[linha, "Valor"] *= 1.5
+    nova = pd.DataFrame({"Fonte": ["LIX_Au_S"], "DataHoraReal": [pd.Timestamp("2024-03-09 02:00")], "Valor": [2.0]})
+    corrigido = pd.concat([corrigido, nova], ignore_index=True)
+
+    capsys.readouterr()
+    balanco = atualizar_balanco(corrigido, caminho)
+    assert "incremental desde 2024-03-01" in capsys.readouterr().out
+    comparar_com_completo(balanco, corrigido)
+    comparar_com_completo(pd.read_parquet(caminho), corrigido)
+
+
+def test_amostras_novas_no_fim(caminho, capsys):
+    df = series_cadeia(dias=10)
+    inicial = df[df["DataHoraReal"] < "2024-03-07 08:00"]
+    atualizar_balanco(inicial, caminho)
+
+    capsys.readouterr()
+    balanco = atualizar_balanco(df, caminho)
+    # Só a cauda é recalculada (a grade estendida alcança o dia da última amostra anterior)
+    assert "incremental desde 2024-03-06" in capsys.readouterr().out
+    comparar_com_completo(balanco, df)
+
+
+def test_sem_alteracoes(caminho, capsys):
+    df = series_cadeia(dias=4)
+    gravado = atualizar_balanco(df, caminho)
+
+    capsys.readouterr()
+    balanco = atualizar_balanco(df.sample(frac=1, random_state=1), caminho)
+    assert "sem alterações" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(balanco, gravado)
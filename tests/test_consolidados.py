@@ -0,0 +1,50 @@
+# tests/test_consolidados.py
+# Gravação dos parquet consolidados (export/ETL.py gerar_consolidados).
+import pandas as pd
+import pytest
+
+SERIE = pd.DataFrame({
+    "Fonte": ["LIX_Au_S", "LIX_Au_S"],
+    "DataHoraReal": pd.to_datetime(["2024-03-01 16:00", "2024-03-01 08:00"]),
+    "Valor": [1.5, 2.5],
+    "MediaMovel_6": [2.0, 2.5],
+    "Filtro": ["solidas", "solidas"],
+})
+BATELADA = pd.DataFrame({
+    "DataHoraReal": pd.to_datetime(["2024-03-01 08:00"]),
+    "Valor": [120.5],
+    "Batelada": [10],
+    "Fonte": ["CUBA_Entrada_Au"],
+    "Filtro": ["eluicao"],
+})
+
+
+def consolidar(etl, monkeypatch, tmp_path, partes):
+    def iterar(*args):
+        for parte in partes:
+            if isinstance(parte, Exception):
+                raise parte
+            yield parte
+
+    monkeypatch.setitem(etl, "iterar_consolidados", iterar)
+    return etl["gerar_consolidados"](
+        "planilha.xlsx",
+        caminho_series=str(tmp_path / "consolidado.parquet"),
+        caminho_batelada=str(tmp_path / "consolidado_batelada.parquet"),
+        atipicos=False,
+    )
+
+
+def test_falha_no_meio_mantem_parquet_anteriores(etl, monkeypatch, tmp_path):
+    partes_ok = [("series", "LIX_Au_S", SERIE), ("batelada", "CUBA_Entrada_Au", BATELADA)]
+    df_series, df_batelada = consolidar(etl, monkeypatch, tmp_path, partes_ok)
+    assert (len(df_series), len(df_batelada)) == (2, 1)
+
+    # Falha depois de uma fonte gravada: os parquet da execução anterior ficam intactos
+    partes_falha = [("series", "LIX_Au_S", SERIE.iloc[:1]), RuntimeError("planilha inválida")]
+    with pytest.raises(RuntimeError):
+        consolidar(etl, monkeypatch, tmp_path, partes_falha)
+
+    assert len(pd.read_parquet(tmp_path / "consolidado.parquet")) == 2
+    assert len(pd.read_parquet(tmp_path / "consolidado_batelada.parquet")) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["consolidado.parquet", "consolidado_batelada.parquet"]
@@ -0,0 +1,102 @@
+# tests/test_consulta_local.py
+# Backend local (DuckDB) das páginas contra a regra do pandas (painel.calcular_series).
+from datetime import date
+
+import pandas as pd
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+
+from utils.consulta_local import ORDEM_SERIES, consultar_series, criar_conexao
+
+
+def series_pandas(df, fontes, janela):
+    # Mesma regra de painel.calcular_series
+    df_f = df[df["Fonte"].isin(fontes)].sort_values(ORDEM_SERIES, kind="stable")
+    df_f["MediaMovel"] = (
+        df_f.groupby("Fonte")["Valor"]
+        .transform(lambda valores: valores.rolling(window=janela, min_periods=1).mean())
+    )
+    return df_f[["Fonte", "DataHoraReal", "Valor", "MediaMovel"]].reset_index(drop=True)
+
+
+@pytest.fixture
+def amostras():
+    # Amostras com o mesmo DataHoraReal em ordens diferentes de Valor
+    horas = pd.to_datetime(["2024-01-01 08:00"] * 3 + ["2024-01-01 10:00"] * 2 + ["2024-01-02 08:00"])
+    return pd.DataFrame({
+        "Fonte": ["A"] * 6 + ["B"] * 6,
+        "DataHoraReal": list(horas) * 2,
+        "Valor": [3.0, 1.0, 2.0, 9.0, 4.0, 5.0, 7.0, 8.0, 6.0, 1.0, 2.0, 3.0],
+    })
+
+
+@pytest.mark.parametrize("ordem_arquivo", ["original", "invertida"])
+def test_empates_iguais_ao_pandas(amostras, tmp_path, ordem_arquivo):
+    arquivo = amostras if ordem_arquivo == "original" else amostras.iloc[::-1]
+    caminho = tmp_path / "series.parquet"
+    arquivo.to_parquet(caminho, index=False)
+
+    resultado = consultar_series(
+        criar_conexao(), caminho, ("A", "B"), date(2024, 1, 1), date(2024, 1, 2), janela=2
+    )
+
+    esperado = series_pandas(amostras, ["A", "B"], janela=2)
+    resultado["DataHoraReal"] = resultado["DataHoraReal"].astype(esperado["DataHoraReal"].dtype)
+    pd.testing.assert_frame_equal(resultado, esperado, check_dtype=False)
+
+
+def test_filtro_de_fontes(amostras, tmp_path):
+    caminho = tmp_path / "series.parquet"
+    amostras.to_parquet(caminho, index=False)
+
+    resultado = consultar_series(criar_conexao(), caminho, ("B",), date(2024, 1, 1), date(2024, 1, 2), janela=2)
+    assert set(resultado["Fonte"]) == {"B"}
+    assert len(resultado) == 6
+
+
+@pytest.fixture
+def com_atipicos(amostras):
+    # Um pico marcado pelo ETL na Fonte A
+    df = amostras.copy()
+    df.loc[3, "Valor"] = 90.0
+    df["Outlier"] = df.index == 3
+    return df
+
+
+def test_modos_de_atipicos(com_atipicos, tmp_path):
+    caminho = tmp_path / "series.parquet"
+    com_atipicos.to_parquet(caminho, index=False)
+
+    def consultar(modo, max_pontos=None):
+        return consultar_series(
+            criar_conexao(), caminho, ("A",), date(2024, 1, 1), date(2024, 1, 2), janela=2,
+            max_pontos=max_pontos, atipicos=modo,
+        )
+
+    sem_pico = series_pandas(com_atipicos[~com_atipicos["Outlier"]], ["A"], janela=2)
+    excluir = consultar("excluir")
+    assert excluir["Valor"].tolist() == sem_pico["Valor"].tolist()
+    assert excluir["MediaMovel"].tolist() == pytest.approx(sem_pico["MediaMovel"].tolist())
+
+    marcar = consultar("marcar")
+    assert marcar["Outlier"].sum() == 1
+    assert marcar.loc[marcar["Outlier"], "Valor"].tolist() == [90.0]
+    assert 90.0 in marcar["Valor"].tolist() and len(marcar) == 6
+
+    assert "Outlier" not in consultar("incluir").columns
+
+    # Com baldes, a amostra atípica volta também como linha própria
+    baldes = consultar("marcar", max_pontos=2)
+    assert baldes.loc[baldes["Outlier"], "Valor"].tolist() == [90.0]
+    assert (~baldes["Outlier"]).sum() == 2
+
+
+def test_atipicos_sem_coluna(amostras, tmp_path):
+    caminho = tmp_path / "series.parquet"
+    amostras.to_parquet(caminho, index=False)
+
+    resultado = consultar_series(
+        criar_conexao(), caminho, ("A",), date(2024, 1, 1), date(2024, 1, 2), janela=2, atipicos="excluir"
+    )
+    assert len(resultado) == 6 and "Outlier" not in resultado.columns
@@ -0,0 +1,74 @@
+# tests/test_download.py
+# Download condicional (utils/download.py) contra um servidor HTTP local.
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils.download import baixar_arquivo_condicional, caminhos_cache
+
+CONTEUDO = b"planilha v1" * 1000
+ETAG = '"v1"'
+
+
+class Servidor(BaseHTTPRequestHandler):
+    # "normal": 200 / 304 conforme o ETag; "interrompido": corta a resposta no meio
+    modo = "normal"
+    corpos_enviados = 0
+
+    def do_GET(self):
+        if type(self).modo == "normal" and self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"v2"' if type(self).modo == "interrompido" else ETAG)
+        self.send_header("Content-Length", str(len(CONTEUDO)))
+        self.end_headers()
+        type(self).corpos_enviados += 1
+        if type(self).modo == "interrompido":
+            self.wfile.write(CONTEUDO[: len(CONTEUDO) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(CONTEUDO)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Servidor)
+    Servidor.modo, Servidor.corpos_enviados = "normal", 0
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}/planilha.xlsx"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_download_condicional(url, tmp_path):
+    # 200: baixa e grava no cache
+    caminho, meta = baixar_arquivo_condicional(url, pasta_cache=tmp_path, tentativas=0)
+    assert meta["modificado"] and meta["etag"] == ETAG
+    assert caminho.read_bytes() == CONTEUDO
+    assert Servidor.corpos_enviados == 1
+
+    # 304: reaproveita a cópia em disco, sem transferir o arquivo de novo
+    caminho_304, meta = baixar_arquivo_condicional(url, pasta_cache=tmp_path, tentativas=0)
+    assert caminho_304 == caminho and not meta["modificado"]
+    assert caminho.read_bytes() == CONTEUDO
+    assert Servidor.corpos_enviados == 1
+
+    # Download interrompido: a cópia anterior fica intacta e o temporário é removido
+    Servidor.modo = "interrompido"
+    with pytest.raises(requests.exceptions.RequestException):
+        baixar_arquivo_condicional(url, pasta_cache=tmp_path, tentativas=0)
+    assert caminho.read_bytes() == CONTEUDO
+    assert not caminho.with_suffix(".tmp").exists()
+    _, caminho_meta = caminhos_cache(url, tmp_path)
+    assert json.loads(caminho_meta.read_text(encoding="utf-8"))["etag"] == ETAG
@@ -0,0 +1,43 @@
+# tests/test_exportacao.py
+# Exportação em blocos do recorte filtrado (utils/exportacao.py).
+import io
+
+import pandas as pd
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import pytest
+
+from utils.exportacao import exportar_dataframe
+
+
+@pytest.fixture
+def df():
+    # Coluna de texto vazia no primeiro bloco e preenchida no segundo; coluna toda vazia
+    return pd.DataFrame({
+        "a": range(4),
+        "b": [None, None, "x", "y"],
+        "c": [None] * 4,
+    })
+
+
+def test_parquet_em_blocos(df):
+    arquivo = exportar_dataframe(df, "Parquet", linhas_por_bloco=2)
+
+    lido = pq.read_table(io.BytesIO(arquivo))
+    assert lido.num_rows == 4
+    assert pq.ParquetFile(io.BytesIO(arquivo)).num_row_groups == 2
+    assert lido.column("b").to_pylist() == [None, None, "x", "y"]
+    assert lido.column("c").to_pylist() == [None] * 4
+
+
+def test_csv_em_blocos(df):
+    arquivo = exportar_dataframe(df, "CSV", linhas_por_bloco=2)
+
+    lido = pacsv.read_csv(io.BytesIO(arquivo)).to_pandas()
+    assert lido["a"].tolist() == [0, 1, 2, 3]
+    assert lido["b"].tolist()[2:] == ["x", "y"]
+
+
+def test_formato_invalido(df):
+    with pytest.raises(ValueError):
+        exportar_dataframe(df, "XLSX")
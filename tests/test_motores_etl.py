@@ -0,0 +1,57 @@
+# tests/test_motores_etl.py
+# Equivalência dos motores pandas e polars do export/ETL.py sobre a mesma planilha.
+import numpy as np
+import pandas as pd
+import pytest
+
+pl = pytest.importorskip("polars")
+
+from utils.etl_polars import processar_dados_batelada_polars, processar_dados_polars  # noqa: E402
+
+
+@pytest.fixture
+def dados_series():
+    # Números, textos com vírgula/limite de detecção, lixo, zeros e valores acima do máximo
+    return pd.DataFrame({
+        "Data": pd.to_datetime(["2024-03-01", "2024-03-02", "2024-03-03"]),
+        "08:00": [1.5, "2,3", "<0,01"],
+        "16:00": ["abc", 0, 60],
+        "24:00": [None, "4.1 g/t", "  "],
+    })
+
+
+@pytest.fixture
+def dados_batelada():
+    return pd.DataFrame({
+        "Data": pd.to_datetime(["2024-03-01", "2024-03-01", "2024-03-02", "2024-03-02", "2024-03-03"]),
+        "Batelada": [10, 10, "11", 11.5, 12],
+        "Hora": ["08:00", "24:00", "12:30", "13:00", "06:00"],
+        "ValorBruto": ["120,5", "x", 90, 80, 600],
+    })
+
+
+def test_series_pandas_e_polars_iguais(etl, dados_series):
+    esperado = etl["processar_dados"](dados_series.copy(), 50, "LIX_Au_S")
+    esperado["Filtro"] = "solidas"
+
+    lf, rejeitados = processar_dados_polars(dados_series.copy(), 50, "LIX_Au_S", "solidas")
+    obtido = lf.collect().to_pandas()
+
+    assert rejeitados == esperado.attrs["rejeitados"] == 1
+    assert len(esperado) == 4
+    pd.testing.assert_frame_equal(obtido, esperado.reset_index(drop=True), check_dtype=False)
+    assert obtido["DataHoraReal"].iloc[2] == pd.Timestamp("2024-03-02 23:59")
+
+
+def test_batelada_pandas_e_polars_iguais(etl, dados_batelada):
+    esperado = etl["processar_dados_batelada"](dados_batelada.copy(), 500, "CUBA_Entrada_Au")
+    esperado["Filtro"] = "eluicao"
+
+    lf, rejeitados = processar_dados_batelada_polars(dados_batelada.copy(), 500, "CUBA_Entrada_Au", "eluicao")
+    obtido = lf.collect().to_pandas()
+
+    assert rejeitados == esperado.attrs["rejeitados"] == 1
+    # Batelada 11.5 (não inteira) e valor acima do máximo ficam fora
+    assert esperado["Batelada"].tolist() == [10, 11]
+    pd.testing.assert_frame_equal(obtido, esperado.reset_index(drop=True), check_dtype=False)
+    assert np.issubdtype(obtido["Batelada"].dtype, np.integer)
@@ -0,0 +1,37 @@
+# tests/test_tratamento.py
+# Parser dos valores de laboratório (utils/tratamento.converter_valores).
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.tratamento import converter_valores
+
+
+@pytest.mark.parametrize(
+    "bruto, esperado",
+    [
+        ("1.234.567", 1234567.0),  # pontos de milhar
+        ("1.234,5", 1234.5),
+        ("1,5", 1.5),  # vírgula decimal
+        ("<0,01", 0.01),  # limite de detecção
+        ("> 10 mg/L", 10.0),
+        ("1..5", 1.5),
+        ("1.234", 1.234),  # ponto único sem vírgula: decimal
+        ("-2,5", -2.5),
+        (3.5, 3.5),  # número do Excel
+    ],
+)
+def test_converte_valor(bruto, esperado):
+    valores, rejeitados = converter_valores([bruto])
+    assert valores.iloc[0] == pytest.approx(esperado)
+    assert rejeitados == 0
+
+
+def test_conta_rejeitados():
+    brutos = pd.Series(["1,5", "abc", "-", "n/d", "", "  ", None, np.nan, "<0,01"], index=list("abcdefghi"))
+    valores, rejeitados = converter_valores(brutos)
+
+    # Só células preenchidas que não viraram número contam como rejeitadas
+    assert rejeitados == 3
+    assert valores.index.equals(brutos.index)
+    assert valores.notna().tolist() == [True] + [False] * 7 + [True]
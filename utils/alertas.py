@@ -0,0 +1,197 @@
+# utils/alertas.py
+# Alertas de limites por Fonte avaliados no ETL, só sobre as amostras novas desde a última execução.
+# Todas as regras de todas as fontes são avaliadas de uma vez (merge amostras x regras e
+# operações vetorizadas), sem laço por Fonte ou por regra.
+import json
+import os
+from fnmatch import fnmatchcase
+
+import numpy as np
+import pandas as pd
+
+# Tipos de regra
+# - "limite": Valor fora de [minimo, maximo] (qualquer um dos dois pode faltar);
+# - "desvio_media": |Valor - média móvel anterior| > desvio x |média móvel anterior|
+#   (média = MediaMovel_6 da amostra anterior da mesma Fonte).
+TIPOS_REGRA = ("limite", "desvio_media")
+
+# Estrutura: Fonte (aceita curingas: "*_Au_L"), tipo, minimo/maximo ou desvio,
+# consecutivas (violações seguidas para disparar, padrão 1) e nivel ("alerta" ou "critico").
+# Valores de referência; ALERTAS_REGRAS=<arquivo .json> substitui a lista inteira.
+REGRAS_ALERTAS_PADRAO = [
+    {"Fonte": "REJ_Au_S",  "tipo": "limite", "maximo": 0.3,  "consecutivas": 3, "nivel": "critico"},
+    {"Fonte": "REJ_Au_L",  "tipo": "limite", "maximo": 0.05, "consecutivas": 3, "nivel": "critico"},
+    {"Fonte": "BAR_Au_L",  "tipo": "limite", "maximo": 0.1,  "consecutivas": 2, "nivel": "alerta"},
+    {"Fonte": "TQ01_Au_L", "tipo": "limite", "minimo": 0.5,  "consecutivas": 3, "nivel": "alerta"},
+    {"Fonte": "*_Au_L",    "tipo": "desvio_media", "desvio": 1.0, "consecutivas": 2, "nivel": "alerta"},
+    {"Fonte": "*_Au_S",    "tipo": "desvio_media", "desvio": 1.0, "consecutivas": 2, "nivel": "alerta"},
+]
+
+# Primeira execução (sem arquivo anterior): só os últimos dias entram, não o histórico todo
+DIAS_PRIMEIRA_AVALIACAO = int(os.getenv("ALERTAS_DIAS_INICIAIS", "7"))
+
+COLUNAS_ALERTAS = [
+    "DataHoraReal", "Fonte", "Valor", "Tipo", "Referencia", "Limite",
+    "Consecutivas", "Nivel", "Regra", "AvaliadoEm",
+]
+
+
+def carregar_regras(caminho=None) -> list[dict]:
+    """Regras do arquivo .json em 'caminho' (ou ALERTAS_REGRAS); sem arquivo, as regras padrão."""
+    caminho = caminho or os.getenv("ALERTAS_REGRAS")
+    if not caminho:
+        return REGRAS_ALERTAS_PADRAO
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def descrever_regra(regra: dict) -> str:
+    # Texto curto exibido na página (ex.: "REJ_Au_S > 0.3 (3x)")
+    if regra["tipo"] == "limite":
+        partes = []
+        if regra.get("minimo") is not None:
+            partes.append(f"< {regra['minimo']:g}")
+        if regra.get("maximo") is not None:
+            partes.append(f"> {regra['maximo']:g}")
+        condicao = " ou ".join(partes)
+    else:
+        condicao = f"desvio > {100 * regra['desvio']:g}% da média móvel"
+    return f"{regra['Fonte']} {condicao} ({int(regra.get('consecutivas', 1))}x)"
+
+
+def expandir_regras(regras, fontes) -> pd.DataFrame:
+    """
+    Uma linha por (regra, Fonte existente que casa com o padrão da regra), com IdRegra
+    único por par. Colunas: IdRegra, Fonte, Tipo, Minimo, Maximo, Desvio, Consecutivas, Nivel, Regra.
+    """
+    invalidas = sorted({regra.get("tipo") for regra in regras} - set(TIPOS_REGRA), key=str)
+    if invalidas:
+        raise ValueError(f"Tipos de regra inválidos: {invalidas}. Use um de {TIPOS_REGRA}.")
+
+    linhas = [
+        {
+            "Fonte": fonte,
+            "Tipo": regra["tipo"],
+            "Minimo": regra.get("minimo"),
+            "Maximo": regra.get("maximo"),
+            "Desvio": regra.get("desvio"),
+            "Consecutivas": int(regra.get("consecutivas", 1)),
+            "Nivel": regra.get("nivel", "alerta"),
+            "Regra": descrever_regra({**regra, "Fonte": fonte}),
+        }
+        for regra in regras
+        for fonte in fontes
+        if fnmatchcase(fonte, regra["Fonte"])
+    ]
+    expandidas = pd.DataFrame(linhas, columns=[
+        "Fonte", "Tipo", "Minimo", "Maximo", "Desvio", "Consecutivas", "Nivel", "Regra",
+    ])
+    for coluna in ["Minimo", "Maximo", "Desvio"]:
+        expandidas[coluna] = expandidas[coluna].astype(float)
+    expandidas.insert(0, "IdRegra", np.arange(len(expandidas)))
+    return expandidas
+
+
+def avaliar_alertas(df_series: pd.DataFrame, regras, avaliado_ate: dict | None = None) -> pd.DataFrame:
+    """
+    Avalia as 'regras' sobre as amostras de 'df_series' (consolidado das séries) posteriores
+    a avaliado_ate[Fonte] (todas, se a Fonte não estiver no dicionário).
+    Para cada Fonte entram também as 'consecutivas - 1' amostras anteriores às novas, só
+    como contexto das sequências de violações. A sequência de cada (regra, Fonte) sai de
+    dois cumsum agrupados; um alerta é uma amostra nova com sequência >= consecutivas.
+    Consecutivas no resultado conta a sequência dentro desse contexto (sequências mais
+    longas que começaram antes dele aparecem truncadas, mas sempre >= o exigido).
+    Retorna as colunas COLUNAS_ALERTAS (sem AvaliadoEm), em ordem de DataHoraReal.
+    """
+    avaliado_ate = avaliado_ate or {}
+    colunas = ["Fonte", "DataHoraReal", "Valor", "MediaMovel_6"]
+    regras = expandir_regras(regras, df_series["Fonte"].unique())
+    if regras.empty:
+        return pd.DataFrame(columns=COLUNAS_ALERTAS[:-1])
+
+    dados = (
+        df_series.loc[df_series["Fonte"].isin(regras["Fonte"]), colunas]
+        .sort_values(["Fonte", "DataHoraReal"], kind="stable")
+        .reset_index(drop=True)
+    )
+    # Média móvel até a amostra anterior (a atual não entra na própria referência)
+    dados["Referencia"] = dados.groupby("Fonte")["MediaMovel_6"].shift(1)
+
+    # Amostras novas e o contexto necessário antes delas
+    corte = pd.to_datetime(dados["Fonte"].map(avaliado_ate))
+    dados["Nova"] = corte.isna() | (dados["DataHoraReal"] > corte)
+    posicao = dados.groupby("Fonte").cumcount()
+    primeira_nova = posicao.where(dados["Nova"]).groupby(dados["Fonte"]).transform("min")
+    contexto = regras.groupby("Fonte")["Consecutivas"].max().sub(1)
+    dados = dados[posicao >= primeira_nova - dados["Fonte"].map(contexto)]
+    if not dados["Nova"].any():
+        return pd.DataFrame(columns=COLUNAS_ALERTAS[:-1])
+
+    # Amostras x regras da mesma Fonte (ordem por IdRegra e tempo)
+    avaliacao = regras.merge(dados, on="Fonte", how="inner")
+    valor = avaliacao["Valor"].to_numpy()
+    referencia = avaliacao["Referencia"].to_numpy()
+    with np.errstate(invalid="ignore"):
+        fora_limite = (valor > avaliacao["Maximo"].to_numpy()) | (valor < avaliacao["Minimo"].to_numpy())
+        desvio = np.abs(valor - referencia) > avaliacao["Desvio"].to_numpy() * np.abs(referencia)
+    violacao = pd.Series(
+        np.where(avaliacao["Tipo"].to_numpy() == "limite", fora_limite, desvio), index=avaliacao.index
+    )
+
+    # Sequência de violações seguidas: cada amostra sem violação abre um novo trecho
+    trecho = (~violacao).groupby(avaliacao["IdRegra"]).cumsum()
+    sequencia = violacao.astype("int64").groupby([avaliacao["IdRegra"], trecho]).cumsum()
+
+    disparos = violacao & (sequencia >= avaliacao["Consecutivas"]) & avaliacao["Nova"]
+    alertas = avaliacao[disparos.to_numpy()].copy()
+    alertas["Consecutivas"] = sequencia[disparos].to_numpy()
+    acima = alertas["Valor"] > alertas["Maximo"]
+    alertas["Limite"] = np.select(
+        [alertas["Tipo"] == "desvio_media", acima],
+        [alertas["Desvio"], alertas["Maximo"]],
+        alertas["Minimo"],
+    )
+    alertas["Referencia"] = alertas["Referencia"].where(alertas["Tipo"] == "desvio_media")
+    return (
+        alertas[COLUNAS_ALERTAS[:-1]]
+        .sort_values(["DataHoraReal", "Fonte", "Regra"], kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def atualizar_alertas(df_series: pd.DataFrame, caminho, regras=None) -> pd.DataFrame:
+    """
+    Avalia as regras só sobre as amostras novas e acrescenta os alertas ao parquet em 'caminho'.
+    O instante da última amostra avaliada de cada Fonte fica em attrs["avaliado_ate"] do arquivo;
+    sem arquivo anterior, avalia só os últimos DIAS_PRIMEIRA_AVALIACAO dias.
+    Amostras que chegam com instante anterior ao já avaliado da Fonte não são reavaliadas.
+    Retorna todos os alertas gravados.
+    """
+    regras = carregar_regras() if regras is None else regras
+
+    anterior = None
+    if os.path.exists(caminho):
+        anterior = pd.read_parquet(caminho, engine="pyarrow")
+        avaliado_ate = json.loads(anterior.attrs.get("avaliado_ate", "{}"))
+    else:
+        inicio = (df_series["DataHoraReal"].max() - pd.Timedelta(days=DIAS_PRIMEIRA_AVALIACAO)).isoformat()
+        avaliado_ate = {fonte: inicio for fonte in df_series["Fonte"].unique()}
+
+    novos = avaliar_alertas(df_series, regras, avaliado_ate)
+    novos["AvaliadoEm"] = pd.Timestamp.now().floor("s")
+    print(f"Alertas: {len(novos)} novos")
+
+    if anterior is None or anterior.empty:
+        alertas = novos
+    elif novos.empty:
+        alertas = anterior
+    else:
+        alertas = pd.concat([anterior, novos], ignore_index=True)
+    alertas = alertas.astype({"Consecutivas": "int64"})
+
+    ultimas = df_series.groupby("Fonte")["DataHoraReal"].max()
+    avaliado_ate.update({fonte: instante.isoformat() for fonte, instante in ultimas.items()})
+    alertas.attrs = {"avaliado_ate": json.dumps(avaliado_ate)}
+    alertas.to_parquet(caminho, index=False, engine="pyarrow", compression="snappy")
+    print(f"Arquivo salvo: {caminho}")
+    return alertas
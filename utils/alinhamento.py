@@ -0,0 +1,83 @@
+# utils/alinhamento.py
+# Alinhamento de séries de várias Fontes numa grade de tempo comum (comparação ponto a ponto).
+# As fontes são amostradas em grades diferentes (HORARIOS_2/3/4/6/12/24, HORARIOS_BAR do ETL);
+# aqui todas são levadas para os mesmos instantes com merge_asof ordenados, sem laços por Fonte.
+import numpy as np
+import pandas as pd
+
+# Regras de alinhamento por Fonte
+# - "interpolar": interpolação linear no tempo entre a amostra anterior e a seguinte;
+# - "asof": último valor conhecido (amostra anterior).
+REGRAS_ALINHAMENTO = ("interpolar", "asof")
+
+# Distância máxima até a amostra usada (maior intervalo das grades do ETL: HORARIOS_2)
+TOLERANCIA_PADRAO = pd.Timedelta(hours=12)
+
+# Passos da grade oferecidos nas páginas
+PASSOS_GRADE = ("1h", "2h", "4h", "8h", "12h", "24h")
+
+
+def regra_padrao(fonte: str) -> str:
+    # Líquidas (sufixo _L) são amostras pontuais: interpola;
+    # sólidas e demais são compostas do turno: vale o último resultado
+    return "interpolar" if fonte.endswith("_L") else "asof"
+
+
+def grade_tempo(inicio, fim, passo: str, tz=None) -> pd.DatetimeIndex:
+    """Instantes de 'inicio' 00:00 até o fim do dia 'fim' (exclusive), a cada 'passo'."""
+    return pd.date_range(
+        pd.Timestamp(inicio), pd.Timestamp(fim) + pd.Timedelta(days=1),
+        freq=passo, inclusive="left", tz=tz, name="DataHoraReal",
+    )
+
+
+def alinhar_series(df: pd.DataFrame, fontes, grade: pd.DatetimeIndex, regras: dict | None = None,
+                   tolerancia: pd.Timedelta = TOLERANCIA_PADRAO) -> pd.DataFrame:
+    """
+    Reamostra as séries de 'fontes' (df longo ['Fonte','DataHoraReal','Valor']) na 'grade'.
+    Todas as fontes são resolvidas de uma vez: a grade é repetida por Fonte e cruzada
+    com as amostras em um merge_asof para trás (e um para frente, se alguma Fonte
+    interpola), agrupado por Fonte. Amostras no mesmo instante viram a média delas.
+    Sem amostra a até 'tolerancia' (dos dois lados, ao interpolar) o ponto fica NaN.
+    Retorna um DataFrame largo: índice = grade, uma coluna por Fonte na ordem de 'fontes'.
+    """
+    fontes = list(fontes)
+    regras = {fonte: (regras or {}).get(fonte) or regra_padrao(fonte) for fonte in fontes}
+    invalidas = sorted({regra for regra in regras.values() if regra not in REGRAS_ALINHAMENTO})
+    if invalidas:
+        raise ValueError(f"Regras de alinhamento inválidas: {invalidas}. Use uma de {REGRAS_ALINHAMENTO}.")
+
+    amostras = (
+        df.loc[df["Fonte"].isin(fontes) & df["Valor"].notna(), ["Fonte", "DataHoraReal", "Valor"]]
+        .groupby(["Fonte", "DataHoraReal"], as_index=False)["Valor"].mean()
+        .sort_values("DataHoraReal", kind="stable")
+    )
+    if amostras.empty:
+        return pd.DataFrame(np.nan, index=grade, columns=fontes)
+    amostras["Instante"] = amostras["DataHoraReal"]
+    grade = grade.astype(amostras["DataHoraReal"].dtype)
+
+    # Grade x Fontes, ordenada pelo instante (exigência do merge_asof)
+    pontos = pd.DataFrame({
+        "DataHoraReal": grade.repeat(len(fontes)),
+        "Fonte": np.tile(np.array(fontes, dtype=object), len(grade)),
+    })
+
+    antes = pd.merge_asof(pontos, amostras, on="DataHoraReal", by="Fonte", direction="backward", tolerance=tolerancia)
+    valores = antes["Valor"].to_numpy()
+
+    interpolar = pontos["Fonte"].map(regras).eq("interpolar").to_numpy()
+    if interpolar.any():
+        depois = pd.merge_asof(pontos, amostras, on="DataHoraReal", by="Fonte", direction="forward", tolerance=tolerancia)
+        # Segundos desde o início da grade (NaT -> NaN: sem amostra dentro da tolerância)
+        origem = grade[0] if len(grade) else pd.Timestamp(0, tz=grade.tz)
+        t = (pontos["DataHoraReal"] - origem).dt.total_seconds().to_numpy()
+        t0 = (antes["Instante"] - origem).dt.total_seconds().to_numpy()
+        t1 = (depois["Instante"] - origem).dt.total_seconds().to_numpy()
+        v0, v1 = valores, depois["Valor"].to_numpy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            peso = np.where(t1 > t0, (t - t0) / (t1 - t0), 0.0)
+        interpolado = np.where(np.isnan(t1), np.nan, v0 + peso * (v1 - v0))
+        valores = np.where(interpolar, interpolado, valores)
+
+    return pd.DataFrame(valores.reshape(len(grade), len(fontes)), index=grade, columns=fontes)
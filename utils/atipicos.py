@@ -0,0 +1,86 @@
+# utils/atipicos.py
+# Marcação de valores atípicos (filtro de Hampel com janela móvel) nas séries do ETL.
+# Os valores não são removidos: a coluna Outlier indica os suspeitos.
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Estágio opcional do ETL (ETL_FILTRO_ATIPICOS=1)
+FILTRO_ATIPICOS = os.getenv("ETL_FILTRO_ATIPICOS", "0") == "1"
+
+# Amostras anteriores usadas como referência e limiar em desvios robustos
+JANELA_ATIPICOS = int(os.getenv("ATIPICOS_JANELA", "12"))
+LIMIAR_ATIPICOS = float(os.getenv("ATIPICOS_LIMIAR", "3.0"))
+
+# Mínimo de amostras anteriores válidas para avaliar um ponto
+MINIMO_ATIPICOS = 5
+
+# MAD -> desvio padrão para dados normais
+ESCALA_MAD = 1.4826
+
+CHAVE_ATIPICOS = ["Fonte", "DataHoraReal", "Valor"]
+
+
+def flags_hampel(valores: np.ndarray, inicio: int = 0, janela: int = JANELA_ATIPICOS,
+                 limiar: float = LIMIAR_ATIPICOS, minimo: int = MINIMO_ATIPICOS) -> np.ndarray:
+    """
+    Hampel "para trás" sobre 'valores' (em ordem temporal), só para as posições >= 'inicio':
+    o ponto i é atípico se |x_i - mediana| > limiar * 1.4826 * MAD, com mediana e MAD
+    das 'janela' amostras anteriores (o próprio ponto fica fora da referência).
+    Como só usa o passado, as marcas antigas não mudam quando chegam dados novos.
+    Pontos com menos de 'minimo' amostras anteriores ou MAD = 0 não são marcados.
+    Todas as janelas saem de uma única visão deslizante (sem laço por ponto).
+    """
+    valores = np.asarray(valores, dtype=float)
+    if inicio >= len(valores):
+        return np.zeros(0, dtype=bool)
+
+    # Contexto: as 'janela' amostras antes de 'inicio' (completadas com NaN no começo da série)
+    contexto = valores[max(0, inicio - janela):]
+    contexto = np.concatenate([np.full(janela - min(janela, inicio), np.nan), contexto])
+    janelas = sliding_window_view(contexto[:-1], janela)  # janela k = referência do ponto inicio + k
+    atuais = valores[inicio:]
+
+    with warnings.catch_warnings():
+        # Janelas só com NaN (início da série): mediana NaN, sem aviso
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mediana = np.nanmedian(janelas, axis=1)
+        mad = np.nanmedian(np.abs(janelas - mediana[:, None]), axis=1)
+    suficientes = np.isfinite(janelas).sum(axis=1) >= minimo
+    with np.errstate(invalid="ignore"):
+        return suficientes & (mad > 0) & (np.abs(atuais - mediana) > limiar * ESCALA_MAD * mad)
+
+
+def marcar_atipicos(df: pd.DataFrame, anteriores: pd.DataFrame | None = None,
+                    janela: int = JANELA_ATIPICOS, limiar: float = LIMIAR_ATIPICOS) -> pd.DataFrame:
+    """
+    Acrescenta a coluna booleana Outlier a 'df' (uma Fonte; ['Fonte','DataHoraReal','Valor',...]).
+    Incremental: 'anteriores' traz as marcas da execução anterior (CHAVE_ATIPICOS + Outlier);
+    em ordem temporal, as linhas até a primeira nova/alterada reaproveitam a marca e só a
+    cauda a partir dela é recalculada (com as 'janela' amostras anteriores como contexto).
+    A ordem das linhas de 'df' é preservada.
+    """
+    ordem = np.argsort(df["DataHoraReal"].to_numpy(), kind="stable")
+    em_ordem = df.iloc[ordem]
+    outlier = np.zeros(len(df), dtype=bool)
+
+    inicio = 0
+    if anteriores is not None and not anteriores.empty:
+        previas = (
+            em_ordem[CHAVE_ATIPICOS]
+            .merge(anteriores.drop_duplicates(CHAVE_ATIPICOS), on=CHAVE_ATIPICOS, how="left")["Outlier"]
+        )
+        novas = previas.isna().to_numpy()
+        inicio = int(novas.argmax()) if novas.any() else len(df)
+        outlier[:inicio] = previas.to_numpy()[:inicio].astype(bool)
+
+    outlier[inicio:] = flags_hampel(em_ordem["Valor"].to_numpy(), inicio, janela, limiar)
+
+    resultado = df.copy()
+    resultado["Outlier"] = False
+    resultado.iloc[ordem, resultado.columns.get_loc("Outlier")] = outlier
+    return resultado
+
@@ -0,0 +1,197 @@
+# utils/balanco.py
+# Balanço metalúrgico do ouro (LIX -> TQ* -> REJ) por turno e por dia, calculado no ETL
+# a partir das séries *_Au_S / *_Au_L alinhadas numa grade horária (utils/alinhamento.py).
+import json
+import os
+
+import pandas as pd
+
+from .alinhamento import TOLERANCIA_PADRAO, alinhar_series
+
+# Cadeia de tanques, da alimentação (LIX) ao rejeito (REJ)
+CADEIA_SOLIDOS = [
+    "LIX_Au_S", "TQ2_Au_S", "TQ5_Au_S", "TQ6_Au_S", "TQ7_Au_S",
+    "TQ9_Au_S", "TQ10_Au_S", "TQ11_Au_S", "TQ12_Au_S", "REJ_Au_S",
+]
+CADEIA_LIQUIDOS = [
+    "LIX_Au_L", "TQ01_Au_L", "TQ02_Au_L", "TQ06_Au_L", "TQ07_Au_L",
+    "TQ09_Au_L", "TQ10_Au_L", "TQ11_Au_L", "TQ12_Au_L", "REJ_Au_L",
+]
+
+# Escala -> duração do período (turnos de 8 h: 00-08, 08-16, 16-24)
+ESCALAS_BALANCO = {"turno": "8h", "dia": "1D"}
+
+# Passo da grade comum usada antes de agregar por turno/dia
+PASSO_BALANCO = "1h"
+
+# Razão líquido/sólido da polpa (m³ de solução por t de sólido): converte o ouro
+# em solução do rejeito (mg/L) em perda equivalente por tonelada (g/t)
+RAZAO_LIQUIDO_SOLIDO = float(os.getenv("BALANCO_RAZAO_LIQ_SOL", "1.5"))
+
+COLUNAS_BALANCO = ["Escala", "Inicio", "Fim", "Indicador", "Valor"]
+
+
+def periodo_da_amostra(instantes: pd.Series, duracao: str) -> pd.Series:
+    # Amostra às 08:00 fecha o turno 00-08 (e a das 24:00 fecha o dia): início = (t - 1ns) truncado
+    return (instantes - pd.Timedelta(1, "ns")).dt.floor(duracao)
+
+
+def indicadores_balanco(medias: pd.DataFrame, razao_liq_sol: float = RAZAO_LIQUIDO_SOLIDO) -> pd.DataFrame:
+    """
+    Indicadores do balanço a partir das médias por período (uma coluna por Fonte).
+    Todos são calculados sobre as médias do período (razão das médias), em %:
+    - Extracao_<TQ>: ouro já dissolvido do sólido até o tanque, (LIX_S - TQ_S) / LIX_S;
+    - Recuperacao_Solido: (LIX_S - REJ_S) / LIX_S;
+    - Perda_Solucao_gt: REJ_L x razão líquido/sólido (g/t, fora do %);
+    - Recuperacao_Global: (LIX_S - REJ_S - Perda_Solucao) / LIX_S;
+    - Adsorcao_Carvao: ouro da solução retido no carvão, (TQ01_L - REJ_L) / TQ01_L.
+    Períodos sem algum termo ficam NaN no indicador correspondente.
+    """
+    medias = medias.reindex(columns=CADEIA_SOLIDOS + CADEIA_LIQUIDOS)
+    alimentacao = medias["LIX_Au_S"].where(medias["LIX_Au_S"] > 0)
+
+    indicadores = {}
+    for fonte in CADEIA_SOLIDOS[1:-1]:
+        indicadores[f"Extracao_{fonte.removesuffix('_Au_S')}"] = 100 * (alimentacao - medias[fonte]) / alimentacao
+    perda_solucao = medias["REJ_Au_L"] * razao_liq_sol
+    indicadores["Recuperacao_Solido"] = 100 * (alimentacao - medias["REJ_Au_S"]) / alimentacao
+    indicadores["Perda_Solucao_gt"] = perda_solucao
+    indicadores["Recuperacao_Global"] = 100 * (alimentacao - medias["REJ_Au_S"] - perda_solucao) / alimentacao
+    solucao_entrada = medias["TQ01_Au_L"].where(medias["TQ01_Au_L"] > 0)
+    indicadores["Adsorcao_Carvao"] = 100 * (solucao_entrada - medias["REJ_Au_L"]) / solucao_entrada
+
+    # Teores médios do período entram no resultado (a página plota a cadeia direto)
+    teores = medias.add_prefix("Teor_")
+    return pd.concat([pd.DataFrame(indicadores, index=medias.index), teores], axis=1)
+
+
+def calcular_balanco(df_series: pd.DataFrame, desde=None, razao_liq_sol: float = RAZAO_LIQUIDO_SOLIDO) -> pd.DataFrame:
+    """
+    Balanço por turno e por dia de todo o histórico de 'df_series' (consolidado das séries),
+    ou só dos períodos que começam em 'desde' em diante.
+    As fontes da cadeia são alinhadas numa grade horária comum (interpolação nas líquidas,
+    último resultado nas sólidas), a média de cada período sai de um único groupby
+    e os indicadores são vetorizados sobre todos os períodos de uma vez.
+    Retorna o formato longo ['Escala','Inicio','Fim','Indicador','Valor'].
+    """
+    fontes = CADEIA_SOLIDOS + CADEIA_LIQUIDOS
+    dados = df_series.loc[df_series["Fonte"].isin(fontes), ["Fonte", "DataHoraReal", "Valor"]]
+    if desde is not None:
+        # Amostras anteriores ao corte ainda servem de vizinhas no alinhamento
+        dados = dados[dados["DataHoraReal"] >= pd.Timestamp(desde) - TOLERANCIA_PADRAO]
+    if dados.empty:
+        return pd.DataFrame(columns=COLUNAS_BALANCO)
+
+    # Grade em (inicio, última amostra]: o instante inicial fecha o período anterior
+    inicio = pd.Timestamp(desde) if desde is not None else dados["DataHoraReal"].min().floor("1D")
+    passo = pd.Timedelta(PASSO_BALANCO)
+    grade = pd.date_range(
+        inicio + passo, dados["DataHoraReal"].max().ceil(PASSO_BALANCO), freq=passo, name="DataHoraReal"
+    )
+    alinhado = alinhar_series(dados, fontes, grade)
+
+    partes = []
+    for escala, duracao in ESCALAS_BALANCO.items():
+        periodo = periodo_da_amostra(alinhado.index.to_series(), duracao)
+        medias = alinhado.groupby(periodo.to_numpy()).mean()
+        medias.index.name = "Inicio"
+        longo = (
+            indicadores_balanco(medias, razao_liq_sol)
+            .rename_axis(columns="Indicador")
+            .stack(future_stack=True)
+            .rename("Valor")
+            .dropna()
+            .reset_index()
+        )
+        longo["Escala"] = escala
+        longo["Fim"] = longo["Inicio"] + pd.Timedelta(duracao)
+        partes.append(longo)
+
+    balanco = pd.concat(partes, ignore_index=True)[COLUNAS_BALANCO]
+    if desde is not None:
+        balanco = balanco[balanco["Inicio"] >= pd.Timestamp(desde)]
+    return balanco.sort_values(["Escala", "Inicio", "Indicador"], kind="stable").reset_index(drop=True)
+
+
+def assinaturas_por_dia(df_series: pd.DataFrame) -> dict:
+    """
+    Assinatura das amostras da cadeia em cada dia: {'AAAA-MM-DD': 'linhas:hash'}.
+    O hash é a soma dos hashes das linhas (Fonte, DataHoraReal, Valor), então não
+    depende da ordem das linhas; qualquer amostra nova, removida ou corrigida muda
+    a assinatura do seu dia.
+    """
+    dados = df_series.loc[
+        df_series["Fonte"].isin(CADEIA_SOLIDOS + CADEIA_LIQUIDOS), ["Fonte", "DataHoraReal", "Valor"]
+    ]
+    if dados.empty:
+        return {}
+    hashes = pd.util.hash_pandas_object(dados, index=False)
+    por_dia = hashes.groupby(dados["DataHoraReal"].dt.floor("1D").to_numpy()).agg(["size", "sum"])
+    return {
+        f"{dia:%Y-%m-%d}": f"{linhas}:{int(soma) & 0xFFFFFFFFFFFFFFFF:016x}"
+        for dia, linhas, soma in zip(por_dia.index, por_dia["size"], por_dia["sum"])
+    }
+
+
+def inicio_recalculo(anteriores: dict, atuais: dict, ultima_anterior, ultima_atual):
+    """
+    Início (meia-noite) do primeiro período afetado pelas diferenças entre as
+    assinaturas da carga anterior e da atual, ou None se nada mudou.
+    Uma amostra alcança pontos da grade a até TOLERANCIA_PADRAO dela (dos dois lados),
+    e amostras novas no fim estendem a grade a partir da última amostra anterior.
+    """
+    instantes = [pd.Timestamp(dia) for dia in anteriores.keys() | atuais.keys() if anteriores.get(dia) != atuais.get(dia)]
+    if ultima_anterior != ultima_atual and ultima_anterior is not None:
+        instantes.append(pd.Timestamp(ultima_anterior))
+    if not instantes:
+        return None
+    return (min(instantes) - TOLERANCIA_PADRAO - pd.Timedelta(1, "ns")).floor("1D")
+
+
+def atualizar_balanco(df_series: pd.DataFrame, caminho, completo: bool = False,
+                      razao_liq_sol: float = RAZAO_LIQUIDO_SOLIDO) -> pd.DataFrame:
+    """
+    Atualiza o parquet do balanço em 'caminho' de forma incremental. O arquivo guarda
+    a assinatura das amostras de cada dia (attrs["assinaturas"]); só os períodos a
+    partir do primeiro dia com amostras novas, removidas ou corrigidas (menos a
+    tolerância do alinhamento) são recalculados, com o mesmo resultado de uma execução
+    completa. Sem arquivo anterior (ou sem assinaturas), com 'completo=True' ou com
+    outra razão líquido/sólido, recalcula todo o histórico.
+    Retorna o balanço completo gravado.
+    """
+    assinaturas = assinaturas_por_dia(df_series)
+    cadeia = df_series.loc[df_series["Fonte"].isin(CADEIA_SOLIDOS + CADEIA_LIQUIDOS), "DataHoraReal"]
+    ultima = cadeia.max().isoformat() if not cadeia.empty else None
+
+    anterior = None
+    if not completo and os.path.exists(caminho):
+        anterior = pd.read_parquet(caminho, engine="pyarrow")
+        if "assinaturas" not in anterior.attrs or anterior.attrs.get("razao_liq_sol") not in (None, razao_liq_sol):
+            anterior = None
+
+    if anterior is None:
+        balanco = calcular_balanco(df_series, razao_liq_sol=razao_liq_sol)
+        print(f"Balanço metalúrgico (completo): {len(balanco)} linhas")
+    else:
+        corte = inicio_recalculo(
+            json.loads(anterior.attrs["assinaturas"]), assinaturas, anterior.attrs.get("ultima_amostra"), ultima
+        )
+        if corte is None:
+            print("Balanço metalúrgico: amostras da cadeia sem alterações")
+            return anterior
+        novos = calcular_balanco(df_series, desde=corte, razao_liq_sol=razao_liq_sol)
+        balanco = (
+            pd.concat([anterior[anterior["Inicio"] < corte], novos], ignore_index=True)
+            .sort_values(["Escala", "Inicio", "Indicador"], kind="stable")
+            .reset_index(drop=True)
+        )
+        print(f"Balanço metalúrgico (incremental desde {corte:%Y-%m-%d}): {len(novos)} linhas recalculadas")
+
+    balanco.attrs = {
+        "razao_liq_sol": razao_liq_sol,
+        "assinaturas": json.dumps(assinaturas),
+        "ultima_amostra": ultima,
+    }
+    balanco.to_parquet(caminho, index=False, engine="pyarrow", compression="snappy")
+    print(f"Arquivo salvo: {caminho}")
+    return balanco
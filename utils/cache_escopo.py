@@ -0,0 +1,112 @@
+# utils/cache_escopo.py
+# Caches por escopo (uma tabela = um namespace) e controle da recarga manual,
+# compartilhados por todas as sessões do Streamlit (instâncias em st.cache_resource).
+import threading
+import time
+from collections import OrderedDict
+
+# Intervalo mínimo entre duas recargas manuais da mesma tabela (todas as sessões)
+INTERVALO_MINIMO_RECARGA = 60
+
+
+class CacheEscopo:
+    """
+    LRU em memória para resultados derivados (séries filtradas, intervalos, figuras...).
+    Cada entrada pertence a um namespace (a tabela de origem): invalidar(namespace)
+    remove só as entradas daquela tabela. Os valores são compartilhados entre as
+    sessões e não devem ser alterados por quem os recebe.
+    """
+
+    def __init__(self, max_entradas: int = 256, max_bytes: int | None = None):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._trava = threading.Lock()
+        self._entradas = OrderedDict()  # (namespace, chave) -> valor
+        self._tamanhos = {}             # (namespace, chave) -> bytes estimados
+        self._bytes = 0
+
+    def obter(self, namespace: str, chave, calcular):
+        item = (namespace, chave)
+        with self._trava:
+            if item in self._entradas:
+                self._entradas.move_to_end(item)
+                return self._entradas[item]
+
+        valor = calcular()
+        tamanho = tamanho_estimado(valor)
+        with self._trava:
+            if item in self._entradas:
+                self._remover(item)
+            self._entradas[item] = valor
+            self._tamanhos[item] = tamanho
+            self._bytes += tamanho
+            # Descarta as menos usadas até caber nos limites (mantém ao menos a nova)
+            while len(self._entradas) > 1 and (
+                len(self._entradas) > self.max_entradas
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._remover(next(iter(self._entradas)))
+        return valor
+
+    def invalidar(self, namespace: str) -> int:
+        with self._trava:
+            itens = [item for item in self._entradas if item[0] == namespace]
+            for item in itens:
+                self._remover(item)
+        return len(itens)
+
+    def _remover(self, item) -> None:
+        del self._entradas[item]
+        self._bytes -= self._tamanhos.pop(item, 0)
+
+
+def tamanho_estimado(valor) -> int:
+    # Estimativa barata do tamanho em memória (textos, bytes, DataFrames, figuras
+    # Plotly e listas deles)
+    if isinstance(valor, (str, bytes)):
+        return len(valor)
+    if isinstance(valor, (list, tuple)):
+        return sum(tamanho_estimado(v) for v in valor)
+    if hasattr(valor, "memory_usage"):
+        return int(valor.memory_usage(index=True).sum())
+    if hasattr(valor, "to_plotly_json"):
+        # go.Figure: tamanho do JSON (calculado uma vez, ao entrar no cache)
+        return len(valor.to_json(validate=False))
+    return 0
+
+
+class ControleRecarga:
+    """
+    Geração manual de cada tabela: entra na versão usada como chave dos caches,
+    então uma recarga invalida somente os caches daquela tabela.
+    Recargas da mesma tabela são limitadas a uma por 'intervalo_minimo' segundos,
+    somando os cliques de todas as sessões.
+    """
+
+    def __init__(self, intervalo_minimo: float = INTERVALO_MINIMO_RECARGA):
+        self.intervalo_minimo = intervalo_minimo
+        self._trava = threading.Lock()
+        self._geracoes = {}       # tabela -> int
+        self._ultima_recarga = {} # tabela -> instante
+
+    def geracao(self, tabela: str) -> int:
+        with self._trava:
+            return self._geracoes.get(tabela, 0)
+
+    def aguardar(self, tabela: str) -> float:
+        """Segundos até a próxima recarga permitida da tabela (0 = liberada)."""
+        with self._trava:
+            ultima = self._ultima_recarga.get(tabela)
+        if ultima is None:
+            return 0.0
+        return max(0.0, self.intervalo_minimo - (time.time() - ultima))
+
+    def solicitar(self, tabela: str) -> bool:
+        """Avança a geração da tabela; False se a última recarga foi há pouco."""
+        with self._trava:
+            ultima = self._ultima_recarga.get(tabela)
+            if ultima is not None and time.time() - ultima < self.intervalo_minimo:
+                return False
+            self._ultima_recarga[tabela] = time.time()
+            self._geracoes[tabela] = self._geracoes.get(tabela, 0) + 1
+        return True
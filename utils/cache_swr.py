@@ -0,0 +1,134 @@
+# utils/cache_swr.py
+# Cache "stale-while-revalidate" em memória, compartilhado por todas as sessões do Streamlit
+# (a instância fica em st.cache_resource, ver utils/painel.py).
+import threading
+import time
+
+# Depois de uma falha, espera este tempo antes de tentar atualizar a mesma chave de novo
+INTERVALO_APOS_FALHA = 30
+
+
+class CacheSWR:
+    """
+    Guarda o último valor bom de cada chave junto com a versão dele.
+
+    - Primeira leitura de uma chave: carrega na hora (leituras simultâneas
+      esperam a mesma carga).
+    - Versão pedida diferente da guardada: devolve o valor guardado na hora e
+      atualiza numa thread em segundo plano.
+    - Uma única atualização por chave de cada vez (as demais leituras reaproveitam).
+    Se a atualização falhar, o valor antigo continua sendo servido.
+    """
+
+    def __init__(self, intervalo_apos_falha: float = INTERVALO_APOS_FALHA):
+        self.intervalo_apos_falha = intervalo_apos_falha
+        self._trava = threading.Lock()
+        self._valores = {}       # chave -> (versao, valor, atualizado_em)
+        self._carregadores = {}  # chave -> função sem argumentos que devolve o valor
+        self._atualizando = {}   # chave -> thread da atualização em andamento
+        self._sequencias = {}    # nome -> thread de aquecer_em_sequencia
+        self._falhas = {}        # chave -> (instante, exceção) da última falha
+
+    def obter(self, chave, versao, carregar):
+        return self.obter_com_versao(chave, versao, carregar)[0]
+
+    def obter_com_versao(self, chave, versao, carregar) -> tuple:
+        """Como obter, mas retorna (valor, versão do valor servido)."""
+        with self._trava:
+            self._carregadores[chave] = carregar
+            entrada = self._valores.get(chave)
+
+        if entrada is None:
+            self._atualizar(chave, versao, ignorar_falha=True).join()
+            with self._trava:
+                entrada = self._valores.get(chave)
+                falha = self._falhas.get(chave)
+            if entrada is None:
+                raise falha[1] if falha else RuntimeError(f"Falha ao carregar {chave!r}")
+        elif entrada[0] != versao:
+            self._atualizar(chave, versao)
+
+        return entrada[1], entrada[0]
+
+    def versao(self, chave):
+        """Versão do valor que está sendo servido (None se ainda não carregado)."""
+        with self._trava:
+            entrada = self._valores.get(chave)
+        return entrada[0] if entrada else None
+
+    def chaves(self) -> list:
+        with self._trava:
+            return list(self._valores)
+
+    def forcar(self, chave) -> threading.Thread | None:
+        """Atualiza 'chave' em segundo plano mesmo sem mudança de versão."""
+        with self._trava:
+            entrada = self._valores.get(chave)
+        if entrada is not None:
+            return self._atualizar(chave, entrada[0], ignorar_falha=True)
+        return None
+
+    def aquecer(self, chave, versao, carregar) -> threading.Thread | None:
+        """Inicia (sem esperar) a carga de 'chave' se ela estiver ausente ou desatualizada."""
+        with self._trava:
+            self._carregadores[chave] = carregar
+            entrada = self._valores.get(chave)
+        if entrada is None or entrada[0] != versao:
+            return self._atualizar(chave, versao, ignorar_falha=entrada is None)
+        return None
+
+    def aquecer_em_sequencia(self, nome, itens) -> None:
+        """
+        Carrega em segundo plano, numa única thread e um de cada vez, os itens
+        (chave, versao, carregar) ausentes ou desatualizados. Usado para
+        pré-carregar histórico sem disputar com as leituras da tela.
+        Só uma sequência por 'nome' roda de cada vez.
+        """
+        def executar():
+            try:
+                for chave, versao, carregar in itens:
+                    thread = self.aquecer(chave, versao, carregar)
+                    if thread is not None:
+                        thread.join()
+            finally:
+                with self._trava:
+                    self._sequencias.pop(nome, None)
+
+        with self._trava:
+            if nome in self._sequencias:
+                return
+            thread = threading.Thread(target=executar, daemon=True, name=f"cache_swr:{nome}")
+            self._sequencias[nome] = thread
+        thread.start()
+
+    def _atualizar(self, chave, versao, ignorar_falha=False) -> threading.Thread | None:
+        with self._trava:
+            thread = self._atualizando.get(chave)
+            if thread is not None:
+                return thread
+
+            falha = self._falhas.get(chave)
+            if not ignorar_falha and falha and time.time() - falha[0] < self.intervalo_apos_falha:
+                return None
+
+            carregar = self._carregadores[chave]
+            thread = threading.Thread(
+                target=self._executar, args=(chave, versao, carregar), daemon=True,
+                name=f"cache_swr:{chave}",
+            )
+            self._atualizando[chave] = thread
+        thread.start()
+        return thread
+
+    def _executar(self, chave, versao, carregar):
+        try:
+            valor = carregar()
+            with self._trava:
+                self._valores[chave] = (versao, valor, time.time())
+                self._falhas.pop(chave, None)
+        except Exception as e:
+            with self._trava:
+                self._falhas[chave] = (time.time(), e)
+        finally:
+            with self._trava:
+                self._atualizando.pop(chave, None)
@@ -0,0 +1,54 @@
+# utils/carga_postgres.py
+# Backend de carga por COPY direto no Postgres do Supabase (CARGA_BACKEND=copy).
+# O DataFrame vai em CSV pelo protocolo COPY numa conexão direta (SUPABASE_DB_URL),
+# sem serializar linha a linha em JSON. O psycopg é opcional: só é importado aqui.
+import pandas as pd
+
+# Linhas por bloco de CSV escrito no COPY (limita a memória do texto gerado)
+LINHAS_POR_BLOCO = 100_000
+
+
+def copiar_dataframe(cursor, df: pd.DataFrame, tabela: str, linhas_por_bloco: int = LINHAS_POR_BLOCO) -> int:
+    """
+    Envia 'df' para 'tabela' com COPY ... FROM STDIN (FORMAT csv).
+    Campos vazios viram NULL (NaN/NaT/None); timestamps com fuso seguem em ISO.
+    Retorna a quantidade de linhas enviadas.
+    """
+    from psycopg import sql
+
+    comando = sql.SQL("COPY {} ({}) FROM STDIN (FORMAT csv)").format(
+        sql.Identifier(tabela),
+        sql.SQL(", ").join(sql.Identifier(coluna) for coluna in df.columns),
+    )
+    with cursor.copy(comando) as copy:
+        for inicio in range(0, len(df), linhas_por_bloco):
+            bloco = df.iloc[inicio:inicio + linhas_por_bloco]
+            copy.write(bloco.to_csv(index=False, header=False))
+    return len(df)
+
+
+def enviar_dados_postgres(df, table_name, db_url, modo="substituir", linhas_por_bloco=LINHAS_POR_BLOCO):
+    """
+    Mesmo contrato de funcoes_uteis.enviar_dados_supabase, via COPY.
+    - "substituir": DELETE + COPY na mesma transação (as páginas veem a carga
+      anterior até o commit, nunca a tabela vazia).
+    - "troca_atomica": preparar_carga / COPY na tabela inativa / publicar_carga
+      (funções de sql/troca_atomica.sql).
+    """
+    import psycopg
+    from psycopg import sql
+
+    with psycopg.connect(db_url) as conexao, conexao.cursor() as cursor:
+        if modo == "troca_atomica":
+            cursor.execute("select preparar_carga(%s)", (table_name,))
+            destino = cursor.fetchone()[0]
+        else:
+            cursor.execute(sql.SQL("DELETE FROM {}").format(sql.Identifier(table_name)))
+            destino = table_name
+
+        linhas = copiar_dataframe(cursor, df, destino, linhas_por_bloco)
+
+        if modo == "troca_atomica":
+            cursor.execute("select publicar_carga(%s, %s)", (table_name, linhas))
+        # Commit ao sair do bloco da conexão
+    return linhas
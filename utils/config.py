@@ -28,9 +28,36 @@ def p(var_name: str) -> Path:
     # Senão, faz relativo à raiz do projeto
     return (ROOT / path).resolve()
 
+
+def p_opcional(var_name: str, padrao: Path) -> Path:
+    """
+    Igual a p(), mas usa 'padrao' quando a variável não está definida no .env.
+    Útil para arquivos derivados que não precisam de configuração própria.
+    """
+    try:
+        return p(var_name)
+    except KeyError:
+        return padrao
+
 #==========================================================
 # Acessos Arquivos da planta e mina Programa e Realizado
 #==========================================================
 PARQUET_AMOSTRAS_BATELADAS = p("PARQUET_AMOSTRAS_BATELADAS")
 PARQUET_AMOSTRAS_HORARIAS = p("PARQUET_AMOSTRAS_HORARIAS")
-URL_EXCEL = p("URL_EXCEL")
\ No newline at end of file
+URL_EXCEL = p("URL_EXCEL")
+
+#==========================================================
+# Arquivos derivados (padrão: mesma pasta dos consolidados)
+#==========================================================
+PARQUET_RESUMO_BATELADAS = p_opcional(
+    "PARQUET_RESUMO_BATELADAS", PARQUET_AMOSTRAS_BATELADAS.with_name("resumo_bateladas.parquet")
+)
+PARQUET_BALANCO_METALURGICO = p_opcional(
+    "PARQUET_BALANCO_METALURGICO", PARQUET_AMOSTRAS_HORARIAS.with_name("balanco_metalurgico.parquet")
+)
+PARQUET_ALERTAS = p_opcional(
+    "PARQUET_ALERTAS", PARQUET_AMOSTRAS_HORARIAS.with_name("alertas.parquet")
+)
+PARQUET_DEFASAGENS = p_opcional(
+    "PARQUET_DEFASAGENS", PARQUET_AMOSTRAS_HORARIAS.with_name("defasagens.parquet")
+)
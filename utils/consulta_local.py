@@ -0,0 +1,146 @@
+# utils/consulta_local.py
+# Backend local das páginas: SQL no DuckDB embarcado direto sobre os .parquet do ETL.
+# O DuckDB é opcional (só é importado quando BACKEND_DADOS=duckdb).
+from datetime import date, timedelta
+
+import pandas as pd
+
+# Ordem das amostras nas séries (igual nos dois backends): amostras com o mesmo
+# DataHoraReal desempatam por Valor, para a média móvel não depender da ordem de leitura
+ORDEM_SERIES = ["Fonte", "DataHoraReal", "Valor"]
+
+# Tratamento das amostras marcadas pelo ETL (coluna Outlier, utils/atipicos.py)
+MODOS_ATIPICOS = ("marcar", "excluir", "incluir")
+
+
+def criar_conexao():
+    import duckdb
+
+    # Banco em memória: os dados ficam nos .parquet, lidos sob demanda a cada consulta
+    return duckdb.connect(database=":memory:")
+
+
+def filtro_fontes(fontes) -> tuple[str, dict]:
+    """
+    'Fonte IN ($fonte_0, ...)' com um parâmetro por fonte, mais a faixa min/max das
+    fontes: a faixa é empurrada pelo DuckDB para a leitura do Parquet e descarta os
+    row groups das outras fontes pelas estatísticas (o ETL grava um por fonte).
+    """
+    parametros = {f"fonte_{i}": fonte for i, fonte in enumerate(fontes)}
+    parametros.update(fonte_min=min(fontes), fonte_max=max(fontes))
+    nomes = ", ".join(f"$fonte_{i}" for i in range(len(fontes)))
+    return f"Fonte BETWEEN $fonte_min AND $fonte_max AND Fonte IN ({nomes})", parametros
+
+
+def consultar_intervalos(con, caminho, fontes) -> pd.DataFrame:
+    """
+    Uma linha por Fonte presente no arquivo: ['Fonte','Inicio','Fim','Linhas'].
+    """
+    if not fontes:
+        return pd.DataFrame(columns=["Fonte", "Inicio", "Fim", "Linhas"])
+    filtro, parametros = filtro_fontes(fontes)
+    return con.execute(
+        f"""
+        SELECT Fonte, min(DataHoraReal) AS Inicio, max(DataHoraReal) AS Fim, count(*) AS Linhas
+        FROM read_parquet($caminho)
+        WHERE {filtro}
+        GROUP BY Fonte
+        ORDER BY Fonte
+        """,
+        {"caminho": str(caminho), **parametros},
+    ).df()
+
+
+def colunas_parquet(con, caminho) -> list[str]:
+    return list(con.execute("SELECT * FROM read_parquet($caminho) LIMIT 0", {"caminho": str(caminho)}).df().columns)
+
+
+def consultar_series(con, caminho, fontes, inicio: date, fim: date, janela: int, max_pontos: int | None = None,
+                     atipicos: str = "incluir") -> pd.DataFrame:
+    """
+    Filtra fontes/período e calcula a média móvel de 'janela' linhas por Fonte
+    (mesma regra do pandas: rolling(janela, min_periods=1) após o filtro, na ORDEM_SERIES).
+    Com 'max_pontos', agrega em baldes de tempo para devolver no máximo
+    ~max_pontos pontos por Fonte (média de Valor e MediaMovel em cada balde).
+    'atipicos' (ver MODOS_ATIPICOS), se o arquivo tiver a coluna Outlier do ETL:
+    - "excluir": as amostras atípicas saem antes da média móvel;
+    - "marcar": ficam na média e voltam com Outlier = True (com baldes, cada
+      atípica vem também como linha própria, fora dos baldes);
+    - "incluir": ficam na média, sem a coluna Outlier.
+    Retorna ['Fonte','DataHoraReal','Valor','MediaMovel'(,'Outlier')] na ORDEM_SERIES.
+    """
+    if atipicos not in MODOS_ATIPICOS:
+        raise ValueError(f"Modo de atípicos inválido: {atipicos!r}. Use um de {MODOS_ATIPICOS}.")
+    if not fontes:
+        return pd.DataFrame(columns=["Fonte", "DataHoraReal", "Valor", "MediaMovel"])
+    filtro, parametros = filtro_fontes(fontes)
+    parametros = {
+        **parametros,
+        "caminho": str(caminho),
+        "inicio": pd.Timestamp(inicio),
+        "fim": pd.Timestamp(fim + timedelta(days=1)),
+    }
+    if "Outlier" not in colunas_parquet(con, caminho):
+        atipicos = "incluir"
+    coluna_outlier = ", coalesce(Outlier, false) AS Outlier" if atipicos != "incluir" else ""
+    if atipicos == "excluir":
+        filtro += " AND NOT coalesce(Outlier, false)"
+    sql = f"""
+        WITH base AS (
+            SELECT Fonte, DataHoraReal, Valor, file_row_number{coluna_outlier}
+            FROM read_parquet($caminho, file_row_number = true)
+            WHERE {filtro}
+              AND DataHoraReal >= $inicio AND DataHoraReal < $fim
+        ),
+        mm AS (
+            SELECT
+                Fonte, DataHoraReal, Valor,
+                avg(Valor) OVER (
+                    PARTITION BY Fonte
+                    ORDER BY DataHoraReal, Valor, file_row_number
+                    ROWS BETWEEN {int(janela) - 1} PRECEDING AND CURRENT ROW
+                ) AS MediaMovel{", Outlier" if coluna_outlier else ""}
+            FROM base
+        )
+    """
+    if max_pontos:
+        segundos = max(1, int((parametros["fim"] - parametros["inicio"]).total_seconds() // max_pontos))
+        sql += f"""
+        SELECT
+            Fonte,
+            time_bucket(INTERVAL {segundos} SECOND, DataHoraReal) AS DataHoraReal,
+            avg(Valor) AS Valor,
+            avg(MediaMovel) AS MediaMovel{", false AS Outlier" if coluna_outlier else ""}
+        FROM mm
+        GROUP BY Fonte, time_bucket(INTERVAL {segundos} SECOND, DataHoraReal)
+        """
+        if coluna_outlier:
+            sql += "UNION ALL SELECT Fonte, DataHoraReal, Valor, MediaMovel, Outlier FROM mm WHERE Outlier\n"
+        sql += f"ORDER BY {', '.join(ORDEM_SERIES)}"
+    else:
+        sql += f"SELECT * FROM mm ORDER BY {', '.join(ORDEM_SERIES)}"
+
+    return con.execute(sql, parametros).df()
+
+
+def consultar_bateladas(con, caminho, fontes, bat_ini: int, bat_fim: int) -> pd.DataFrame:
+    """
+    Linhas brutas das fontes e bateladas pedidas (mesmas colunas do consolidado de batelada).
+    """
+    if not fontes:
+        return con.execute("SELECT * FROM read_parquet($caminho) LIMIT 0", {"caminho": str(caminho)}).df()
+    filtro, parametros = filtro_fontes(fontes)
+    return con.execute(
+        f"""
+        SELECT *
+        FROM read_parquet($caminho)
+        WHERE {filtro}
+          AND Batelada BETWEEN $bat_ini AND $bat_fim
+        ORDER BY Fonte, DataHoraReal
+        """,
+        {"caminho": str(caminho), **parametros, "bat_ini": int(bat_ini), "bat_fim": int(bat_fim)},
+    ).df()
+
+
+def consultar_tabela(con, caminho) -> pd.DataFrame:
+    return con.execute("SELECT * FROM read_parquet($caminho)", {"caminho": str(caminho)}).df()
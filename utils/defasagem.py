@@ -0,0 +1,151 @@
+# utils/defasagem.py
+# Defasagem (tempo de transporte/residência) entre tanques por correlação cruzada via FFT.
+# As séries são alinhadas numa grade horária (utils/alinhamento.py); para cada par de fontes,
+# todas as janelas móveis são correlacionadas de uma vez com rfft/irfft (O(n log n) por janela),
+# sem varrer defasagem por defasagem.
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .alinhamento import alinhar_series
+from .balanco import CADEIA_LIQUIDOS, CADEIA_SOLIDOS
+
+# Grade, janela móvel, avanço entre janelas e maior defasagem avaliada (nos dois sentidos)
+PASSO_DEFASAGEM = "1h"
+JANELA_DEFASAGEM = pd.Timedelta(days=int(os.getenv("DEFASAGEM_JANELA_DIAS", "30")))
+AVANCO_DEFASAGEM = pd.Timedelta(days=1)
+MAX_DEFASAGEM = pd.Timedelta(hours=int(os.getenv("DEFASAGEM_MAX_HORAS", "72")))
+
+# Fração mínima da janela com as duas fontes presentes na defasagem avaliada
+MINIMO_SOBREPOSICAO = 0.5
+
+COLUNAS_DEFASAGEM = [
+    "Origem", "Destino", "Tipo", "Inicio", "Fim",
+    "DefasagemHoras", "Correlacao", "CorrelacaoSemDefasagem", "Amostras",
+]
+
+
+def ponto_da_cadeia(fonte: str) -> str:
+    # "TQ02_Au_L" e "TQ2_Au_S" são o mesmo tanque (a numeração das líquidas tem zero à esquerda)
+    return re.sub(r"^TQ0*(\d+)", r"TQ\1", fonte.rsplit("_Au_", 1)[0])
+
+
+def pares_padrao() -> list[tuple[str, str, str]]:
+    """
+    Pares (Origem, Destino, Tipo) avaliados no ETL:
+    - "transporte": TQ01_Au_L -> cada líquida a jusante na cadeia (até o REJ);
+    - "liquido_solido": líquida -> sólida do mesmo ponto da cadeia.
+    """
+    jusante = CADEIA_LIQUIDOS[CADEIA_LIQUIDOS.index("TQ01_Au_L") + 1:]
+    pares = [("TQ01_Au_L", destino, "transporte") for destino in jusante]
+    pares += [
+        (liquida, solida, "liquido_solido")
+        for liquida in CADEIA_LIQUIDOS
+        for solida in CADEIA_SOLIDOS
+        if ponto_da_cadeia(liquida) == ponto_da_cadeia(solida)
+    ]
+    return pares
+
+
+def correlacao_cruzada(x: np.ndarray, y: np.ndarray, max_defasagem: int, minimo: int = 1):
+    """
+    Correlação cruzada normalizada de cada linha de 'x' com a mesma linha de 'y'
+    (matrizes janelas x amostras, NaN = sem amostra), para defasagens -max..+max.
+    Defasagem k > 0: 'y' atrasado k passos em relação a 'x' (soma de x[t] * y[t + k]).
+    Cada janela é centrada na própria média; a normalização usa só os pontos em que as
+    duas séries existem naquela defasagem. Numerador, energias e contagens saem do mesmo
+    produto de espectros (rfft/irfft), com preenchimento para não haver correlação circular.
+    Retorna (defasagens, correlacao[janela, defasagem], amostras[janela, defasagem]);
+    correlação NaN onde há menos de 'minimo' pares ou variância nula.
+    """
+    n = x.shape[1]
+    tamanho = 1 << int(n + max_defasagem - 1).bit_length()
+    defasagens = np.arange(-max_defasagem, max_defasagem + 1)
+
+    # Centra cada janela na própria média (pontos sem amostra viram 0 e ficam fora das máscaras)
+    mx, my = np.isfinite(x), np.isfinite(y)
+    x, y = np.where(mx, x, 0.0), np.where(my, y, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x0 = np.where(mx, x - x.sum(axis=1, keepdims=True) / mx.sum(axis=1, keepdims=True), 0.0)
+        y0 = np.where(my, y - y.sum(axis=1, keepdims=True) / my.sum(axis=1, keepdims=True), 0.0)
+
+    espectro = lambda a: np.fft.rfft(a, tamanho, axis=1)
+    cruzada = lambda a, b: np.fft.irfft(np.conj(a) * b, tamanho, axis=1)[:, defasagens % tamanho]
+    fx, fy = espectro(x0), espectro(y0)
+    fmx, fmy = espectro(mx.astype(float)), espectro(my.astype(float))
+
+    numerador = cruzada(fx, fy)
+    energia_x = cruzada(espectro(x0 ** 2), fmy)
+    energia_y = cruzada(fmx, espectro(y0 ** 2))
+    amostras = np.rint(cruzada(fmx, fmy)).astype("int64")
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlacao = numerador / np.sqrt(energia_x * energia_y)
+    # Ruído numérico da FFT em janelas sem variância
+    valido = (amostras >= max(minimo, 2)) & (energia_x > 1e-9) & (energia_y > 1e-9)
+    return defasagens, np.where(valido, np.clip(correlacao, -1.0, 1.0), np.nan), amostras
+
+
+def calcular_defasagens(df_series: pd.DataFrame, pares=None, janela: pd.Timedelta = JANELA_DEFASAGEM,
+                        avanco: pd.Timedelta = AVANCO_DEFASAGEM,
+                        max_defasagem: pd.Timedelta = MAX_DEFASAGEM) -> pd.DataFrame:
+    """
+    Melhor defasagem e correlação por par de fontes em janelas móveis de 'janela',
+    a cada 'avanco', sobre todo o histórico de 'df_series' (consolidado das séries).
+    As fontes são alinhadas uma única vez numa grade horária e, para cada par, todas as
+    janelas (visão deslizante da grade) vão juntas para correlacao_cruzada.
+    Retorna COLUNAS_DEFASAGEM (DefasagemHoras > 0: Destino responde depois da Origem).
+    """
+    pares = pares_padrao() if pares is None else pares
+    fontes = list(dict.fromkeys(fonte for origem, destino, _ in pares for fonte in (origem, destino)))
+    dados = df_series.loc[df_series["Fonte"].isin(fontes), ["Fonte", "DataHoraReal", "Valor"]]
+    if dados.empty:
+        return pd.DataFrame(columns=COLUNAS_DEFASAGEM)
+
+    passo = pd.Timedelta(PASSO_DEFASAGEM)
+    grade = pd.date_range(
+        dados["DataHoraReal"].min().floor("1D"), dados["DataHoraReal"].max().ceil(PASSO_DEFASAGEM),
+        freq=passo, name="DataHoraReal",
+    )
+    n, salto, max_passos = janela // passo, avanco // passo, max_defasagem // passo
+    if len(grade) < n:
+        return pd.DataFrame(columns=COLUNAS_DEFASAGEM)
+    alinhado = alinhar_series(dados, fontes, grade)
+    inicios = grade[: len(grade) - n + 1 : salto]
+
+    partes = []
+    for origem, destino, tipo in pares:
+        x = sliding_window_view(alinhado[origem].to_numpy(), n)[::salto]
+        y = sliding_window_view(alinhado[destino].to_numpy(), n)[::salto]
+        defasagens, correlacao, amostras = correlacao_cruzada(x, y, max_passos, int(MINIMO_SOBREPOSICAO * n))
+
+        avaliadas = np.isfinite(correlacao).any(axis=1)
+        melhor = np.argmax(np.where(np.isfinite(correlacao), correlacao, -np.inf), axis=1)
+        janelas = np.arange(len(inicios))
+        partes.append(pd.DataFrame({
+            "Origem": origem,
+            "Destino": destino,
+            "Tipo": tipo,
+            "Inicio": inicios,
+            "Fim": inicios + janela,
+            "DefasagemHoras": defasagens[melhor] * (passo / pd.Timedelta(hours=1)),
+            "Correlacao": correlacao[janelas, melhor],
+            "CorrelacaoSemDefasagem": correlacao[:, max_passos],
+            "Amostras": amostras[janelas, melhor],
+        })[avaliadas])
+
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_DEFASAGEM)
+    return pd.concat(partes, ignore_index=True)[COLUNAS_DEFASAGEM]
+
+
+def atualizar_defasagens(df_series: pd.DataFrame, caminho) -> pd.DataFrame:
+    """Recalcula as defasagens de todo o histórico e grava o parquet em 'caminho'."""
+    defasagens = calcular_defasagens(df_series)
+    print(f"Defasagens entre tanques: {len(defasagens)} janelas x pares")
+    defasagens.to_parquet(caminho, index=False, engine="pyarrow", compression="snappy")
+    print(f"Arquivo salvo: {caminho}")
+    return defasagens
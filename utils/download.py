@@ -0,0 +1,100 @@
+# utils/download.py
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .paths import ROOT
+
+# Cópias locais dos arquivos remotos (uma por URL) + metadados de validação
+PASTA_CACHE_DOWNLOAD = ROOT / "cache" / "downloads"
+
+
+def criar_sessao(tentativas: int = 3) -> requests.Session:
+    """
+    Sessão HTTP com novas tentativas (backoff exponencial) para erros
+    transitórios do servidor e falhas de conexão.
+    """
+    retry = Retry(
+        total=tentativas,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "HEAD"],
+    )
+    sessao = requests.Session()
+    sessao.mount("http://", HTTPAdapter(max_retries=retry))
+    sessao.mount("https://", HTTPAdapter(max_retries=retry))
+    return sessao
+
+
+def caminhos_cache(url: str, pasta_cache: Path = PASTA_CACHE_DOWNLOAD) -> tuple[Path, Path]:
+    chave = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    return pasta_cache / f"{chave}.bin", pasta_cache / f"{chave}.json"
+
+
+def baixar_arquivo_condicional(
+    url: str,
+    pasta_cache: Path = PASTA_CACHE_DOWNLOAD,
+    timeout: tuple[float, float] = (10, 120),
+    tentativas: int = 3,
+    tamanho_bloco: int = 1024 * 1024,
+    sessao: requests.Session | None = None,
+) -> tuple[Path, dict]:
+    """
+    Baixa 'url' para o cache local somente se o conteúdo mudou.
+
+    - Envia If-None-Match / If-Modified-Since com o ETag / Last-Modified da última cópia.
+    - 304 (não modificado): reaproveita a cópia em disco, sem transferir o arquivo.
+    - 200: grava em blocos num arquivo temporário e substitui a cópia ao final,
+      calculando o MD5 durante a gravação.
+    Retorna (caminho_local, metadados) com metadados = {url, etag, last_modified, md5, modificado}.
+    """
+    pasta_cache.mkdir(parents=True, exist_ok=True)
+    caminho, caminho_meta = caminhos_cache(url, pasta_cache)
+
+    meta = {}
+    if caminho.exists() and caminho_meta.exists():
+        with open(caminho_meta, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    sessao = sessao or criar_sessao(tentativas)
+    with sessao.get(url, headers=headers, stream=True, timeout=timeout) as resp:
+        if resp.status_code == 304 and meta:
+            return caminho, {**meta, "modificado": False}
+        if resp.status_code != 200:
+            raise RuntimeError(f"Erro ao baixar o arquivo (status {resp.status_code}).")
+
+        md5 = hashlib.md5()
+        temporario = caminho.with_suffix(".tmp")
+        try:
+            with open(temporario, "wb") as f:
+                for bloco in resp.iter_content(chunk_size=tamanho_bloco):
+                    md5.update(bloco)
+                    f.write(bloco)
+            os.replace(temporario, caminho)
+        except BaseException:
+            # Download interrompido: descarta a parte gravada e mantém a cópia anterior
+            temporario.unlink(missing_ok=True)
+            raise
+
+        meta = {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "md5": md5.hexdigest(),
+        }
+
+    with open(caminho_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    return caminho, {**meta, "modificado": True}
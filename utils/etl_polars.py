@@ -0,0 +1,93 @@
+# utils/etl_polars.py
+# Motor Polars do export/ETL.py (gerar_consolidados(..., engine="polars")).
+# Mesmas regras de processar_dados / processar_dados_batelada, mas com as
+# transformações de cada fonte em consultas lazy do Polars (multi-thread).
+# O Polars é opcional: só é importado aqui.
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from .tratamento import converter_valores, deslocamentos_hora
+
+COLUNAS_SERIES = ["Fonte", "DataHoraReal", "Valor", "MediaMovel_6", "Filtro"]
+COLUNAS_BATELADA = ["DataHoraReal", "Valor", "Batelada", "Fonte", "Filtro"]
+
+
+def ordenar_para_gravacao(lf: pl.LazyFrame) -> pl.LazyFrame:
+    # Mesma ordem do motor pandas: DataHoraReal (desc), estável
+    return lf.sort("DataHoraReal", descending=True, maintain_order=True)
+
+
+def remover_repetidas(lf: pl.LazyFrame, chave, geradas: pl.DataFrame | None) -> pl.LazyFrame:
+    """
+    Remove linhas repetidas pela 'chave' (fica a primeira) e as chaves já geradas por
+    um conjunto anterior da mesma fonte ('geradas'), mantendo a ordem das linhas.
+    """
+    lf = lf.unique(subset=chave, keep="first", maintain_order=True)
+    if geradas is not None:
+        lf = lf.join(geradas.lazy(), on=chave, how="anti", maintain_order="left")
+    return lf
+
+
+def datas_normalizadas(datas) -> np.ndarray:
+    return pd.to_datetime(pd.Series(datas), errors="coerce").dt.normalize().to_numpy(dtype="datetime64[ns]")
+
+
+def processar_dados_polars(dados, valor_maximo, nome_fonte, filtro=None) -> tuple[pl.LazyFrame, int]:
+    """
+    Equivalente lazy de processar_dados (+ coluna Filtro). Retorna (LazyFrame, rejeitados).
+    A limpeza dos valores continua em converter_valores (mesmo parser dos dois motores);
+    as colunas já limpas entram direto num LazyFrame, sem DataFrame intermediário.
+    """
+    horas = [coluna for coluna in dados.columns if coluna != "Data"]
+    valores, rejeitados = converter_valores(dados[horas].to_numpy(dtype=object).ravel())
+
+    base = pl.LazyFrame({
+        "Data": pl.Series(np.repeat(datas_normalizadas(dados["Data"]), len(horas))),
+        "Deslocamento": pl.Series(np.tile(deslocamentos_hora(horas).to_numpy(), len(dados))),
+        "Valor": pl.Series(valores.to_numpy(), nan_to_null=True),
+    })
+
+    lf = (
+        base
+        .filter(pl.col("Valor").is_not_null() & (pl.col("Valor") != 0) & (pl.col("Valor") <= valor_maximo))
+        .with_columns((pl.col("Data") + pl.col("Deslocamento")).alias("DataHoraReal"))
+        .drop_nulls(["DataHoraReal", "Valor"])
+        .with_columns(
+            pl.col("Valor").rolling_mean(window_size=6, min_samples=1).alias("MediaMovel_6"),
+            pl.lit(nome_fonte, dtype=pl.String).alias("Fonte"),
+            pl.lit(filtro, dtype=pl.String).alias("Filtro"),
+        )
+        .select(COLUNAS_SERIES)
+    )
+    return lf, rejeitados
+
+
+def processar_dados_batelada_polars(dados, valor_maximo, nome_fonte, filtro=None) -> tuple[pl.LazyFrame, int]:
+    """
+    Equivalente lazy de processar_dados_batelada (+ coluna Filtro). Retorna (LazyFrame, rejeitados).
+    """
+    valores, rejeitados = converter_valores(dados["ValorBruto"])
+
+    base = pl.LazyFrame({
+        "Data": pl.Series(datas_normalizadas(dados["Data"])),
+        "Deslocamento": pl.Series(deslocamentos_hora(dados["Hora"]).to_numpy()),
+        "Valor": pl.Series(valores.to_numpy(), nan_to_null=True),
+        "Batelada": pl.Series(pd.to_numeric(dados["Batelada"], errors="coerce").to_numpy(dtype="float64"), nan_to_null=True),
+    })
+
+    lf = (
+        base
+        .filter(pl.col("Valor").is_not_null() & (pl.col("Valor") != 0) & (pl.col("Valor") <= valor_maximo))
+        .with_columns((pl.col("Data") + pl.col("Deslocamento")).alias("DataHoraReal"))
+        .filter(pl.col("Batelada").is_not_null() & (pl.col("Batelada") % 1 == 0))
+        .with_columns(pl.col("Batelada").cast(pl.Int64))
+        .drop_nulls(["DataHoraReal", "Valor", "Batelada"])
+        .with_columns(
+            pl.lit(nome_fonte, dtype=pl.String).alias("Fonte"),
+            pl.lit(filtro, dtype=pl.String).alias("Filtro"),
+        )
+        .select(COLUNAS_BATELADA)
+    )
+    return lf, rejeitados
+
@@ -0,0 +1,58 @@
+# utils/exportacao.py
+# Exportação do recorte filtrado das páginas (Parquet ou CSV), gerada em blocos
+import io
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+# Formato -> (extensão, tipo MIME)
+FORMATOS_EXPORTACAO = {
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "CSV": ("csv", "text/csv"),
+}
+
+# Linhas convertidas para Arrow por vez (um row group do Parquet / um lote do CSV)
+LINHAS_POR_BLOCO = 100_000
+
+
+def esquema_exportacao(df, linhas_por_bloco: int = LINHAS_POR_BLOCO) -> pa.Schema:
+    """
+    Esquema Arrow do recorte inteiro. Tipos inferidos do primeiro bloco; colunas que
+    ficaram nulas nele (object todo vazio no início) recebem o tipo dos valores
+    preenchidos da coluna inteira, ou string se a coluna não tiver nenhum.
+    """
+    esquema = pa.Schema.from_pandas(df.iloc[:linhas_por_bloco], preserve_index=False)
+    for i, campo in enumerate(esquema):
+        if pa.types.is_null(campo.type):
+            preenchidos = df[campo.name].dropna()
+            tipo = pa.array(preenchidos.iloc[:linhas_por_bloco], from_pandas=True).type if len(preenchidos) else pa.string()
+            esquema = esquema.set(i, campo.with_type(tipo))
+    return esquema
+
+
+def exportar_dataframe(df, formato: str, linhas_por_bloco: int = LINHAS_POR_BLOCO) -> bytes:
+    """
+    Escreve 'df' em Parquet (zstd) ou CSV, bloco a bloco: cada fatia é convertida
+    para Arrow, gravada e descartada, sem montar uma cópia Arrow do recorte inteiro.
+    O arquivo em si é montado num BytesIO e devolvido inteiro (saida.getvalue()),
+    então fica todo em memória: a gravação em blocos só evita a cópia Arrow.
+    """
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportação inválido: {formato!r}. Use um de {list(FORMATOS_EXPORTACAO)}.")
+
+    # Esquema único para todos os blocos (um bloco com a coluna toda vazia não define o tipo)
+    esquema = esquema_exportacao(df, linhas_por_bloco)
+    saida = io.BytesIO()
+    if formato == "Parquet":
+        escritor = pq.ParquetWriter(saida, esquema, compression="zstd")
+    else:
+        escritor = pacsv.CSVWriter(saida, esquema)
+
+    try:
+        for inicio in range(0, len(df), linhas_por_bloco):
+            bloco = df.iloc[inicio:inicio + linhas_por_bloco]
+            escritor.write_table(pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False))
+    finally:
+        escritor.close()
+    return saida.getvalue()
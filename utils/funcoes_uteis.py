@@ -1,6 +1,10 @@
+import hashlib
 import os
+import time
 import pandas as pd
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from dotenv import load_dotenv
 from zoneinfo import ZoneInfo
 from supabase import create_client
@@ -40,8 +44,17 @@ def preparar_df(df, ts_cols):
 # Função para enviar os dados ao supabase
 # =========================================
 # Função de envio com processamento em blocos e serialização de datetime com fuso
-def enviar_dados_supabase(df, table_name, url, key, chunk_size=500):
-    supabase = create_client(url, key)
+# Modos de carga:
+# - "substituir": apaga a tabela e insere os blocos (leitores veem a tabela parcial durante a carga)
+# - "troca_atomica": grava na tabela física inativa e troca a view no final (sql/troca_atomica.sql)
+MODOS_CARGA = ("substituir", "troca_atomica")
+
+# 'cliente' permite reaproveitar um cliente já criado (e o pool de conexões dele)
+def enviar_dados_supabase(df, table_name, url, key, chunk_size=500, cliente=None, modo="substituir"):
+    if modo not in MODOS_CARGA:
+        raise ValueError(f"Modo de carga inválido: {modo!r}. Use um de {MODOS_CARGA}.")
+
+    supabase = cliente or create_client(url, key)
 
     # Serialização robusta
     def serializar_valor(valor):
@@ -73,12 +86,95 @@ def enviar_dados_supabase(df, table_name, url, key, chunk_size=500):
                 registro[col] = None
         registros.append(registro)
 
-    # Limpa a tabela
-    supabase.table(table_name).delete().neq("id", 0).execute()
+    if modo == "troca_atomica":
+        # Tabela física inativa, já truncada (as páginas continuam lendo a view)
+        destino = supabase.rpc("preparar_carga", {"p_tabela": table_name}).execute().data
+    else:
+        # Limpa a tabela
+        supabase.table(table_name).delete().neq("id", 0).execute()
+        destino = table_name
 
     # Insere em blocos
     resposta = None
     for i in range(0, len(registros), chunk_size):
         batch = registros[i:i+chunk_size]
-        resposta = supabase.table(table_name).insert(batch).execute()
-    return resposta
\ No newline at end of file
+        resposta = supabase.table(destino).insert(batch).execute()
+
+    if modo == "troca_atomica":
+        # Confere a contagem e aponta a view para a nova geração numa única transação
+        resposta = supabase.rpc("publicar_carga", {"p_tabela": table_name, "p_linhas": len(registros)}).execute()
+    return resposta
+
+
+# ==========================================================
+# Envio de várias tabelas em paralelo
+# ==========================================================
+# "rest": API do Supabase (JSON em blocos); "copy": COPY direto no Postgres
+BACKENDS_CARGA = ("rest", "copy")
+
+def enviar_tabelas_supabase(envios, url, key, chunk_size=500, max_workers=None, modo="substituir",
+                            backend="rest", db_url=None):
+    """
+    Envia cada {tabela: df} de 'envios' em uma thread (as cargas são independentes;
+    o tempo total passa a ser o da maior). Uma falha não interrompe as outras tabelas.
+    backend="rest" (padrão): API do Supabase, com um único cliente para todas as threads.
+    backend="copy": COPY direto no Postgres (db_url), uma conexão por tabela
+    (ver utils/carga_postgres.py).
+    Retorna {tabela: {"status", "linhas", "duracao", "erro"}} com status SUCESSO/FALHA.
+    """
+    if backend not in BACKENDS_CARGA:
+        raise ValueError(f"Backend de carga inválido: {backend!r}. Use um de {BACKENDS_CARGA}.")
+
+    if backend == "copy":
+        if not db_url:
+            raise ValueError("Backend de carga 'copy' requer a URL de conexão do Postgres (SUPABASE_DB_URL).")
+        from .carga_postgres import enviar_dados_postgres
+    else:
+        supabase = create_client(url, key)
+
+    def enviar(table_name, df):
+        inicio = time.time()
+        try:
+            if backend == "copy":
+                enviar_dados_postgres(df, table_name, db_url, modo=modo)
+            else:
+                enviar_dados_supabase(df, table_name, url, key, chunk_size, cliente=supabase, modo=modo)
+            status, erro = "SUCESSO", None
+        except Exception as e:
+            status, erro = "FALHA", f"{type(e).__name__}: {e}"
+        resultado = {"status": status, "linhas": int(len(df)), "duracao": round(time.time() - inicio, 2), "erro": erro}
+        print(f"[{status}] {table_name}: {resultado['linhas']} linhas em {resultado['duracao']}s"
+              + (f" - {erro}" if erro else ""), flush=True)
+        return resultado
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(envios) or 1) as executor:
+        futuros = {tabela: executor.submit(enviar, tabela, df) for tabela, df in envios.items()}
+    return {tabela: futuro.result() for tabela, futuro in futuros.items()}
+
+
+# =====================================================================
+# Registro de versão dos dados (consultado pelas páginas antes de baixar)
+# =====================================================================
+# load_id derivado do conteúdo da tabela: uma carga com os mesmos dados mantém o
+# load_id e não invalida o cache das páginas
+def gerar_load_id(df):
+    assinatura = hashlib.sha1("|".join(f"{c}:{t}" for c, t in df.dtypes.items()).encode("utf-8"))
+    assinatura.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return assinatura.hexdigest()[:16]
+
+def montar_registro_versao(df, table_name, load_id=None, coluna_data="DataHoraReal"):
+    load_id = load_id or gerar_load_id(df)
+    datas = df[coluna_data] if coluna_data in df.columns else pd.Series(dtype="datetime64[ns, UTC]")
+    return {
+        "tabela": table_name,
+        "load_id": load_id,
+        "linhas": int(len(df)),
+        "min_DataHoraReal": datas.min().isoformat() if datas.notna().any() else None,
+        "max_DataHoraReal": datas.max().isoformat() if datas.notna().any() else None,
+        "carregado_em": datetime.now(tz_br).isoformat(),
+    }
+
+# Uma linha por tabela (chave única em 'tabela'); escrita só depois das cargas
+def registrar_versao_supabase(registros, url, key, table_name="versao_dados"):
+    supabase = create_client(url, key)
+    return supabase.table(table_name).upsert(registros, on_conflict="tabela").execute()
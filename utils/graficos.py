@@ -0,0 +1,161 @@
+# utils/graficos.py
+# Figuras Plotly das páginas (séries, comparação alinhada e sobreposição de bateladas)
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+def figuras_series(df, fontes, grafico_unico: bool, janela: int, marcador_bruto=None) -> list[tuple[str | None, go.Figure]]:
+    """
+    Monta as figuras a partir do resultado de consultar_series.
+    As linhas de cada Fonte saem de um único groupby (sem um filtro por Fonte).
+    - grafico_unico: uma figura com a média móvel de cada Fonte, na ordem de 'fontes';
+    - senão: uma figura por Fonte (bruto + média móvel).
+    Com a coluna Outlier (modo "marcar"), as amostras atípicas saem do bruto e da
+    linha e aparecem como marcadores próprios nas figuras por Fonte.
+    Retorna [(subtítulo ou None, figura)].
+    """
+    if "Outlier" in df.columns:
+        marcadas = df["Outlier"].to_numpy(dtype=bool)
+        atipicos = dict(tuple(df[marcadas].groupby("Fonte", sort=False)))
+        df = df[~marcadas]
+    else:
+        atipicos = {}
+    grupos = dict(tuple(df.groupby("Fonte", sort=False)))
+    vazio = df.iloc[0:0]
+
+    if grafico_unico:
+        fig = go.Figure()
+        for fonte in fontes:
+            dados_fonte = grupos.get(fonte, vazio)
+            fig.add_trace(go.Scatter(
+                x=dados_fonte["DataHoraReal"],
+                y=dados_fonte["MediaMovel"],
+                mode="lines",
+                name=fonte
+            ))
+        fig.update_layout(
+            title=f"Médias Móveis - {janela} períodos",
+            xaxis_title="Data",
+            yaxis_title="Valor",
+            height=600
+        )
+        return [(None, fig)]
+
+    figuras = []
+    for fonte in fontes:
+        dados_fonte = grupos.get(fonte, vazio)
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=dados_fonte["DataHoraReal"],
+            y=dados_fonte["Valor"],
+            mode="markers",
+            name="Bruto",
+            marker=marcador_bruto or dict(size=4)
+        ))
+        fig.add_trace(go.Scatter(
+            x=dados_fonte["DataHoraReal"],
+            y=dados_fonte["MediaMovel"],
+            mode="lines",
+            name="Média Móvel"
+        ))
+        if fonte in atipicos:
+            fig.add_trace(go.Scatter(
+                x=atipicos[fonte]["DataHoraReal"],
+                y=atipicos[fonte]["Valor"],
+                mode="markers",
+                name="Atípico",
+                marker=dict(size=8, color="red", symbol="x")
+            ))
+        fig.update_layout(
+            title=fonte,
+            xaxis_title="Data",
+            yaxis_title="Valor",
+            height=500
+        )
+        figuras.append((fonte, fig))
+    return figuras
+
+
+def figura_alinhada(alinhado: pd.DataFrame, passo: str) -> go.Figure:
+    """Séries já alinhadas numa grade comum (uma coluna por Fonte), uma linha por Fonte."""
+    fig = go.Figure()
+    for fonte in alinhado.columns:
+        fig.add_trace(go.Scatter(
+            x=alinhado.index,
+            y=alinhado[fonte],
+            mode="lines",
+            name=fonte
+        ))
+    fig.update_layout(
+        title=f"Fontes alinhadas - grade de {passo}",
+        xaxis_title="Data",
+        yaxis_title="Valor",
+        height=600
+    )
+    return fig
+
+
+def figura_correlacao(alinhado: pd.DataFrame) -> go.Figure:
+    """Correlação (Pearson) entre as Fontes, ponto a ponto na grade comum."""
+    correlacao = alinhado.corr(min_periods=3)
+    fig = go.Figure(go.Heatmap(
+        z=correlacao.to_numpy(),
+        x=list(correlacao.columns),
+        y=list(correlacao.index),
+        zmin=-1,
+        zmax=1,
+        colorscale="RdBu",
+        text=correlacao.round(2).to_numpy(),
+        texttemplate="%{text}",
+    ))
+    fig.update_layout(title="Correlação entre fontes (grade comum)", height=600)
+    return fig
+
+
+def figura_sobreposicao(fonte: str, matriz: pd.DataFrame, envelope: pd.DataFrame) -> go.Figure:
+    """
+    Bateladas sobrepostas por tempo decorrido (matriz batelada x horas, ver utils/sobreposicao.py).
+    Todas as bateladas vão num único trace (linhas separadas por NaN), com o
+    envelope P10-P90, a mediana e a última batelada em destaque.
+    """
+    horas = matriz.columns.to_numpy(dtype=float)
+    bateladas = matriz.index.to_numpy()
+    # Uma coluna NaN ao fim de cada linha quebra a curva entre bateladas
+    x = np.tile(np.append(horas, np.nan), len(bateladas))
+    y = np.column_stack([matriz.to_numpy(dtype=float), np.full(len(bateladas), np.nan)]).ravel()
+    lote = np.repeat(bateladas, len(horas) + 1)
+
+    inferior, mediana, superior = envelope.columns[:3]
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        x=x, y=y, customdata=lote,
+        mode="lines", name=f"Bateladas ({len(bateladas)})",
+        line=dict(color="rgba(150, 150, 150, 0.35)", width=1),
+        hovertemplate="Batelada %{customdata}<br>%{x:.1f} h: %{y:.2f}<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=envelope.index, y=envelope[superior],
+        mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip"
+    ))
+    fig.add_trace(go.Scatter(
+        x=envelope.index, y=envelope[inferior],
+        mode="lines", line=dict(width=0), fill="tonexty", fillcolor="rgba(31, 119, 180, 0.2)",
+        name=f"{inferior}-{superior}"
+    ))
+    fig.add_trace(go.Scatter(
+        x=envelope.index, y=envelope[mediana],
+        mode="lines", line=dict(color="rgb(31, 119, 180)", width=3), name=f"Mediana ({mediana})"
+    ))
+    fig.add_trace(go.Scatter(
+        x=horas, y=matriz.iloc[-1].to_numpy(dtype=float),
+        mode="lines+markers", line=dict(color="crimson", width=2), connectgaps=False,
+        name=f"Batelada {bateladas[-1]} (última)"
+    ))
+    fig.update_layout(
+        title=fonte,
+        xaxis_title="Tempo desde a primeira amostra da batelada (h)",
+        yaxis_title="Valor",
+        height=500
+    )
+    return fig
@@ -0,0 +1,659 @@
+# utils/painel.py
+# Funções compartilhadas pelas páginas do dashboard (pages/*.py)
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+import plotly.graph_objects as go
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import requests
+import streamlit as st
+from dotenv import load_dotenv
+from supabase import create_client, Client
+from zoneinfo import ZoneInfo  # TZ São Paulo
+
+from . import alinhamento, consulta_local, graficos, sobreposicao
+from .cache_escopo import CacheEscopo, ControleRecarga, INTERVALO_MINIMO_RECARGA
+from .cache_swr import CacheSWR
+from .exportacao import FORMATOS_EXPORTACAO, exportar_dataframe
+from .paths import ROOT
+
+# Carrega o .env da pasta atual
+load_dotenv()
+
+TZ_SP = ZoneInfo("America/Sao_Paulo")
+
+# Tabela com o registro de versão escrito pelo export/load_Supabase.py
+TABELA_VERSAO_DADOS = "versao_dados"
+
+# Sem registro de versão, recarrega as tabelas a cada 15 minutos (comportamento antigo)
+INTERVALO_SEM_VERSAO = 15 * 60
+
+
+def get_config(key: str, default: str | None = None) -> str | None:
+    """
+    Busca um valor de configuração na seguinte ordem:
+    1) st.secrets (para Streamlit Cloud / secrets.toml)
+    2) Variáveis de ambiente (para uso com .env + python-dotenv)
+    3) default (se nada encontrado)
+    """
+    # 1) Tenta st.secrets, mas sem quebrar se não houver secrets.toml.
+    # load_if_toml_exists não exibe st.error quando o arquivo não existe: get_config
+    # também é chamada na importação deste módulo, antes do st.set_page_config das páginas.
+    try:
+        if st.secrets.load_if_toml_exists() and key in st.secrets:
+            return st.secrets[key]
+    except FileNotFoundError:
+        # Nenhum secrets.toml definido → ignora e segue
+        pass
+
+    # 2) Tenta variável de ambiente
+    value = os.getenv(key)
+    if value is not None:
+        return value
+
+    # 3) Fallback
+    return default
+
+
+# === Backend de dados ===
+# "supabase" (padrão): PostgREST; "duckdb": SQL local sobre os .parquet do ETL
+BACKEND_DADOS = (get_config("BACKEND_DADOS", "supabase") or "supabase").lower()
+
+# Backend local: limite de pontos por Fonte nos gráficos (0 = sem agregação)
+MAX_PONTOS_GRAFICO = int(get_config("MAX_PONTOS_GRAFICO", "0") or 0) or None
+
+# Opções das páginas de séries para as amostras marcadas como atípicas no ETL
+ROTULOS_ATIPICOS = {
+    "marcar": "Marcar",
+    "excluir": "Excluir da média",
+    "incluir": "Incluir sem marcar",
+}
+
+# Memória máxima das figuras prontas (go.Figure) compartilhadas entre as sessões
+MAX_MB_CACHE_FIGURAS = int(get_config("MAX_MB_CACHE_FIGURAS", "256") or 256)
+
+# Tabela do Supabase -> variável do .env com o .parquet equivalente
+PARQUET_POR_TABELA = {
+    "resultados_analiticos": "PARQUET_AMOSTRAS_HORARIAS",
+    "resultados_bateladas": "PARQUET_AMOSTRAS_BATELADAS",
+    "resumo_bateladas": "PARQUET_RESUMO_BATELADAS",
+    "balanco_metalurgico": "PARQUET_BALANCO_METALURGICO",
+    "alertas": "PARQUET_ALERTAS",
+    "defasagens": "PARQUET_DEFASAGENS",
+}
+
+# Arquivos derivados sem variável no .env: ficam ao lado do consolidado de origem
+# (mesmo padrão do utils/config.py)
+PARQUET_DERIVADOS = {
+    "resumo_bateladas": ("resultados_bateladas", "resumo_bateladas.parquet"),
+    "balanco_metalurgico": ("resultados_analiticos", "balanco_metalurgico.parquet"),
+    "alertas": ("resultados_analiticos", "alertas.parquet"),
+    "defasagens": ("resultados_analiticos", "defasagens.parquet"),
+}
+
+
+def usar_backend_local() -> bool:
+    return BACKEND_DADOS == "duckdb"
+
+
+def caminho_parquet(tabela: str) -> Path:
+    valor = get_config(PARQUET_POR_TABELA[tabela])
+    if valor is None and tabela in PARQUET_DERIVADOS:
+        origem, arquivo = PARQUET_DERIVADOS[tabela]
+        return caminho_parquet(origem).with_name(arquivo)
+    if valor is None:
+        st.error(f"Backend local: variável {PARQUET_POR_TABELA[tabela]} não definida.")
+        st.stop()
+    path = Path(valor)
+    return path if path.is_absolute() else (ROOT / path).resolve()
+
+
+@st.cache_resource
+def conexao_local():
+    return consulta_local.criar_conexao()
+
+
+def validar_backend() -> None:
+    # Backend local não precisa de credenciais do Supabase
+    if not usar_backend_local():
+        conectar_supabase()
+
+
+@st.cache_resource
+def criar_cliente_supabase(url: str, key: str) -> Client:
+    # Um único cliente por processo, compartilhado por páginas e sessões
+    return create_client(url, key)
+
+
+def credenciais_supabase() -> tuple[str, str]:
+    url = get_config("SUPABASE_URL")
+    key = get_config("SUPABASE_KEY")
+
+    if not url or not key:
+        st.error("Configuração de Supabase ausente. Verifique .env (local) ou Secrets (Streamlit Cloud).")
+        st.stop()
+
+    return url, key
+
+
+def conectar_supabase() -> Client:
+    return criar_cliente_supabase(*credenciais_supabase())
+
+
+@st.cache_resource
+def sessao_rest() -> requests.Session:
+    # Sessão HTTP (pool de conexões) compartilhada pelas leituras em CSV
+    return requests.Session()
+
+
+# === Registro de versão (consulta pequena, feita a cada ciclo de auto-refresh) ===
+@st.cache_data(show_spinner=False, ttl=60)
+def ler_versao_dados() -> dict:
+    """
+    Retorna {tabela: registro} a partir da tabela de versão.
+    Em caso de erro (tabela inexistente, rede...), retorna {} e as páginas
+    voltam a recarregar por tempo.
+    """
+    try:
+        resposta = conectar_supabase().table(TABELA_VERSAO_DADOS).select("*").execute()
+    except Exception:
+        return {}
+    return {registro["tabela"]: registro for registro in resposta.data or []}
+
+
+# === Escopo dos caches e recarga manual ===
+@st.cache_resource
+def controle_recarga() -> ControleRecarga:
+    return ControleRecarga(float(get_config("INTERVALO_MINIMO_RECARGA", INTERVALO_MINIMO_RECARGA)))
+
+
+@st.cache_resource
+def cache_derivados() -> CacheEscopo:
+    # Resultados derivados (séries filtradas, intervalos...) com namespace por tabela
+    return CacheEscopo()
+
+
+@st.cache_resource
+def cache_figuras() -> CacheEscopo:
+    # Figuras Plotly prontas (somente leitura), limitadas em memória (descarta as menos usadas)
+    return CacheEscopo(max_entradas=512, max_bytes=MAX_MB_CACHE_FIGURAS * 1024 * 1024)
+
+
+def versao_carga(tabela: str) -> str:
+    if usar_backend_local():
+        # Backend local: a versão é o mtime do .parquet gerado pelo ETL
+        return str(caminho_parquet(tabela).stat().st_mtime_ns)
+    registro = ler_versao_dados().get(tabela)
+    if registro:
+        return str(registro["load_id"])
+    return f"sem_versao_{int(datetime.now().timestamp()) // INTERVALO_SEM_VERSAO}"
+
+
+def versao_tabela(tabela: str) -> str:
+    # Versão da carga + geração manual: todos os caches chaveados por ela são da tabela
+    return f"{versao_carga(tabela)}#{controle_recarga().geracao(tabela)}"
+
+
+def recarregar_dados(*tabelas: str) -> list[str]:
+    """
+    Recarga manual (botão "Recarregar Dados") somente das tabelas informadas.
+    Avança a geração de cada tabela, o que invalida apenas os caches dela
+    (a tabela completa é baixada de novo em segundo plano), e descarta os
+    resultados derivados dela. Cada tabela aceita uma recarga a cada
+    INTERVALO_MINIMO_RECARGA segundos, somando todas as sessões.
+    Retorna as tabelas efetivamente recarregadas.
+    """
+    recarregadas = [tabela for tabela in tabelas if controle_recarga().solicitar(tabela)]
+    if recarregadas:
+        ler_versao_dados.clear()
+    for tabela in recarregadas:
+        cache_derivados().invalidar(tabela)
+        cache_figuras().invalidar(tabela)
+    return recarregadas
+
+
+# === Loaders com paginação e normalização de TZ ===
+def requisitar_postgrest(tabela: str, parametros, prefer: str | None = None) -> requests.Response:
+    # GET em CSV na API REST do Supabase, com a sessão HTTP compartilhada
+    url, key = credenciais_supabase()
+    headers = {"apikey": key, "Authorization": f"Bearer {key}", "Accept": "text/csv"}
+    if prefer:
+        headers["Prefer"] = prefer
+    resposta = sessao_rest().get(f"{url.rstrip('/')}/rest/v1/{tabela}", params=parametros, headers=headers, timeout=60)
+    resposta.raise_for_status()
+    return resposta
+
+
+def ler_csv_postgrest(tabela: str, filtros=(), colunas_data=("DataHoraReal",), pagina_tamanho: int = 1000) -> pd.DataFrame:
+    """
+    Lê 'tabela' do PostgREST em CSV (Accept: text/csv), página a página, e monta o
+    DataFrame com o leitor CSV multi-thread do pyarrow (colunas já tipadas).
+    'filtros' são pares (coluna, operador.valor) da API, ex.: ("Batelada", "gte.10").
+    As colunas de data já são lidas como timestamp UTC e convertidas para o
+    horário de São Paulo, tz-naive (horário local já aplicado).
+    """
+    opcoes = pacsv.ConvertOptions(
+        column_types={coluna: pa.timestamp("ns", tz="UTC") for coluna in colunas_data},
+        strings_can_be_null=True,
+    )
+
+    offset = 0
+    paginas = []
+    while True:
+        parametros = [("select", "*"), *filtros, ("offset", offset), ("limit", pagina_tamanho)]
+        resposta = requisitar_postgrest(tabela, parametros)
+        if not resposta.content.strip():
+            break
+        pagina = pacsv.read_csv(io.BytesIO(resposta.content), convert_options=opcoes)
+        if pagina.num_rows == 0:
+            break
+        paginas.append(pagina)
+        offset += pagina.num_rows
+
+    if not paginas:
+        return pd.DataFrame()
+
+    # Páginas com colunas todas nulas / só inteiros são promovidas ao tipo das demais
+    dados = pa.concat_tables(paginas, promote_options="permissive")
+    for coluna in colunas_data:
+        if coluna in dados.column_names:
+            local = pc.local_timestamp(dados[coluna].cast(pa.timestamp("ns", tz=str(TZ_SP))))
+            dados = dados.set_column(dados.column_names.index(coluna), coluna, local)
+    return dados.to_pandas()
+
+
+# Tabelas completas: cache stale-while-revalidate compartilhado entre as sessões.
+# Quando a versão muda, quem abre a página recebe a última versão boa na hora e a
+# nova é baixada em segundo plano (um único download por tabela).
+@st.cache_resource
+def cache_tabelas() -> CacheSWR:
+    return CacheSWR()
+
+
+def ler_dados_supabase(tabela: str, colunas_data=("DataHoraReal",)) -> pd.DataFrame:
+    return cache_tabelas().obter(
+        (tabela, tuple(colunas_data)),
+        versao_tabela(tabela),
+        lambda: ler_csv_postgrest(tabela, colunas_data=tuple(colunas_data)),
+    )
+
+
+# === Séries em segmentos mensais (carga progressiva) ===
+# Cada mês (horário de São Paulo) é um segmento no cache stale-while-revalidate:
+# a página baixa só os meses do período pedido; ampliar o período baixa só os
+# meses que faltam, e o histórico mais antigo é pré-carregado em segundo plano.
+@st.cache_resource
+def cache_segmentos() -> CacheSWR:
+    return CacheSWR()
+
+
+@st.cache_resource
+def limite_downloads() -> threading.BoundedSemaphore:
+    # Downloads de segmentos simultâneos (todas as sessões)
+    return threading.BoundedSemaphore(4)
+
+
+def meses_do_periodo(inicio: date, fim: date) -> list[str]:
+    if inicio > fim:
+        return []
+    return list(pd.period_range(inicio, fim, freq="M").strftime("%Y-%m"))
+
+
+def ler_segmento_mes(tabela: str, mes: str) -> pd.DataFrame:
+    inicio = pd.Timestamp(f"{mes}-01", tz=TZ_SP)
+    fim = inicio + pd.offsets.MonthBegin(1)
+    filtros = [("DataHoraReal", f"gte.{inicio.isoformat()}"), ("DataHoraReal", f"lt.{fim.isoformat()}")]
+    with limite_downloads():
+        return ler_csv_postgrest(tabela, filtros)
+
+
+def ler_periodo_supabase(tabela: str, inicio: date, fim: date) -> tuple[pd.DataFrame, tuple]:
+    """
+    Linhas dos meses que cobrem [inicio, fim] a partir dos segmentos em cache.
+    Retorna (df, versões dos segmentos servidos).
+    """
+    versao = versao_tabela(tabela)
+    meses = meses_do_periodo(inicio, fim)
+    cache = cache_segmentos()
+
+    # Meses ausentes são baixados em paralelo; os presentes saem do cache na hora
+    for mes in meses:
+        cache.aquecer((tabela, mes), versao, lambda mes=mes: ler_segmento_mes(tabela, mes))
+
+    partes, versoes = [], []
+    for mes in meses:
+        parte, versao_parte = cache.obter_com_versao(
+            (tabela, mes), versao, lambda mes=mes: ler_segmento_mes(tabela, mes)
+        )
+        partes.append(parte)
+        versoes.append(versao_parte)
+
+    partes = [parte for parte in partes if not parte.empty]
+    df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    return df, tuple(versoes)
+
+
+def precarregar_historico(tabela: str, primeira_data: date, antes_de: date) -> None:
+    # Meses anteriores ao período exibido, do mais recente para o mais antigo
+    versao = versao_tabela(tabela)
+    meses = meses_do_periodo(primeira_data, antes_de)[::-1]
+    cache_segmentos().aquecer_em_sequencia(
+        f"historico:{tabela}:{versao}",
+        [((tabela, mes), versao, lambda mes=mes: ler_segmento_mes(tabela, mes)) for mes in meses],
+    )
+
+
+# Linhas brutas somente das fontes/bateladas pedidas (filtro feito no Supabase)
+@st.cache_data(show_spinner=True, max_entries=32)
+def ler_bateladas_versionada(tabela: str, versao: str, fontes: tuple, bat_ini: int, bat_fim: int, pagina_tamanho: int = 1000) -> pd.DataFrame:
+    lista_fontes = ",".join('"' + fonte.replace('"', '\\"') + '"' for fonte in fontes)
+    filtros = [
+        ("Fonte", f"in.({lista_fontes})"),
+        ("Batelada", f"gte.{int(bat_ini)}"),
+        ("Batelada", f"lte.{int(bat_fim)}"),
+    ]
+    return ler_csv_postgrest(tabela, filtros, ("DataHoraReal",), pagina_tamanho)
+
+
+def ler_bateladas_supabase(tabela: str, fontes: tuple, bat_ini: int, bat_fim: int) -> pd.DataFrame:
+    return ler_bateladas_versionada(tabela, versao_tabela(tabela), fontes, bat_ini, bat_fim)
+
+
+# === Leitura independente do backend (as páginas usam estas funções) ===
+@st.cache_data(show_spinner=True, max_entries=8)
+def ler_parquet_local(tabela: str, versao: str) -> pd.DataFrame:
+    return consulta_local.consultar_tabela(conexao_local().cursor(), caminho_parquet(tabela))
+
+
+def ler_tabela(tabela: str, colunas_data=("DataHoraReal",)) -> pd.DataFrame:
+    if usar_backend_local():
+        return ler_parquet_local(tabela, versao_tabela(tabela))
+    return ler_dados_supabase(tabela, colunas_data)
+
+
+@st.cache_data(show_spinner=True, max_entries=32)
+def ler_bateladas_local(tabela: str, versao: str, fontes: tuple, bat_ini: int, bat_fim: int) -> pd.DataFrame:
+    return consulta_local.consultar_bateladas(conexao_local().cursor(), caminho_parquet(tabela), fontes, bat_ini, bat_fim)
+
+
+def ler_bateladas(tabela: str, fontes: tuple, bat_ini: int, bat_fim: int) -> pd.DataFrame:
+    if usar_backend_local():
+        return ler_bateladas_local(tabela, versao_tabela(tabela), fontes, bat_ini, bat_fim)
+    return ler_bateladas_supabase(tabela, fontes, bat_ini, bat_fim)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def intervalos_local(tabela: str, versao: str, fontes: tuple) -> pd.DataFrame:
+    return consulta_local.consultar_intervalos(conexao_local().cursor(), caminho_parquet(tabela), fontes)
+
+
+def intervalo_fontes(tabela: str, fontes: tuple) -> pd.DataFrame:
+    """
+    Fontes presentes nos dados (entre as pedidas) com o intervalo de datas:
+    ['Fonte','Inicio','Fim','Linhas'].
+    """
+    if usar_backend_local():
+        return intervalos_local(tabela, versao_tabela(tabela), fontes)
+    return intervalos_supabase(tabela, versao_tabela(tabela), fontes)
+
+
+def data_local(texto_csv: str):
+    # Única data de uma resposta CSV ('DataHoraReal' + 1 linha) -> horário de São Paulo tz-naive
+    valor = pd.read_csv(io.StringIO(texto_csv))["DataHoraReal"].iloc[0]
+    return pd.Timestamp(valor).tz_convert(TZ_SP).tz_localize(None)
+
+
+def limites_fonte(tabela: str, fonte: str) -> tuple | None:
+    # Primeira/última data e contagem de uma Fonte, sem baixar as linhas
+    base = [("select", "DataHoraReal"), ("Fonte", f"eq.{fonte}"), ("limit", 1)]
+    primeira = requisitar_postgrest(tabela, base + [("order", "DataHoraReal.asc")], prefer="count=exact")
+    linhas = int(primeira.headers.get("Content-Range", "*/0").split("/")[-1] or 0)
+    if linhas == 0:
+        return None
+    ultima = requisitar_postgrest(tabela, base + [("order", "DataHoraReal.desc")])
+    return fonte, data_local(primeira.text), data_local(ultima.text), linhas
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def intervalos_supabase(tabela: str, versao: str, fontes: tuple) -> pd.DataFrame:
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        limites = [item for item in executor.map(lambda fonte: limites_fonte(tabela, fonte), fontes) if item]
+    return pd.DataFrame(limites, columns=["Fonte", "Inicio", "Fim", "Linhas"]).sort_values("Fonte", ignore_index=True)
+
+
+def calcular_series(df: pd.DataFrame, fontes, inicio, fim, janela: int, atipicos: str = "incluir") -> pd.DataFrame:
+    # Filtra fontes/período e calcula a média móvel respeitando a ordem temporal dentro da Fonte
+    # (atípicos do ETL: mesmas regras de consulta_local.consultar_series)
+    df_f = df[
+        (df["Fonte"].isin(fontes)) &
+        (df["DataHoraReal"].dt.date >= inicio) &
+        (df["DataHoraReal"].dt.date <= fim)
+    ]
+    if "Outlier" in df_f.columns:
+        if atipicos == "incluir":
+            df_f = df_f.drop(columns="Outlier")
+        else:
+            df_f = df_f.assign(Outlier=df_f["Outlier"].eq(True).fillna(False).astype(bool))
+            if atipicos == "excluir":
+                df_f = df_f[~df_f["Outlier"]]
+    df_f = df_f.sort_values(consulta_local.ORDEM_SERIES, kind="stable")
+    df_f["MediaMovel"] = (
+        df_f.groupby("Fonte")["Valor"]
+        .transform(lambda valores: valores.rolling(window=janela, min_periods=1).mean())
+    )
+    return df_f
+
+
+@st.cache_data(show_spinner=True, max_entries=64)
+def consultar_series_local(tabela: str, versao: str, fontes: tuple, inicio, fim, janela: int, max_pontos,
+                           atipicos: str = "incluir") -> pd.DataFrame:
+    return consulta_local.consultar_series(
+        conexao_local().cursor(), caminho_parquet(tabela), fontes, inicio, fim, janela, max_pontos, atipicos
+    )
+
+
+def consultar_series(tabela: str, fontes: tuple, inicio, fim, janela: int, atipicos: str = "incluir") -> pd.DataFrame:
+    """
+    Séries filtradas por fontes/período com a coluna MediaMovel (janela em linhas).
+    'atipicos' ("marcar", "excluir" ou "incluir") trata as amostras com Outlier = True
+    do ETL (ver consulta_local.consultar_series); sem a coluna na tabela, é ignorado.
+    Backend local: filtro, média móvel e agregação rodam no DuckDB.
+    Supabase: lê só os segmentos mensais do período (ver ler_periodo_supabase).
+    df.attrs["versao"] identifica os dados usados (chave das figuras).
+    """
+    if usar_backend_local():
+        versao = versao_tabela(tabela)
+        df = consultar_series_local(tabela, versao, fontes, inicio, fim, janela, MAX_PONTOS_GRAFICO, atipicos)
+        df.attrs["versao"] = versao
+        return df
+
+    # Supabase: só os meses do período; o histórico anterior é carregado depois, em segundo plano
+    df, versoes = ler_periodo_supabase(tabela, inicio, fim)
+    intervalos = intervalo_fontes(tabela, fontes)
+    if not intervalos.empty:
+        precarregar_historico(tabela, intervalos["Inicio"].min().date(), inicio)
+
+    def calcular():
+        if df.empty:
+            resultado = pd.DataFrame(columns=["Fonte", "DataHoraReal", "Valor", "MediaMovel"])
+        else:
+            resultado = calcular_series(df, fontes, inicio, fim, janela, atipicos)
+        resultado.attrs["versao"] = versoes
+        return resultado
+
+    return cache_derivados().obter(tabela, ("series", versoes, fontes, inicio, fim, janela, atipicos), calcular)
+
+
+def figura_para_cache(figura: go.Figure) -> go.Figure:
+    """
+    Cópia da figura com os dados já em tipos JSON (datas como texto, listas no lugar
+    de arrays numpy), validada uma única vez aqui. O st.plotly_chart valida de novo
+    toda figura recebida como dict, mas um go.Figure só é copiado e serializado, e
+    sem arrays de datas a serialização a cada execução fica bem mais barata.
+    """
+    return go.Figure(json.loads(figura.to_json()))
+
+
+def figuras_series(tabela: str, df: pd.DataFrame, fontes: tuple, inicio, fim, janela: int, grafico_unico: bool,
+                   marcador_bruto: dict | None = None, atipicos: str = "incluir") -> list[tuple[str | None, go.Figure]]:
+    """
+    Figuras das páginas de séries para o resultado 'df' de consultar_series.
+    As figuras ficam em cache compartilhado entre as sessões (ver figura_para_cache),
+    chaveado pela versão dos dados servidos e pelos filtros: montagem e validação
+    acontecem uma vez por visão; a cada execução o st.plotly_chart só serializa a
+    figura pronta. As figuras são compartilhadas: quem as recebe não deve alterá-las.
+    Retorna [(subtítulo ou None, figura)], pronto para st.plotly_chart.
+    """
+    chave = (
+        "series", df.attrs.get("versao", versao_tabela(tabela)), fontes, inicio, fim, janela, grafico_unico,
+        tuple(sorted((marcador_bruto or {}).items())), MAX_PONTOS_GRAFICO, atipicos,
+    )
+    return cache_figuras().obter(
+        tabela,
+        chave,
+        lambda: [
+            (subtitulo, figura_para_cache(figura))
+            for subtitulo, figura in graficos.figuras_series(df, fontes, grafico_unico, janela, marcador_bruto)
+        ],
+    )
+
+
+def series_alinhadas(tabela: str, fontes: tuple, inicio, fim, passo: str) -> pd.DataFrame:
+    """
+    Séries de 'fontes' reamostradas numa grade comum de 'passo' (utils/alinhamento.py):
+    índice = grade, uma coluna por Fonte. Fica no cache de derivados da tabela, chaveado
+    pela versão dos dados, fontes, período e passo, e é compartilhado entre as sessões.
+    """
+    if usar_backend_local():
+        versao = versao_tabela(tabela)
+
+        def amostras():
+            return consulta_local.consultar_series(
+                conexao_local().cursor(), caminho_parquet(tabela), fontes, inicio, fim, 1
+            )
+    else:
+        df, versao = ler_periodo_supabase(tabela, inicio, fim)
+
+        def amostras():
+            if df.empty:
+                return pd.DataFrame(columns=["Fonte", "DataHoraReal", "Valor"])
+            return calcular_series(df, fontes, inicio, fim, 1)
+
+    return cache_derivados().obter(
+        tabela,
+        ("alinhadas", versao, fontes, inicio, fim, passo),
+        lambda: alinhamento.alinhar_series(amostras(), fontes, alinhamento.grade_tempo(inicio, fim, passo)),
+    )
+
+
+def figuras_sobreposicao(tabela: str, fontes: tuple, bat_ini: int, bat_fim: int, passo_horas: float) -> list[tuple[str, go.Figure]]:
+    """
+    Bateladas de 'fontes' no intervalo sobrepostas por tempo decorrido (utils/sobreposicao.py).
+    As matrizes/envelopes ficam no cache de derivados e as figuras (somente leitura) no
+    cache de figuras, ambos chaveados pela versão da tabela, fontes, intervalo e passo.
+    Retorna [(Fonte, figura)].
+    """
+    chave = ("sobreposicao", versao_tabela(tabela), fontes, bat_ini, bat_fim, passo_horas)
+
+    def calcular():
+        matrizes = sobreposicao.matrizes_decorrido(ler_bateladas(tabela, fontes, bat_ini, bat_fim), passo_horas)
+        return [
+            (fonte, matrizes[fonte], sobreposicao.envelope_percentis(matrizes[fonte]))
+            for fonte in fontes if fonte in matrizes
+        ]
+
+    return cache_figuras().obter(
+        tabela,
+        chave,
+        lambda: [
+            (fonte, figura_para_cache(graficos.figura_sobreposicao(fonte, matriz, envelope)))
+            for fonte, matriz, envelope in cache_derivados().obter(tabela, chave, calcular)
+        ],
+    )
+
+
+def media_movel_por_fonte(df: pd.DataFrame, janela: int) -> pd.DataFrame:
+    # Média móvel de 'janela' linhas dentro de cada Fonte (df já ordenado por Fonte/DataHoraReal)
+    return df.assign(MediaMovel=(
+        df.groupby("Fonte")["Valor"]
+        .transform(lambda valores: valores.rolling(window=janela, min_periods=1).mean())
+    ))
+
+
+# === Tabela detalhada paginada ===
+LINHAS_POR_PAGINA = (50, 100, 500, 1000)
+
+
+def tabela_paginada(df: pd.DataFrame, ordem_padrao: list[str], chave: str, assinatura) -> None:
+    """
+    Mostra 'df' em páginas: a ordenação é feita uma vez no servidor e o índice
+    fica em st.session_state (por 'assinatura' dos filtros e pela coluna escolhida);
+    a cada interação só a fatia da página atual vai para o navegador.
+    """
+    col_ordem, col_desc, col_tamanho, col_pagina = st.columns([2, 1, 1, 1])
+    coluna = col_ordem.selectbox(
+        "Ordenar por:", ["Padrão"] + list(df.columns), key=f"{chave}_ordem"
+    )
+    decrescente = col_desc.checkbox("Decrescente", key=f"{chave}_desc")
+    tamanho = col_tamanho.selectbox("Linhas por página:", LINHAS_POR_PAGINA, key=f"{chave}_tamanho")
+
+    colunas = ordem_padrao if coluna == "Padrão" else [coluna]
+    chave_indice = (assinatura, len(df), tuple(colunas), decrescente)
+    indice = st.session_state.get(f"{chave}_indice")
+    if indice is None or indice[0] != chave_indice:
+        posicoes = (
+            df.reset_index(drop=True)
+            .sort_values(colunas, ascending=not decrescente, kind="stable")
+            .index.to_numpy()
+        )
+        indice = (chave_indice, posicoes)
+        st.session_state[f"{chave}_indice"] = indice
+    posicoes = indice[1]
+
+    paginas = max(1, -(-len(posicoes) // tamanho))
+    pagina = col_pagina.number_input("Página:", min_value=1, max_value=paginas, value=1, step=1, key=f"{chave}_pagina")
+    pagina = min(int(pagina), paginas)
+
+    inicio = (pagina - 1) * tamanho
+    fatia = df.iloc[posicoes[inicio:inicio + tamanho]]
+    st.dataframe(fatia, use_container_width=True)
+    st.caption(f"Linhas {inicio + 1 if len(fatia) else 0}–{inicio + len(fatia)} de {len(posicoes)} (página {pagina} de {paginas})")
+
+
+# === Exportação do recorte filtrado ===
+def botao_exportacao(df: pd.DataFrame, nome_arquivo: str, chave: str, assinatura) -> None:
+    """
+    Exporta 'df' (o recorte que a página está mostrando) em Parquet ou CSV.
+    O arquivo só é gerado quando pedido e fica na sessão enquanto a 'assinatura'
+    dos filtros (e o formato) não mudar; reexecuções da página não o refazem.
+    """
+    col_formato, col_acao = st.columns([1, 3])
+    formato = col_formato.selectbox(
+        "Formato:", list(FORMATOS_EXPORTACAO), key=f"{chave}_formato", label_visibility="collapsed"
+    )
+
+    chave_arquivo = (assinatura, len(df), formato)
+    arquivo = st.session_state.get(f"{chave}_arquivo")
+    if arquivo is None or arquivo[0] != chave_arquivo:
+        if not col_acao.button("📦 Preparar exportação", key=f"{chave}_preparar"):
+            return
+        with st.spinner("Gerando arquivo..."):
+            arquivo = (chave_arquivo, exportar_dataframe(df, formato))
+        st.session_state[f"{chave}_arquivo"] = arquivo
+
+    extensao, mime = FORMATOS_EXPORTACAO[formato]
+    col_acao.download_button(
+        f"⬇️ Baixar {formato} ({len(df)} linhas)",
+        data=arquivo[1],
+        file_name=f"{nome_arquivo}.{extensao}",
+        mime=mime,
+        key=f"{chave}_baixar",
+    )
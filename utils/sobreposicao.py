@@ -0,0 +1,68 @@
+# utils/sobreposicao.py
+# Sobreposição de bateladas por tempo decorrido (curvas de eluição comparáveis entre bateladas).
+# Cada Batelada é rebaseada para o tempo desde a sua primeira amostra e vira uma linha de
+# uma matriz (batelada x faixa de tempo decorrido), com envelopes de percentis por faixa.
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Largura da faixa de tempo decorrido (rótulo -> horas)
+PASSOS_DECORRIDO = {"30 min": 0.5, "1 h": 1.0, "2 h": 2.0, "4 h": 4.0}
+
+# Percentis do envelope (inferior, mediana, superior)
+PERCENTIS_ENVELOPE = (10, 50, 90)
+
+
+def matrizes_decorrido(df: pd.DataFrame, passo_horas: float) -> dict[str, pd.DataFrame]:
+    """
+    Matrizes batelada x tempo decorrido de cada Fonte, a partir das linhas brutas
+    ['Fonte','Batelada','DataHoraReal','Valor'].
+    O início de cada (Fonte, Batelada) sai de um único groupby().transform("min");
+    as amostras caem em faixas de 'passo_horas' e um único pivot monta todas as
+    matrizes (média por faixa). Faixas vazias entre amostras da mesma batelada são
+    interpoladas; antes da primeira e depois da última ficam NaN.
+    Retorna {Fonte: DataFrame(index=Batelada, colunas=horas decorridas no início da faixa)}.
+    """
+    dados = df.dropna(subset=["Valor"])
+    if dados.empty:
+        return {}
+
+    inicio = dados.groupby(["Fonte", "Batelada"])["DataHoraReal"].transform("min")
+    horas = (dados["DataHoraReal"] - inicio).dt.total_seconds() / 3600
+    faixa = np.floor(horas / passo_horas).astype("int64")
+
+    matriz = (
+        pd.DataFrame({
+            "Fonte": dados["Fonte"].to_numpy(),
+            "Batelada": dados["Batelada"].to_numpy(),
+            "Faixa": faixa.to_numpy(),
+            "Valor": dados["Valor"].to_numpy(),
+        })
+        .pivot_table(index=["Fonte", "Batelada"], columns="Faixa", values="Valor", aggfunc="mean")
+    )
+    # Todas as faixas até a maior, mesmo as que nenhuma batelada amostrou
+    matriz = matriz.reindex(columns=range(int(matriz.columns.max()) + 1))
+    matriz = matriz.interpolate(axis=1, limit_area="inside")
+    matriz.columns = matriz.columns * passo_horas
+
+    return {
+        fonte: bloco.droplevel("Fonte").dropna(axis=1, how="all")
+        for fonte, bloco in matriz.groupby(level="Fonte", sort=False)
+    }
+
+
+def envelope_percentis(matriz: pd.DataFrame, percentis=PERCENTIS_ENVELOPE) -> pd.DataFrame:
+    """
+    Percentis de cada faixa de tempo decorrido entre as bateladas da matriz,
+    calculados de uma vez sobre o eixo das bateladas.
+    Retorna DataFrame(index=horas decorridas, colunas ['P10','P50','P90',...,'Bateladas']).
+    """
+    valores = matriz.to_numpy(dtype=float)
+    with warnings.catch_warnings():
+        # Faixas sem nenhuma batelada: percentil NaN (sem aviso)
+        warnings.simplefilter("ignore", RuntimeWarning)
+        faixas = np.nanpercentile(valores, percentis, axis=0)
+    envelope = pd.DataFrame(faixas.T, index=matriz.columns, columns=[f"P{p}" for p in percentis])
+    envelope["Bateladas"] = np.isfinite(valores).sum(axis=0)
+    return envelope
@@ -0,0 +1,75 @@
+# utils/tratamento.py
+# Limpeza vetorizada dos valores de laboratório (usada pelos pipelines do export/ETL.py)
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Número já limpo: sinal opcional, parte inteira e/ou decimal com ponto
+PADRAO_NUMERO = r"^-?(\d+\.?\d*|\.\d+)$"
+# Pontos como separador de milhar sem vírgula decimal: '1.234.567' (dois ou mais grupos)
+PADRAO_MILHAR = r"^-?\d{1,3}(\.\d{3}){2,}$"
+
+
+def converter_valores(brutos) -> tuple[pd.Series, int]:
+    """
+    Converte valores brutos do Excel em float, uma passada por coluna:
+    - números (int/float já convertidos pelo Excel) passam direto;
+    - textos: remove tudo que não for dígito, vírgula, ponto ou sinal
+      (prefixos de limite de detecção '<'/'>', unidades, espaços), descarta os
+      pontos de milhar ('1.234,5' -> '1234,5'; '1.234.567' -> '1234567'), troca a
+      vírgula decimal por ponto e colapsa pontos repetidos ('1..5' -> '1.5').
+      Um ponto único sem vírgula continua decimal ('1.234' -> 1.234).
+    Retorna (valores float64 com NaN onde não converteu, quantidade de rejeitados).
+    Rejeitado = célula preenchida que não virou número.
+    """
+    serie = brutos if isinstance(brutos, pd.Series) else pd.Series(brutos, dtype=object)
+
+    # 1) Números e textos já numéricos: conversão nativa do pandas
+    resultado = pd.to_numeric(serie, errors="coerce").to_numpy(dtype="float64", copy=True)
+
+    # 2) Restante preenchido (textos, datas...): limpeza com kernels do Arrow
+    pendentes = np.isnan(resultado) & serie.notna().to_numpy()
+    if not pendentes.any():
+        return pd.Series(resultado, index=serie.index), 0
+
+    textos = pa.array(serie[pendentes].astype(str).to_numpy(dtype=object), type=pa.string())
+    vazios = pc.equal(pc.utf8_trim_whitespace(textos), "")
+
+    limpos = pc.replace_substring_regex(textos, r"[^\d,.\-]", "")
+    milhar = pc.or_(pc.match_substring(limpos, ","), pc.match_substring_regex(limpos, PADRAO_MILHAR))
+    limpos = pc.if_else(milhar, pc.replace_substring(limpos, ".", ""), limpos)
+    limpos = pc.replace_substring(limpos, ",", ".")
+    limpos = pc.replace_substring_regex(limpos, r"\.{2,}", ".")
+    validos = pc.match_substring_regex(limpos, PADRAO_NUMERO)
+
+    convertidos = pc.cast(pc.if_else(validos, limpos, None), pa.float64())
+    resultado[pendentes] = convertidos.to_numpy(zero_copy_only=False)
+
+    rejeitados = int(pc.sum(pc.and_(pc.invert(validos), pc.invert(vazios))).as_py() or 0)
+    return pd.Series(resultado, index=serie.index), rejeitados
+
+
+def deslocamentos_hora(horas) -> pd.Series:
+    """
+    Converte rótulos de hora ('08:00', '24:00', '08:00:00'...) em Timedelta desde a meia-noite.
+    Mantém a convenção do pipeline: '24:00' vira '23:59' do mesmo dia.
+    Cada rótulo distinto é interpretado uma única vez; rótulos inválidos viram NaT.
+    """
+    serie = pd.Series(horas, dtype=object).astype(str).str.strip().replace({"24:00": "23:59"})
+    codigos, unicos = pd.factorize(serie)
+    base = pd.Timestamp("2000-01-01")
+    offsets = pd.TimedeltaIndex(
+        [pd.to_datetime(f"2000-01-01 {hora}", errors="coerce") - base for hora in unicos]
+    )
+    return pd.Series(offsets.take(codigos, allow_fill=True, fill_value=pd.NaT), index=serie.index)
+
+
+def montar_datahora(datas, horas) -> pd.Series:
+    """
+    DataHoraReal = Data (normalizada para meia-noite) + deslocamento da hora.
+    Equivale a pd.to_datetime(str(data) + " " + hora) sem montar/analisar strings.
+    """
+    datas = pd.to_datetime(pd.Series(datas), errors="coerce").dt.normalize()
+    deslocamentos = deslocamentos_hora(horas)
+    return pd.Series(datas.to_numpy() + deslocamentos.to_numpy(), index=deslocamentos.index)
@@ -1,17 +1,19 @@
 import pandas as pd
-import hashlib
-import requests
 import streamlit as st
 
+from .download import baixar_arquivo_condicional
+
 # URL pública do Parquet no Azure
 URL_PARQUET = URL_PARQUET = 'data/consolidado.parquet'
 
 # Função para verificar se o conteúdo remoto mudou
+# (revalida com ETag/Last-Modified; só baixa de novo se o arquivo mudou)
 def get_remote_hash(url):
-    response = requests.get(url)
-    if response.status_code != 200:
+    try:
+        _, meta = baixar_arquivo_condicional(url)
+    except Exception:
         return None
-    return hashlib.md5(response.content).hexdigest()
+    return meta["md5"]
 
 # Carregar dados com cache de 10 minutos
 @st.cache_data(ttl=6000)